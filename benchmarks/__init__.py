@@ -0,0 +1,18 @@
+"""
+Benchmarks for PVMismatch. Each module prints a report when it's run as a
+module from the root of the repository, *EG*::
+
+    $ python -m benchmarks.bench_mpp
+
+Running the file itself, *EG*: ``python benchmarks/bench_mpp.py``, only works
+if PVMismatch is installed, *EG*: ``pip install -e .``, otherwise
+``pvmismatch`` can't be imported.
+
+The benchmarks are also an `asv <https://asv.readthedocs.io/>`_ suite,
+configured by ``asv.conf.json``. The results of each commit are stored in
+``.asv/results`` so runs can be compared for regressions, *EG*::
+
+    $ asv run master^!  # benchmark the latest commit
+    $ asv continuous master HEAD  # compare HEAD to master
+    $ asv compare <commit> <commit>  # compare stored results
+"""
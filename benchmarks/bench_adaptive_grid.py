@@ -0,0 +1,117 @@
+"""
+Accuracy and run time of IV curves with adaptive points versus log spaced
+points, see :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`. Run
+this module to print a report::
+
+    $ python -m benchmarks.bench_adaptive_grid
+"""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
+from pvmismatch.pvmismatch_lib.pvcell import PVcell, CELL_CACHE
+from pvmismatch.pvmismatch_lib.pvmodule import PVmodule, PCT492, MODULE_CACHE
+from pvmismatch.pvmismatch_lib.pvsystem import PVsystem
+
+NPTS = (51, 101, 200, 500, 1000)  # number of points to compare
+NPTS_REFERENCE = 10000  # number of log spaced points of the reference
+SYSTEMS = ('tiled', 'shaded')
+
+
+def make_system(system, npts, adaptive=False):
+    """
+    Make a system.
+
+    :param system: ``'tiled'`` is the module with partial crossties and
+        -25.1[V] reverse breakdown voltage from
+        ``pvmismatch/contrib/tiled_reference_module.py`` with a few shaded
+        cells, ``'shaded'`` is a small system of default modules with some
+        shaded cells and modules
+    :param npts: number of points in IV curves
+    :param adaptive: if True use adaptive points
+    :return: :class:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem`
+    """
+    # don't reuse curves from other runs
+    CELL_CACHE.clear()
+    MODULE_CACHE.clear()
+    pvconst = PVconstants(npts=npts, adaptive=adaptive)
+    if system == 'tiled':
+        pvcell = PVcell(
+            Rs=0.0181123, Rsh=58.082, Isat1_T0=2.9885E-11,
+            Isat2_T0=1.6622E-07, Isc0_T0=1.437, aRBD=9.0E-4, bRBD=-0.056,
+            VRBD=-25.1, nRBD=4.0, Eg=1.166, alpha_Isc=0.0003551,
+            pvconst=pvconst
+        )
+        pvmod = PVmodule(cell_pos=PCT492, pvcells=pvcell,
+                         Vbypass=np.float64(-0.885),
+                         cellArea=np.float64(38.064), pvconst=pvconst)
+        pvsys = PVsystem(pvconst=pvconst, pvmods=pvmod, numberStrs=1,
+                         numberMods=1)
+        pvsys.setSuns({0: {0: {'Ee': 0.3, 'cells': list(range(0, 80, 10))}}})
+    else:
+        pvsys = PVsystem(pvconst=pvconst, numberStrs=2, numberMods=4)
+        pvsys.setSuns({
+            0: {0: {'Ee': 0.2, 'cells': list(range(12))}, 1: 0.5}, 1: 0.9
+        })
+    return pvsys
+
+
+def pmp_error(system, npts, adaptive, reference=None):
+    """
+    Relative error of max power versus many log spaced points.
+
+    :param system: see :func:`make_system`
+    :param npts: number of points in IV curves
+    :param adaptive: if True use adaptive points
+    :param reference: (``None``) reference max power [W]
+    :return: relative error
+    """
+    if reference is None:
+        reference = make_system(system, NPTS_REFERENCE).Pmp
+    Pmp = make_system(system, npts, adaptive).Pmp
+    return (Pmp - reference) / reference
+
+
+class AdaptiveGridError(object):
+    """Relative error of max power versus the number of points."""
+    params = [SYSTEMS, NPTS, (False, True)]
+    param_names = ['system', 'npts', 'adaptive']
+    unit = 'relative error'
+    timeout = 300
+
+    def setup_cache(self):
+        return dict((system, make_system(system, NPTS_REFERENCE).Pmp)
+                    for system in SYSTEMS)
+
+    def track_pmp_error(self, reference, system, npts, adaptive):
+        return pmp_error(system, npts, adaptive, reference[system])
+
+
+class AdaptiveGridTime(object):
+    """Time to calculate a system from scratch."""
+    params = [SYSTEMS, NPTS, (False, True)]
+    param_names = ['system', 'npts', 'adaptive']
+
+    def time_make_system(self, system, npts, adaptive):
+        make_system(system, npts, adaptive)
+
+
+if __name__ == '__main__':
+    for system in SYSTEMS:
+        reference = make_system(system, NPTS_REFERENCE).Pmp
+        print('%s system, reference npts=%d Pmp=%g[W]' % (
+            system, NPTS_REFERENCE, reference
+        ))
+        print('%6s %12s %10s %12s %10s' % (
+            'npts', 'log error', 'time [s]', 'adaptive', 'time [s]'
+        ))
+        for npts in NPTS + (2000, 5000):
+            row = [npts]
+            for adaptive in (False, True):
+                row.append(pmp_error(system, npts, adaptive, reference))
+                row.append(min(timeit.repeat(
+                    lambda: make_system(system, npts, adaptive),
+                    number=1, repeat=3
+                )))
+            print('%6d %12.2e %10.3f %12.2e %10.3f' % tuple(row))
@@ -0,0 +1,64 @@
+"""
+Memory footprint of :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcell` and
+:class:`~pvmismatch.pvmismatch_lib.pvcell.CompactPVcell`. Run this module to
+print a report::
+
+    $ python -m benchmarks.bench_cell_memory
+"""
+
+from __future__ import print_function
+import tracemalloc
+import numpy as np
+from pvmismatch.pvmismatch_lib.pvcell import (
+    PVcell, CompactPVcell, CELL_CACHE, calc_cells
+)
+
+NCELLS = 10000  # number of cells to measure
+
+
+def cell_bytes(cell_cls, ncells=NCELLS, shaded=True):
+    """
+    Average memory held by each cell, including its IV curve.
+
+    :param cell_cls: :class:`PVcell` or :class:`CompactPVcell`
+    :param ncells: number of cells
+    :param shaded: if True every cell has a different irradiance, otherwise
+        all cells have the same irradiance
+    :return: bytes per cell
+    """
+    template = cell_cls()
+    if shaded:
+        Ee = np.random.RandomState(0).uniform(0.1, 1., ncells)
+    else:
+        Ee = np.ones(ncells)
+    CELL_CACHE.clear()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    pvcells = [template._copy(Ee=Ee_cell) for Ee_cell in Ee]
+    calc_cells(pvcells)
+    CELL_CACHE.clear()  # only count the memory held by the cells
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del pvcells
+    return float(size) / ncells
+
+
+class CellMemory(object):
+    """Bytes per cell of a list of cells."""
+    params = [('PVcell', 'CompactPVcell'), (True, False)]
+    param_names = ['cell', 'shaded']
+    unit = 'bytes'
+
+    def track_bytes_per_cell(self, cell, shaded):
+        cell_cls = {'PVcell': PVcell, 'CompactPVcell': CompactPVcell}[cell]
+        return cell_bytes(cell_cls, shaded=shaded)
+
+
+if __name__ == '__main__':
+    print('bytes per cell for %d cells' % NCELLS)
+    print('%-15s %12s %12s' % ('', 'shaded', 'same Ee'))
+    for cell_cls in (PVcell, CompactPVcell):
+        print('%-15s %12.0f %12.0f' % (
+            cell_cls.__name__, cell_bytes(cell_cls),
+            cell_bytes(cell_cls, shaded=False)
+        ))
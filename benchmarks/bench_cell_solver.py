@@ -0,0 +1,168 @@
+"""
+Run time and residuals of the vectorized cell solvers,
+:meth:`~pvmismatch.pvmismatch_lib.pvcell.PVcell.calcIcell` and
+:meth:`~pvmismatch.pvmismatch_lib.pvcell.PVcell.calcVcell`, versus calling
+:func:`scipy.optimize.newton` for one point at a time, which was used before
+the solvers were vectorized. Run this module to print a report::
+
+    $ python -m benchmarks.bench_cell_solver
+"""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+from scipy.optimize import newton
+from pvmismatch.pvmismatch_lib.pvcell import PVcell, PVcellArray
+
+NPTS = (10, 100, 1000)  # number of points to solve
+NCELLS = 96  # number of cells to solve at once
+METHODS = ('newton', 'vectorized', 'cells')
+
+
+def make_cells(ncells=NCELLS):
+    """
+    Cells with a range of irradiance and temperature.
+
+    :param ncells: number of cells
+    :return: list of :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcell`
+    """
+    return [PVcell(Ee=ee, Tcell=tc) for ee, tc in zip(
+        np.linspace(0.1, 1.0, ncells), np.linspace(298.15, 338.15, ncells)
+    )]
+
+
+def newton_Icell(pvc, Vcell):
+    """
+    Solve cell currents one at a time with :func:`scipy.optimize.newton`.
+
+    :param pvc: cell
+    :param Vcell: cell voltages [V]
+    :return: cell currents [A]
+    """
+    args = (pvc.Igen, pvc.Rs, pvc.Vt, pvc.Isat1, pvc.Isat2, pvc.Rsh)
+    return np.array([newton(pvc.f_Icell, x0=pvc.Isc, args=(v,) + args,
+                            disp=False) for v in Vcell])
+
+
+def newton_Vcell(pvc, Icell):
+    """
+    Solve cell voltages one at a time with :func:`scipy.optimize.newton`.
+
+    :param pvc: cell
+    :param Icell: cell currents [A]
+    :return: cell voltages [V]
+    """
+    args = (pvc.Igen, pvc.Rs, pvc.Vt, pvc.Isat1, pvc.Isat2, pvc.Rsh)
+    return np.array([newton(pvc.f_Vcell, x0=pvc.Voc, args=(i,) + args,
+                            disp=False) for i in Icell])
+
+
+def solve(pvcells, points, method, voltage=True):
+    """
+    Solve all cells.
+
+    :param pvcells: cells
+    :param points: cell voltages [V] if solving currents, or cell currents [A]
+    :param method: ``'newton'`` is :func:`scipy.optimize.newton` for each
+        point of each cell, ``'vectorized'`` is each cell at all points and
+        ``'cells'`` is all cells at all points with
+        :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcellArray`
+    :param voltage: if True solve currents at voltages, otherwise solve
+        voltages at currents
+    :return: currents [A] or voltages [V], shape ``(len(pvcells), points)``
+    """
+    if method == 'newton':
+        f = newton_Icell if voltage else newton_Vcell
+        return np.array([f(pvc, points) for pvc in pvcells])
+    if method == 'vectorized':
+        f = PVcell.calcIcell if voltage else PVcell.calcVcell
+        return np.array([f(pvc, points) for pvc in pvcells])
+    pvcell_array = PVcellArray.from_pvcells(pvcells)
+    points = np.tile(points, (len(pvcells), 1))
+    if voltage:
+        return pvcell_array.calcIcell(points)
+    return pvcell_array.calcVcell(points)
+
+
+def residual(pvcells, points, method, voltage=True):
+    """
+    Largest residual of the diode model,
+    :meth:`~pvmismatch.pvmismatch_lib.pvcell.PVcell.f_Icell`, relative to
+    the cell current.
+
+    :param pvcells: cells
+    :param points: see :func:`solve`
+    :param method: see :func:`solve`
+    :param voltage: see :func:`solve`
+    :return: relative residual
+    """
+    x = solve(pvcells, points, method, voltage)
+    if voltage:
+        Vcell, Icell = np.broadcast_arrays(points, x)
+    else:
+        Icell, Vcell = np.broadcast_arrays(points, x)
+    res = [pvc.f_Icell(i, v, pvc.Igen, pvc.Rs, pvc.Vt, pvc.Isat1, pvc.Isat2,
+                       pvc.Rsh) / (1. + np.abs(i))
+           for pvc, i, v in zip(pvcells, Icell, Vcell)]
+    return np.nanmax(np.abs(res))
+
+
+class CellSolverTime(object):
+    """Time to solve cell currents and voltages."""
+    params = [NPTS, METHODS]
+    param_names = ['npts', 'method']
+
+    def setup(self, npts, method):
+        self.pvcells = make_cells()
+        self.Vcell = np.linspace(-5., 0.7, npts)
+        self.Icell = np.linspace(-5., 10., npts)
+
+    def time_calc_icell(self, npts, method):
+        solve(self.pvcells, self.Vcell, method)
+
+    def time_calc_vcell(self, npts, method):
+        solve(self.pvcells, self.Icell, method, voltage=False)
+
+
+class CellSolverResidual(object):
+    """Largest relative residual of solved cell currents and voltages."""
+    params = [METHODS]
+    param_names = ['method']
+    unit = 'relative residual'
+
+    def setup(self, method):
+        self.pvcells = make_cells()
+        self.Vcell = np.linspace(-5., 0.7, 100)
+        self.Icell = np.linspace(-5., 10., 100)
+
+    def track_icell_residual(self, method):
+        return residual(self.pvcells, self.Vcell, method)
+
+    def track_vcell_residual(self, method):
+        return residual(self.pvcells, self.Icell, method, voltage=False)
+
+
+if __name__ == '__main__':
+    pvcells = make_cells()
+    print('%d cells, time [s] and largest relative residual' % NCELLS)
+    print('%6s %8s' % ('npts', 'solve') + ''.join(
+        '%12s %10s' % (m, 'residual') for m in METHODS
+    ))
+    for npts in NPTS:
+        for voltage in (True, False):
+            if voltage:
+                points = np.linspace(-5., 0.7, npts)
+            else:
+                points = np.linspace(-5., 10., npts)
+            row = [npts, 'Icell' if voltage else 'Vcell']
+            for method in METHODS:
+                # scipy newton is slow, only time it once
+                row.append(min(timeit.repeat(
+                    lambda: solve(pvcells, points, method, voltage),
+                    number=1, repeat=1 if method == 'newton' else 3
+                )))
+                row.append(residual(pvcells, points, method, voltage))
+            print('%6d %8s' % tuple(row[:2]) + ''.join(
+                '%12.4f %10.1e' % tuple(row[n:n + 2])
+                for n in range(2, len(row), 2)
+            ))
@@ -0,0 +1,210 @@
+"""
+Run time of the hot paths of cells, modules, strings and systems, with the
+IV curve caches disabled, so every curve is calculated. Run this module to
+print a report::
+
+    $ python -m benchmarks.bench_hot_paths
+
+or use `asv <https://asv.readthedocs.io/>`_ to store the results of each
+commit and compare them for regressions, see ``asv.conf.json``.
+"""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
+from pvmismatch.pvmismatch_lib.pvcell import PVcell, PVcellArray, CELL_CACHE
+from pvmismatch.pvmismatch_lib.pvmodule import (
+    PVmodule, STD72, STD96, STD128, TCT492, PCT492, MODULE_CACHE
+)
+from pvmismatch.pvmismatch_lib.pvstring import PVstring
+from pvmismatch.pvmismatch_lib.pvsystem import PVsystem
+
+NPTS = (51, 101, 200, 500, 1000)  # number of points in IV curves
+NCURVES = (2, 24, 96)  # number of curves to combine in series or parallel
+MODULES = {'STD72': STD72, 'STD96': STD96, 'STD128': STD128,
+           'TCT492': TCT492, 'PCT492': PCT492}
+SYSTEMS = ('10x10', '100x20')  # number of strings x modules per string
+
+
+class NoCache(object):
+    """Disable the IV curve caches during a benchmark."""
+
+    def setup(self, *args):
+        self.maxsizes = CELL_CACHE.maxsize, MODULE_CACHE.maxsize
+        CELL_CACHE.clear()
+        MODULE_CACHE.clear()
+        CELL_CACHE.maxsize = MODULE_CACHE.maxsize = 0
+
+    def teardown(self, *args):
+        CELL_CACHE.maxsize, MODULE_CACHE.maxsize = self.maxsizes
+
+
+def make_curves(ncurves, npts=NPTS[1]):
+    """
+    IV curves of cells with a range of irradiance.
+
+    :param ncurves: number of curves
+    :param npts: number of points in IV curves
+    :return: :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcellArray`
+    """
+    pvconst = PVconstants(npts=npts)
+    return PVcellArray.from_pvcells([
+        PVcell(Ee=ee, pvconst=pvconst) for ee in np.linspace(0.2, 1., ncurves)
+    ])
+
+
+def shade_module(pvmod):
+    """
+    Shade a few cells of a module.
+
+    :param pvmod: module
+    """
+    cells = list(range(0, pvmod.numberCells, 10))
+    pvmod.setSuns(np.linspace(0.1, 0.9, len(cells)), cells=cells)
+
+
+class CellCurve(NoCache):
+    """Time to calculate the IV curve of a cell."""
+    params = [NPTS]
+    param_names = ['npts']
+
+    def setup(self, npts):
+        NoCache.setup(self)
+        self.pvcell = PVcell(pvconst=PVconstants(npts=npts))
+
+    def time_calc_cell(self, npts):
+        self.pvcell.calcCell()
+
+
+class SeriesParallel(NoCache):
+    """Time to combine IV curves in series and parallel."""
+    params = [NCURVES, NPTS]
+    param_names = ['ncurves', 'npts']
+
+    def setup(self, ncurves, npts):
+        NoCache.setup(self)
+        self.pvcells = make_curves(ncurves, npts)
+
+    def time_calc_series(self, ncurves, npts):
+        pvc = self.pvcells
+        pvc.pvconst.calcSeries(pvc.Icell, pvc.Vcell, pvc.Isc.mean(),
+                               pvc.Icell.max())
+
+    def time_calc_parallel(self, ncurves, npts):
+        pvc = self.pvcells
+        pvc.pvconst.calcParallel(pvc.Icell, pvc.Vcell, pvc.Voc.max(),
+                                 pvc.Vcell.min(), Voc=pvc.Voc.mean())
+
+
+class ModuleCurve(NoCache):
+    """Time to combine the cells of a module with a few shaded cells."""
+    params = [sorted(MODULES)]
+    param_names = ['cell_pos']
+
+    def setup(self, cell_pos):
+        NoCache.setup(self)
+        self.pvmod = PVmodule(cell_pos=MODULES[cell_pos])
+        shade_module(self.pvmod)
+
+    def time_calc_mod(self, cell_pos):
+        self.pvmod.calcMod()
+
+
+class StringSetSuns(NoCache):
+    """Time to set the irradiance of a string with a dictionary."""
+    params = [('module', 'cells', 'modules and cells')]
+    param_names = ['Ee']
+
+    def setup(self, Ee):
+        NoCache.setup(self)
+        self.pvstr = PVstring()
+        self.Ee = {
+            'module': {3: 0.5},
+            'cells': {0: {'Ee': 0.2, 'cells': list(range(12))}},
+            'modules and cells': {
+                0: {'Ee': 0.2, 'cells': list(range(12))}, 1: 0.5,
+                2: {'Ee': (0.3, 0.7), 'cells': (20, 21)}
+            }
+        }[Ee]
+
+    def time_set_suns(self, Ee):
+        self.pvstr.setSuns(self.Ee)
+
+
+class SystemUpdate(NoCache):
+    """
+    Time to construct a system and to combine all of its strings again, each
+    with a different shaded module.
+    """
+    params = [SYSTEMS]
+    param_names = ['size']
+    timeout = 300
+
+    def setup(self, size):
+        NoCache.setup(self)
+        self.numberStrs, self.numberMods = (int(n) for n in size.split('x'))
+        self.pvsys = PVsystem(numberStrs=self.numberStrs,
+                              numberMods=self.numberMods)
+        # shade a different module of each string, so strings aren't the same
+        self.pvsys.setSuns(dict(
+            (s, {s % self.numberMods: {'Ee': 0.2 + 0.5 * s / self.numberStrs,
+                                       'cells': list(range(12))}})
+            for s in range(self.numberStrs)
+        ))
+
+    def time_construct(self, size):
+        PVsystem(numberStrs=self.numberStrs, numberMods=self.numberMods)
+
+    def time_update(self, size):
+        self.pvsys.update(range(self.numberStrs))
+
+
+def report(bench, method, params):
+    """
+    Best time of a benchmark.
+
+    :param bench: benchmark class
+    :param method: name of benchmark method
+    :param params: parameters of benchmark
+    :return: time [s]
+    """
+    b = bench()
+    b.setup(*params)
+    try:
+        return min(timeit.repeat(lambda: getattr(b, method)(*params),
+                                 number=1, repeat=3))
+    finally:
+        b.teardown(*params)
+
+
+if __name__ == '__main__':
+    print('PVcell.calcCell()')
+    for npts in NPTS:
+        print('%10s npts=%-4d %10.5f[s]' % (
+            '', npts, report(CellCurve, 'time_calc_cell', (npts,))
+        ))
+    print('calcSeries() and calcParallel()')
+    for ncurves in NCURVES:
+        for npts in NPTS:
+            print('%10s N=%-2d npts=%-4d %10.5f[s] %10.5f[s]' % (
+                '', ncurves, npts,
+                report(SeriesParallel, 'time_calc_series', (ncurves, npts)),
+                report(SeriesParallel, 'time_calc_parallel', (ncurves, npts))
+            ))
+    print('PVmodule.calcMod()')
+    for cell_pos in sorted(MODULES):
+        print('%10s %-6s %10.5f[s]' % (
+            '', cell_pos, report(ModuleCurve, 'time_calc_mod', (cell_pos,))
+        ))
+    print('PVstring.setSuns()')
+    for Ee in StringSetSuns.params[0]:
+        print('%10s %-17s %10.5f[s]' % (
+            '', Ee, report(StringSetSuns, 'time_set_suns', (Ee,))
+        ))
+    print('PVsystem() and PVsystem.update()')
+    for size in SYSTEMS:
+        print('%10s %-6s %10.5f[s] %10.5f[s]' % (
+            '', size, report(SystemUpdate, 'time_construct', (size,)),
+            report(SystemUpdate, 'time_update', (size,))
+        ))
@@ -0,0 +1,61 @@
+"""
+Cold start time of importing :mod:`pvmismatch` in a new interpreter, and
+which optional heavy modules it loads, *EG*: matplotlib is only imported by
+the ``plot*`` methods. Run this module to print a report::
+
+    $ python -m benchmarks.bench_import
+"""
+
+from __future__ import print_function
+import os
+import subprocess
+import sys
+
+REPEAT = 5  # number of new interpreters to time
+HEAVY_MODULES = ('matplotlib', 'matplotlib.pyplot', 'dulwich')
+IMPORT_TIME = """
+import sys, time
+start = time.perf_counter()
+import pvmismatch
+print(time.perf_counter() - start)
+print(' '.join(m for m in %r if m in sys.modules))
+""" % (HEAVY_MODULES,)
+PROJDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_import():
+    """
+    Import :mod:`pvmismatch` in a new interpreter.
+
+    :return: import time [s] and list of heavy modules that were loaded
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [PROJDIR] + [p for p in [env.get('PYTHONPATH')] if p]
+    )
+    out = subprocess.check_output([sys.executable, '-c', IMPORT_TIME],
+                                  env=env, universal_newlines=True)
+    lines = out.splitlines() + ['']
+    return float(lines[0]), lines[1].split()
+
+
+class ImportTime(object):
+    """Time to import the package in a new interpreter."""
+
+    def timeraw_import_pvmismatch(self):
+        return "import pvmismatch"
+
+    def track_cold_import(self):
+        return min(cold_import()[0] for _ in range(REPEAT))
+    track_cold_import.unit = 'seconds'
+
+    def track_heavy_modules(self):
+        return len(cold_import()[1])
+    track_heavy_modules.unit = 'modules'
+
+
+if __name__ == '__main__':
+    times, heavy = zip(*[cold_import() for _ in range(REPEAT)])
+    print('cold import of pvmismatch, %d interpreters' % REPEAT)
+    print('min %.3f[s], max %.3f[s]' % (min(times), max(times)))
+    print('heavy modules loaded: %s' % (', '.join(heavy[0]) or 'none'))
@@ -0,0 +1,126 @@
+"""
+Accuracy of the max power point calculated by
+:func:`~pvmismatch.pvmismatch_lib.pvsystem.calc_mpp` versus the number of
+points in the IV curves. Run this module to print a report::
+
+    $ python -m benchmarks.bench_mpp
+"""
+
+from __future__ import print_function
+import numpy as np
+from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
+from pvmismatch.pvmismatch_lib.pvsystem import PVsystem, calc_mpp
+
+NPTS = (25, 50, 101, 200, 500, 1000)  # number of points to compare
+NPTS_REFERENCE = 10000  # number of points of the reference max power
+METHODS = ('argmax', 'central', 'strings')
+
+
+def make_system(npts, shaded):
+    """
+    Small system with or without partial shading.
+
+    :param npts: number of points in IV curves
+    :param shaded: if True shade some cells and modules in one string
+    :return: :class:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem`
+    """
+    pvsys = PVsystem(PVconstants(npts=npts), numberStrs=2, numberMods=4)
+    if shaded:
+        pvsys.setSuns({
+            0: {0: {'Ee': 0.2, 'cells': list(range(12))}, 1: 0.5}, 1: 0.9
+        })
+    return pvsys
+
+
+def central_difference_mpp(Isys, Vsys, Psys):
+    """
+    Max power interpolated from the central difference of dP/dV around the
+    largest power, which was used before the max power point was refined.
+
+    :param Isys: currents [A]
+    :param Vsys: voltages [V]
+    :param Psys: powers [W]
+    :return: max power [W]
+    """
+    mpp = np.argmax(Psys)
+    P, V, I = (x[mpp - 1:mpp + 2] for x in (Psys, Vsys, Isys))
+    Pv = np.diff(P) / np.diff(V)
+    Vmid = (V[1:] + V[:-1]) / 2.0
+    Imid = (I[1:] + I[:-1]) / 2.0
+    Vmp = -Pv[0] * np.diff(Vmid)[0] / np.diff(Pv)[0] + Vmid[0]
+    Imp = -Pv[0] * np.diff(Imid)[0] / np.diff(Pv)[0] + Imid[0]
+    return Imp * Vmp
+
+
+def max_power(pvsys, method):
+    """
+    Max power of a system.
+
+    :param pvsys: system
+    :param method: ``'argmax'`` is the largest power in ``Psys``,
+        ``'central'`` is :func:`central_difference_mpp` and ``'strings'``
+        refines it with the string IV curves
+    :return: max power [W]
+    """
+    if method == 'argmax':
+        return pvsys.Psys.max()
+    if method == 'central':
+        return central_difference_mpp(pvsys.Isys, pvsys.Vsys, pvsys.Psys)
+    return calc_mpp(pvsys.Isys, pvsys.Vsys, pvsys.Psys, pvsys.Istring,
+                    pvsys.Vstring)[2]
+
+
+def pmp_error(npts, method, shaded, reference=None):
+    """
+    Relative error of max power versus a system with many more points.
+
+    :param npts: number of points in IV curves
+    :param method: see :func:`max_power`
+    :param shaded: see :func:`make_system`
+    :param reference: (``None``) reference max power [W]
+    :return: relative error
+    """
+    if reference is None:
+        reference = make_system(NPTS_REFERENCE, shaded).Pmp
+    Pmp = max_power(make_system(npts, shaded), method)
+    return (Pmp - reference) / reference
+
+
+class MaxPowerError(object):
+    """Relative error of the max power versus the number of points."""
+    params = [NPTS, METHODS, (False, True)]
+    param_names = ['npts', 'method', 'shaded']
+    unit = 'relative error'
+
+    def setup_cache(self):
+        return dict((shaded, make_system(NPTS_REFERENCE, shaded).Pmp)
+                    for shaded in (False, True))
+
+    def track_pmp_error(self, reference, npts, method, shaded):
+        return pmp_error(npts, method, shaded, reference[shaded])
+
+
+class MaxPowerTime(object):
+    """Time to calculate the max power point of a system."""
+    params = [(101, 1000), METHODS]
+    param_names = ['npts', 'method']
+
+    def setup(self, npts, method):
+        self.pvsys = make_system(npts, shaded=True)
+
+    def time_max_power(self, npts, method):
+        max_power(self.pvsys, method)
+
+
+if __name__ == '__main__':
+    for shaded in (False, True):
+        reference = make_system(NPTS_REFERENCE, shaded).Pmp
+        print('relative Pmp error, %s, reference npts=%d Pmp=%g[W]' % (
+            'shaded' if shaded else 'unshaded', NPTS_REFERENCE, reference
+        ))
+        print('%6s' % 'npts' + ''.join('%12s' % m for m in METHODS))
+        for npts in NPTS:
+            print('%6d' % npts + ''.join(
+                '%12.2e' % pmp_error(npts, method, shaded, reference)
+                for method in METHODS
+            ))
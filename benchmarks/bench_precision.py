@@ -0,0 +1,145 @@
+"""
+Accuracy, memory and run time of IV curves stored and combined with float32
+versus float64, see
+:attr:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants.dtype`. Run this
+module to print a report::
+
+    $ python -m benchmarks.bench_precision
+"""
+
+from __future__ import print_function
+import timeit
+import numpy as np
+from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
+from pvmismatch.pvmismatch_lib.pvcell import PVcell, CELL_CACHE
+from pvmismatch.pvmismatch_lib.pvmodule import PVmodule, PCT492, MODULE_CACHE
+from pvmismatch.pvmismatch_lib.pvsystem import PVsystem
+
+DTYPES = ('float64', 'float32')
+SYSTEMS = ('tiled', 'shaded', 'monte carlo')
+SEED = 20180517  # seed of random irradiance of monte carlo system
+
+
+def make_system(system, dtype, adaptive=False):
+    """
+    Make a system.
+
+    :param system: ``'tiled'`` is the module with partial crossties from
+        ``pvmismatch/contrib/tiled_reference_module.py`` with a few shaded
+        cells, ``'shaded'`` is a small system of default modules with some
+        shaded cells and modules and ``'monte carlo'`` is 10 strings of 10
+        default modules with random irradiance of each cell
+    :param dtype: floating point type of IV curves
+    :param adaptive: if True use adaptive points
+    :return: :class:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem`
+    """
+    # don't reuse curves from other runs
+    CELL_CACHE.clear()
+    MODULE_CACHE.clear()
+    pvconst = PVconstants(adaptive=adaptive, dtype=dtype)
+    if system == 'tiled':
+        pvcell = PVcell(
+            Rs=0.0181123, Rsh=58.082, Isat1_T0=2.9885E-11,
+            Isat2_T0=1.6622E-07, Isc0_T0=1.437, aRBD=9.0E-4, bRBD=-0.056,
+            VRBD=-25.1, nRBD=4.0, Eg=1.166, alpha_Isc=0.0003551,
+            pvconst=pvconst
+        )
+        pvmod = PVmodule(cell_pos=PCT492, pvcells=pvcell,
+                         Vbypass=np.float64(-0.885),
+                         cellArea=np.float64(38.064), pvconst=pvconst)
+        pvsys = PVsystem(pvconst=pvconst, pvmods=pvmod, numberStrs=1,
+                         numberMods=1)
+        pvsys.setSuns({0: {0: {'Ee': 0.3, 'cells': list(range(0, 80, 10))}}})
+    elif system == 'shaded':
+        pvsys = PVsystem(pvconst=pvconst, numberStrs=2, numberMods=4)
+        pvsys.setSuns({
+            0: {0: {'Ee': 0.2, 'cells': list(range(12))}, 1: 0.5}, 1: 0.9
+        })
+    else:
+        pvsys = PVsystem(pvconst=pvconst, numberStrs=10, numberMods=10)
+        # irradiance of each cell rounded to 1% so some cells are the same
+        Ee = np.round(np.random.RandomState(SEED).uniform(
+            0.2, 1.0, (10, 10, 96)
+        ), 2)
+        pvsys.setSuns(dict(
+            (s, dict((m, {'Ee': Ee[s, m], 'cells': list(range(96))})
+                     for m in range(10)))
+            for s in range(10)
+        ))
+    return pvsys
+
+
+def pmp_error(system, dtype, adaptive=False):
+    """
+    Relative error of max power versus float64.
+
+    :param system: see :func:`make_system`
+    :param dtype: floating point type of IV curves
+    :param adaptive: if True use adaptive points
+    :return: relative error
+    """
+    reference = make_system(system, 'float64', adaptive).Pmp
+    Pmp = make_system(system, dtype, adaptive).Pmp
+    return (Pmp - reference) / reference
+
+
+def curve_bytes(pvsys):
+    """
+    Memory used by the unique cell, module, string and system IV curves.
+
+    :param pvsys: system
+    :return: number of bytes
+    """
+    curves = {}
+    for pvstr in pvsys.pvstrs:
+        for pvmod in pvstr.pvmods:
+            for pvc in pvmod.pvcells:
+                curves.update((id(x), x) for x in (pvc.Icell, pvc.Vcell))
+            curves.update((id(x), x) for x in (pvmod.Imod, pvmod.Vmod))
+        curves.update((id(x), x) for x in (pvstr.Istring, pvstr.Vstring))
+    curves.update((id(x), x) for x in (pvsys.Isys, pvsys.Vsys))
+    return sum(x.nbytes for x in curves.values())
+
+
+class PrecisionError(object):
+    """Relative error of max power with float32 versus float64."""
+    params = [SYSTEMS, (False, True)]
+    param_names = ['system', 'adaptive']
+    unit = 'relative error'
+
+    def track_pmp_error(self, system, adaptive):
+        return pmp_error(system, 'float32', adaptive)
+
+
+class PrecisionMemory(object):
+    """Memory used by IV curves."""
+    params = [SYSTEMS, DTYPES]
+    param_names = ['system', 'dtype']
+    unit = 'bytes'
+
+    def track_curve_bytes(self, system, dtype):
+        return curve_bytes(make_system(system, dtype))
+
+
+class PrecisionTime(object):
+    """Time to calculate a system from scratch."""
+    params = [SYSTEMS, DTYPES]
+    param_names = ['system', 'dtype']
+
+    def time_make_system(self, system, dtype):
+        make_system(system, dtype)
+
+
+if __name__ == '__main__':
+    print('%12s %8s %12s %12s %10s %12s' % (
+        'system', 'dtype', 'Pmp [W]', 'error', 'time [s]', 'curves [B]'
+    ))
+    for system in SYSTEMS:
+        for dtype in DTYPES:
+            pvsys = make_system(system, dtype)
+            print('%12s %8s %12.4f %12.2e %10.3f %12d' % (
+                system, dtype, pvsys.Pmp, pmp_error(system, dtype),
+                min(timeit.repeat(lambda: make_system(system, dtype),
+                                  number=1, repeat=3)),
+                curve_bytes(pvsys)
+            ))
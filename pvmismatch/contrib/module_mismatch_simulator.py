@@ -23,12 +23,11 @@ from functools import partial
 from copy import deepcopy
 import os
 import numpy as np
-from scipy.interpolate import interp1d
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 from matplotlib.widgets import Slider
 from matplotlib.widgets import Button
-from past.builtins import raw_input, xrange
+from past.builtins import raw_input
 
 # ==============================================================================
 # Import PVmismatch items
@@ -147,10 +146,11 @@ def plotting_calcs(pvmod, ivp=None):
         ivp.modHeight = 12
     else:
         ivp.modHeight = 16
-    interp_funcs = [interp1d(ivp.Isubstr[i], ivp.Vsubstr[i]) for i in xrange(3)]
-    substring_Vmps = [f(ivp.Imp) for f in interp_funcs]
-    for n, ss_Vmp in enumerate(substring_Vmps):
-        if ss_Vmp < 0:
+    # substrings at their bypass voltage, not just below 0[V], and cells that
+    # are reverse biased at the current through them
+    bypassed, reverse_biased = pvmod.bypass_reverse_bias(ivp.Imp)
+    for n, ss_bypassed in enumerate(bypassed):
+        if ss_bypassed:
             diodobj = ShadeObj(pershade=100,
                                shd_width=pvmod.subStrCells[n],
                                shd_height=ivp.modHeight,
@@ -158,9 +158,7 @@ def plotting_calcs(pvmod, ivp=None):
                                numberCells=numberCells)
             ivp.activediode.append(diodobj)
     # Create coordinates of cells that are reverse biased
-    reversebias = [n for n in range(len(ivp.Icell.T))
-                   if -np.interp(-ivp.Imp, -ivp.Icell.T[n], -ivp.Vcell.T[n]) < 0]
-    boolindx = np.array(reversebias)
+    boolindx = np.flatnonzero(reverse_biased)
     module = np.empty([pvmod.numberCells // ivp.modHeight, ivp.modHeight], dtype=int)
     for n in range(pvmod.numberCells // ivp.modHeight):
         if n % 2 == 0:
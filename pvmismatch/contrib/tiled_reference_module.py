@@ -10,7 +10,8 @@ from matplotlib import pyplot as plt
 if __name__ == "__main__":
     
     # Model parameters
-    NPTS=5000  # Because of the high cell breakdown voltage, NPTS must be >1000
+    NPTS=500  # Because of the high cell breakdown voltage, use adaptive points
+    ADAPTIVE=True  # as accurate as 5000 log spaced points, see PVconstants
     
     # Cell parameters
     RS = 0.0181123  # [ohm] series resistance
@@ -36,13 +37,14 @@ if __name__ == "__main__":
     NUMBERSTRS = 1  # number of strings in parallel
     
     # System definition
+    pvconst = pvconstants.PVconstants(npts=NPTS, adaptive=ADAPTIVE)
     tiledCell = pvcell.PVcell(Rs=RS, Rsh=RSH, Isat1_T0=ISAT1_T0, Isat2_T0=ISAT2_T0,
                     Isc0_T0=ISC0_T0, aRBD=ARBD, VRBD=VRBD_, bRBD=BRBD, 
                     nRBD=NRBD, Eg=EG, alpha_Isc=ALPHA_ISC,
-                    Tcell=TCELL)
+                    Tcell=TCELL, pvconst=pvconst)
     tiledModule = pvmodule.PVmodule(cell_pos=pvmodule.PCT492, pvcells=tiledCell,
-                    Vbypass=VBYPASS, cellArea=CELLAREA)  # Tiled module with partial cross-ties
-    tiledSystem = pvsystem.PVsystem(pvconst=pvconstants.PVconstants(npts=NPTS),
+                    Vbypass=VBYPASS, cellArea=CELLAREA, pvconst=pvconst)  # Tiled module with partial cross-ties
+    tiledSystem = pvsystem.PVsystem(pvconst=pvconst,
                     pvmods=tiledModule, numberStrs=NUMBERSTRS, numberMods=NUMBERMODS)
     
     print('Imp = ' + str(tiledSystem.Imp) + ' A')
@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.interpolate import interp1d
 # Pandas is an optional dependency only used by xlsio, therefore
 # not installed with PVMismatch:
 try:
@@ -70,60 +69,27 @@ def system_layout_to_xls(output_xls_name, pv_sys, write_bpd_act):
     writer.sheets['CellTemp'] = workbook.add_worksheet('CellTemp')
     writer.sheets['BpdAndRbc'] = workbook.add_worksheet('BpdAndRbc')
     if write_bpd_act:
-        pv_sys_vmp = pv_sys.Vmp
         print(pv_sys.Pmp)
+        # bypass diodes that are on and reverse biased cells at Vmp, a
+        # substring is bypassed at its bypass voltage, not as soon as it's
+        # below 0[V], and cells in it are at the current through them
+        bypassed, reverse_biased = pv_sys.bypass_reverse_bias()
     for s, string in enumerate(pv_sys.pvstrs):
-        if write_bpd_act:
-            interp_string_iv = interp1d(string.Vstring, string.Istring)
-            string_imp = interp_string_iv(pv_sys_vmp)
         for m, module in enumerate(string.pvmods):
             cell_pos_df = _create_cell_pos_df(pv_mod=module, nr_string=s,
                                               nr_mod=m)
             ncols = sum(module.subStrCells)
             nrows = int(module.numberCells / ncols)
-            v_bpd_trig = module.Vbypass
             if write_bpd_act:
-                cols_per_substr = module.subStrCells
-                bpd = []
-                cis = []
-                rbc = []
-                # checking for bypass diode activation and reverse bised cells
-                for ss in range(module.numSubStr):
-                    interp_substring_vi = interp1d(module.Isubstr[ss],
-                                                   module.Vsubstr[ss])
-                    substring_vmp = interp_substring_vi(string_imp)
-                    if substring_vmp < 0: # doublecheck if we should compare to 0 here
-                        [bpd.append(2) for nss in range(cols_per_substr[ss])]
-                    else:
-                        [bpd.append(0) for nss in range(cols_per_substr[ss])]
-                    cis_inss = []
-                    for col in range(cols_per_substr[ss]):
-                        cis_inss += [i['idx'] for i in module.cell_pos[ss][col]]
-                    cells_inss = [module.pvcells[ci] for ci in cis_inss]
-                    for cell in cells_inss:
-                        interp_cell_vi = interp1d(cell.Icell.flatten(),
-                                                  cell.Vcell.flatten())
-                        cell_vmp = interp_cell_vi(string_imp)
-                        if cell_vmp < 0:
-                            rbc.append(1)
-                        else:
-                            rbc.append(0)
-                    cis += cis_inss
-
-                cis_series = pd.Series(index=cis, data=rbc)
-                bpd_df = pd.DataFrame(index=cell_pos_df.index,
-                                      columns=cell_pos_df.columns)
-                bpdcols = [[c] * len(bpd_df) for c in bpd]
-                rbc_df = pd.DataFrame(index=cell_pos_df.index,
-                                      columns=cell_pos_df.columns)
-                for c, column in enumerate(cell_pos_df.columns):
-                    bpd_df[column] = bpdcols[c]
-                    for row in cell_pos_df.index:
-                        ci = cell_pos_df.loc[row, column]
-                        rbc_df.loc[row, column] = cis_series[ci]
-                # merging bpd and rbc dataframes into one dataframe, where
+                # substring of each column
+                col_substr = np.repeat(np.arange(module.numSubStr),
+                                       module.subStrCells)
+                cell_idx = cell_pos_df.values.astype(int)
                 # 2 = bypassed cells and 1 = reverse biased cells
-                bpdrbc_df = (bpd_df * 2 + rbc_df).clip(upper=2)
+                bpdrbc = np.where(bypassed[s, m, col_substr], 2,
+                                  reverse_biased[s, m][cell_idx].astype(int))
+                bpdrbc_df = pd.DataFrame(bpdrbc, index=cell_pos_df.index,
+                                         columns=cell_pos_df.columns)
             # writing xls files
             if not write_bpd_act:
                 bpdrbc_df = _create_nan_df(pv_mod=module, nr_string=s, nr_mod=m)
@@ -184,7 +150,11 @@ def system_layout_to_xls(output_xls_name, pv_sys, write_bpd_act):
 
 def set_input_from_xls(input_xls_name, pv_sys, str_num, str_len):
     """Set cell temperatures of a PVMM PV system from an xls"""
+    sys_Ee = {}
+    sys_Tc = {}
     for string in list(range(str_num)):
+        sys_Ee[string] = {}
+        sys_Tc[string] = {}
         for module in list(range(str_len)):
             ncols = sum(pv_sys.pvstrs[string].pvmods[module].subStrCells)
             nrows = int(pv_sys.pvstrs[string].pvmods[module].numberCells/ncols)
@@ -211,5 +181,7 @@ def set_input_from_xls(input_xls_name, pv_sys, str_num, str_len):
                     Ee.append(irrad.loc[row, column])
                     Tc.append(cell_temp.loc[row, column])
                     mod_cell_idxs.append(cell_pos.loc[row, column])
-            pv_sys.setTemps({string:{module:[Tc, mod_cell_idxs]}})
-            pv_sys.setSuns({string:{module:[Ee, mod_cell_idxs]}})
+            sys_Ee[string][module] = [Ee, mod_cell_idxs]
+            sys_Tc[string][module] = [Tc, mod_cell_idxs]
+    # set irradiance and temperature of all cells with one recalculation
+    pv_sys.setConditions(Ee=sys_Ee, Tc=sys_Tc)
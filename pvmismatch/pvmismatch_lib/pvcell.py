@@ -7,10 +7,12 @@ object which is used by modules, strings and systems.
 
 from __future__ import absolute_import
 from future.utils import iteritems
-from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
+from copy import copy
+import weakref
+from pvmismatch.pvmismatch_lib.pvconstants import (
+    PVconstants, LRUCache, quantize, adaptive_points
+)
 import numpy as np
-from matplotlib import pyplot as plt
-from scipy.optimize import newton
 
 # Defaults
 RS = 0.004267236774264931  # [ohm] series resistance
@@ -26,86 +28,169 @@ NRBD = 3.284628553041425  # reverse breakdown exponent
 EG = 1.1  # [eV] band gap of cSi
 ALPHA_ISC = 0.0003551  # [1/K] short circuit current temperature coefficient
 EPS = np.finfo(np.float64).eps
+CELL_PARAMS = ('Rs', 'Rsh', 'Isat1_T0', 'Isat2_T0', 'Isc0_T0', 'aRBD', 'bRBD',
+               'VRBD', 'nRBD', 'Eg', 'alpha_Isc', 'Tcell', 'Ee', 'VocSTC')
+CELL_CURVES = ('Icell', 'Vcell', 'Pcell')  # attributes set by calcCell()
+#: cell parameters shared by compact cells, see :class:`PVcellParams`
+DIODE_PARAMS = tuple(k for k in CELL_PARAMS if k not in ('Tcell', 'Ee'))
+CELL_CACHE = LRUCache()
+"""
+Process-wide cache of cell IV curves keyed by :attr:`PVcell.cache_key`, set
+``CELL_CACHE.maxsize = 0`` to disable it
+"""
+NEWTON_TOL = 1e-12  # relative tolerance of the vectorized cell solver
+NEWTON_MAXITER = 100  # max iterations of the vectorized cell solver
 
-class PVcell(object):
+
+def _newton_bracket(fprime, x, lo, hi):
     """
-    Class for PV cells.
+    Vectorized Newton's method safeguarded by brackets for a decreasing
+    function. Steps that leave the bracket are replaced by bisection.
+
+    :param fprime: callable that returns the function and its derivative
+    :param x: initial guesses
+    :param lo: lower brackets where the function is not negative
+    :param hi: upper brackets where the function is not positive
+    :return: roots
+    """
+    x, lo, hi = (np.array(y, dtype=np.float64) for y in
+                 np.broadcast_arrays(x, lo, hi))
+    for _ in range(NEWTON_MAXITER):
+        f, df = fprime(x)
+        lo = np.where(f > 0, x, lo)
+        hi = np.where(f < 0, x, hi)
+        xnew = x - f / df
+        # not in bracket, also catches nan and inf
+        bisect = ~((xnew >= lo) & (xnew <= hi))
+        xnew = np.where(bisect, (lo + hi) / 2., xnew)
+        converged = np.abs(xnew - x) <= NEWTON_TOL * (1. + np.abs(x))
+        x = xnew
+        if converged.all():
+            break
+    return x
+
 
+def solve_Icell(Vcell, Igen, Rs, Vt, Isat1, Isat2, Rsh):
+    """
+    Solve the cell current at cell voltages without reverse breakdown, see
+    :meth:`PVcellBase.f_Icell`. Arguments are broadcast together, so many
+    voltages and many cells can be solved at once.
+
+    The residual is a concave, decreasing function of the current, so
+    Newton's method started above the root converges without overshoot. The
+    start and brackets are from bounds on the diode currents: they are more
+    than ``-Isat1 - Isat2``, not positive if the diode voltage isn't positive
+    and the first diode alone is more than the current it's bounded by.
+
+    :param Vcell: cell voltage [V]
+    :param Igen: photogenerated current at Tcell and Ee [A]
     :param Rs: series resistance [ohms]
+    :param Vt: thermal voltage [V]
+    :param Isat1: first diode saturation current at Tcell [A]
+    :param Isat2: second diode saturation current [A]
     :param Rsh: shunt resistance [ohms]
-    :param Isat1_T0: first saturation diode current at ref temp [A]
-    :param Isat2_T0: second saturation diode current [A]
-    :param Isc0_T0: short circuit current at ref temp [A]
-    :param aRBD: reverse breakdown coefficient 1
-    :param bRBD: reverse breakdown coefficient 2
-    :param VRBD: reverse breakdown voltage [V]
-    :param nRBD: reverse breakdown exponent
-    :param Eg: band gap [eV]
-    :param alpha_Isc: short circuit current temp coeff [1/K]
-    :param Tcell: cell temperature [K]
-    :param Ee: incident effective irradiance [suns]
-    :param pvconst: configuration constants object
-    :type pvconst: :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`
+    :return: cell current [A]
     """
+    def fprime(Icell):
+        Vdiode = Vcell + Icell * Rs
+        Idiode1 = Isat1 * np.exp(Vdiode / Vt)
+        Idiode2 = Isat2 * np.exp(Vdiode / 2. / Vt)
+        f = Igen - Idiode1 + Isat1 - Idiode2 + Isat2 - Vdiode / Rsh - Icell
+        df = -Rs * (Idiode1 / Vt + Idiode2 / 2. / Vt + 1. / Rsh) - 1.
+        return f, df
+    hi = (Igen + Isat1 + Isat2 - Vcell / Rsh) / (1. + Rs / Rsh)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # first diode current is more than the generated and series currents
+        Idiode1 = Igen + Isat2 + np.maximum(Vcell, 0.) / Rs
+        Vdiode = Vt * np.log1p(Idiode1 / Isat1)
+        hi = np.where(Rs > 0, np.minimum(hi, (Vdiode - Vcell) / Rs), hi)
+        lo = np.fmin(Igen, -Vcell / Rs)  # diode voltage isn't positive
+    return _newton_bracket(fprime, hi, lo, hi)
 
-    _calc_now = False  #: if True ``calcCells()`` is called in ``__setattr__``
 
-    def __init__(self, Rs=RS, Rsh=RSH, Isat1_T0=ISAT1_T0, Isat2_T0=ISAT2_T0,
-                 Isc0_T0=ISC0_T0, aRBD=ARBD, bRBD=BRBD, VRBD=VRBD_,
-                 nRBD=NRBD, Eg=EG, alpha_Isc=ALPHA_ISC,
-                 Tcell=TCELL, Ee=1., pvconst=PVconstants()):
-        # user inputs
-        self.Rs = Rs  #: [ohm] series resistance
-        self.Rsh = Rsh  #: [ohm] shunt resistance
-        self.Isat1_T0 = Isat1_T0  #: [A] diode one sat. current at T0
-        self.Isat2_T0 = Isat2_T0  #: [A] diode two saturation current
-        self.Isc0_T0 = Isc0_T0  #: [A] short circuit current at T0
-        self.aRBD = aRBD  #: reverse breakdown coefficient 1
-        self.bRBD = bRBD  #: reverse breakdown coefficient 2
-        self.VRBD = VRBD  #: [V] reverse breakdown voltage
-        self.nRBD = nRBD  #: reverse breakdown exponent
-        self.Eg = Eg  #: [eV] band gap of cSi
-        self.alpha_Isc = alpha_Isc  #: [1/K] short circuit temp. coeff.
-        self.Tcell = Tcell  #: [K] cell temperature
-        self.Ee = Ee  #: [suns] incident effective irradiance on cell
-        self.pvconst = pvconst  #: configuration constants
-        self.Icell = None  #: cell currents on IV curve [A]
-        self.Vcell = None  #: cell voltages on IV curve [V]
-        self.Pcell = None  #: cell power on IV curve [W]
-        self.VocSTC = self._VocSTC()  #: estimated Voc at STC [V]
-        # set calculation flag
-        self._calc_now = True  # overwrites the class attribute
+def solve_Vcell(Icell, Igen, Rs, Vt, Isat1, Isat2, Rsh):
+    """
+    Solve the cell voltage at cell currents without reverse breakdown, see
+    :func:`solve_Icell`. The diode voltage is solved first, which is a
+    concave, decreasing function as well, then the cell voltage is
+    ``Vdiode - Icell * Rs``.
 
-    def __str__(self):
-        fmt = '<PVcell(Ee=%g[suns], Tcell=%g[K], Isc=%g[A], Voc=%g[V])>'
-        return fmt % (self.Ee, self.Tcell, self.Isc, self.Voc)
+    :param Icell: cell current [A]
+    :param Igen: photogenerated current at Tcell and Ee [A]
+    :param Rs: series resistance [ohms]
+    :param Vt: thermal voltage [V]
+    :param Isat1: first diode saturation current at Tcell [A]
+    :param Isat2: second diode saturation current [A]
+    :param Rsh: shunt resistance [ohms]
+    :return: cell voltage [V]
+    """
+    def fprime(Vdiode):
+        Idiode1 = Isat1 * np.exp(Vdiode / Vt)
+        Idiode2 = Isat2 * np.exp(Vdiode / 2. / Vt)
+        f = Igen - Idiode1 + Isat1 - Idiode2 + Isat2 - Vdiode / Rsh - Icell
+        df = -Idiode1 / Vt - Idiode2 / 2. / Vt - 1. / Rsh
+        return f, df
+    # first diode current is more than the rest of the generated current
+    hi = Vt * np.log1p(np.maximum(Igen - Icell + Isat2, 0.) / Isat1)
+    lo = np.minimum(Rsh * (Igen - Icell), 0.)  # diode voltage isn't positive
+    Vdiode = _newton_bracket(fprime, hi, lo, hi)
+    return Vdiode - Icell * Rs
 
-    def __repr__(self):
-        return str(self)
 
-    def __setattr__(self, key, value):
-        # check for floats
-        try:
-            value = np.float64(value)
-        except (TypeError, ValueError):
-            pass  # fail silently if not float, eg: pvconst or _calc_now
-        super(PVcell, self).__setattr__(key, value)
-        # recalculate IV curve
-        if self._calc_now:
-            Icell, Vcell, Pcell = self.calcCell()
-            self.__dict__.update(Icell=Icell, Vcell=Vcell, Pcell=Pcell)
+def as_dtype(curves, dtype):
+    """
+    Cell curves are always calculated with float64, since the diode
+    exponentials need its range, then stored with the type of
+    :attr:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants.dtype`. Values
+    that overflow it, like currents at the reverse breakdown voltage, are
+    clipped to its largest finite value.
 
-    def update(self, **kwargs):
+    :param curves: cell currents, voltages and powers
+    :param dtype: floating point type to store curves with
+    :return: curves with type ``dtype``
+    """
+    if dtype == np.float64:
+        return tuple(curves)
+    fmax = np.finfo(dtype).max
+    return tuple(np.clip(x, -fmax, fmax).astype(dtype) for x in curves)
+
+
+class PVcellBase(object):
+    """
+    Diode model of PV cells used by :class:`PVcell` and
+    :class:`CompactPVcell`. Subclasses provide the cell parameters, the
+    irradiance, ``Ee``, the temperature, ``Tcell``, and the configuration
+    constants, ``pvconst``.
+    """
+    __slots__ = ()
+
+    def _lookup_curves(self):
         """
-        Update user-defined constants.
+        Get the IV curve from :data:`CELL_CACHE` or calculate and cache it.
+
+        :return: read-only ``Icell``, ``Vcell`` and ``Pcell``
         """
-        # turn off calculation flag until all attributes are updated
-        self._calc_now = False
-        # don't use __dict__.update() instead use setattr() to go through
-        # custom __setattr__() so that numbers are cast to floats
-        for k, v in iteritems(kwargs):
-            setattr(self, k, v)
-        self._calc_now = True  # recalculate
+        key = self.cache_key
+        IVcell = CELL_CACHE.get(key)
+        if IVcell is None:
+            IVcell = self.calcCell()
+            # cached curves are shared by cells, so don't let them change
+            for x in IVcell:
+                x.flags.writeable = False
+            CELL_CACHE.put(key, IVcell)
+        return IVcell
+
+    @property
+    def cache_key(self):
+        """
+        Cell parameters rounded to
+        :data:`~pvmismatch.pvmismatch_lib.pvconstants.CACHE_DIGITS` significant
+        digits, the number of points in the IV curve, if the points are
+        adaptive and the floating point type of the curve.
+        """
+        return tuple(quantize(getattr(self, k)) for k in CELL_PARAMS) + (
+            self.pvconst.npts, self.pvconst.adaptive, self.pvconst.dtype.name
+        )
 
     @property
     def Vt(self):
@@ -208,7 +293,9 @@ class PVcell(object):
 
     def calcCell(self):
         """
-        Calculate cell I-V curves.
+        Calculate cell I-V curves. If ``pvconst.adaptive`` is True, then the
+        diode voltages are moved to where the curve bends by
+        :func:`~pvmismatch.pvmismatch_lib.pvconstants.adaptive_points`.
         Returns (Icell, Vcell, Pcell) : tuple of numpy.ndarray of float
         """
         Vreverse = self.VRBD * self.pvconst.negpts
@@ -228,6 +315,23 @@ class PVcell(object):
         Vquad4 = Vff + delta_Voc * self.pvconst.Vmod_q4pts
         Vforward = Vff * self.pvconst.pts
         Vdiode = np.concatenate((Vreverse, Vforward, Vquad4), axis=0)
+        Icell, Vcell = self.calcIV(Vdiode)
+        if self.pvconst.adaptive:
+            # move the diode voltages to where the curve bends
+            Vdiode = adaptive_points(
+                Vdiode.T, Vcell.T, Icell.T, self.VocSTC, self.Isc0_T0
+            ).T
+            Icell, Vcell = self.calcIV(Vdiode)
+        Pcell = Icell * Vcell
+        return as_dtype((Icell, Vcell, Pcell), self.pvconst.dtype)
+
+    def calcIV(self, Vdiode):
+        """
+        Calculate cell currents and voltages at diode voltages.
+
+        :param Vdiode: diode voltages [V]
+        :return: cell currents [A] and voltages [V]
+        """
         Idiode1 = self.Isat1 * (np.exp(Vdiode / self.Vt) - 1.)
         Idiode2 = self.Isat2 * (np.exp(Vdiode / 2. / self.Vt) - 1.)
         Ishunt = Vdiode / self.Rsh
@@ -239,8 +343,7 @@ class PVcell(object):
         IRBD = (self.aRBD * Vdiode_norm + self.bRBD * Vdiode_norm ** 2) * fRBD 
         Icell = self.Igen - Idiode1 - Idiode2 - Ishunt - IRBD
         Vcell = Vdiode - Icell * self.Rs
-        Pcell = Icell * Vcell
-        return Icell, Vcell, Pcell
+        return Icell, Vcell
 
     # diode model
     #  *-->--*--->---*--Rs->-Icell--+
@@ -277,13 +380,15 @@ class PVcell(object):
 
     def calcIcell(self, Vcell):
         """
-        Calculate Icell as a function of Vcell.
-        :param Vcell: cell voltage [V]
+        Calculate Icell as a function of Vcell, without reverse breakdown,
+        using :func:`solve_Icell`.
+
+        :param Vcell: cell voltage [V], scalar or array
         :return: Icell
         """
-        args = (np.float64(Vcell), self.Igen, self.Rs, self.Vt,
-                self.Isat1, self.Isat2, self.Rsh)
-        return newton(self.f_Icell, x0=self.Isc, args=args)
+        Icell = solve_Icell(Vcell, self.Igen, self.Rs, self.Vt, self.Isat1,
+                            self.Isat2, self.Rsh)
+        return Icell[()]
 
     @staticmethod
     def f_Vcell(Vcell, Icell, Igen, Rs, Vt, Isat1, Isat2, Rsh):
@@ -291,19 +396,22 @@ class PVcell(object):
 
     def calcVcell(self, Icell):
         """
-        Calculate Vcell as a function of Icell.
-        :param Icell: cell current [A]
+        Calculate Vcell as a function of Icell, without reverse breakdown,
+        using :func:`solve_Vcell`.
+
+        :param Icell: cell current [A], scalar or array
         :return: Vcell
         """
-        args = (np.float64(Icell), self.Igen, self.Rs, self.Vt,
-                self.Isat1, self.Isat2, self.Rsh)
-        return newton(self.f_Vcell, x0=self.Voc, args=args)
+        Vcell = solve_Vcell(Icell, self.Igen, self.Rs, self.Vt, self.Isat1,
+                            self.Isat2, self.Rsh)
+        return Vcell[()]
 
     def plot(self):
         """
         Plot cell I-V curve.
         Returns cellPlot : matplotlib.pyplot figure
         """
+        from matplotlib import pyplot as plt  # only import to plot
         cell_plot = plt.figure()
         plt.subplot(2, 2, 1)
         plt.plot(self.Vcell, self.Icell)
@@ -337,3 +445,624 @@ class PVcell(object):
         plt.grid()
         plt.tight_layout()
         return cell_plot
+
+
+class PVcell(PVcellBase):
+    """
+    Class for PV cells.
+
+    :param Rs: series resistance [ohms]
+    :param Rsh: shunt resistance [ohms]
+    :param Isat1_T0: first saturation diode current at ref temp [A]
+    :param Isat2_T0: second saturation diode current [A]
+    :param Isc0_T0: short circuit current at ref temp [A]
+    :param aRBD: reverse breakdown coefficient 1
+    :param bRBD: reverse breakdown coefficient 2
+    :param VRBD: reverse breakdown voltage [V]
+    :param nRBD: reverse breakdown exponent
+    :param Eg: band gap [eV]
+    :param alpha_Isc: short circuit current temp coeff [1/K]
+    :param Tcell: cell temperature [K]
+    :param Ee: incident effective irradiance [suns]
+    :param pvconst: configuration constants object
+    :type pvconst: :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`
+
+    If :attr:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants.lazy` is set,
+    then changing an attribute only invalidates the IV curve, and it's
+    calculated on first access of ``Icell``, ``Vcell`` or ``Pcell``.
+    """
+
+    _calc_now = False  #: if True ``calcCells()`` is called in ``__setattr__``
+
+    def __init__(self, Rs=RS, Rsh=RSH, Isat1_T0=ISAT1_T0, Isat2_T0=ISAT2_T0,
+                 Isc0_T0=ISC0_T0, aRBD=ARBD, bRBD=BRBD, VRBD=VRBD_,
+                 nRBD=NRBD, Eg=EG, alpha_Isc=ALPHA_ISC,
+                 Tcell=TCELL, Ee=1., pvconst=PVconstants()):
+        # user inputs
+        self.Rs = Rs  #: [ohm] series resistance
+        self.Rsh = Rsh  #: [ohm] shunt resistance
+        self.Isat1_T0 = Isat1_T0  #: [A] diode one sat. current at T0
+        self.Isat2_T0 = Isat2_T0  #: [A] diode two saturation current
+        self.Isc0_T0 = Isc0_T0  #: [A] short circuit current at T0
+        self.aRBD = aRBD  #: reverse breakdown coefficient 1
+        self.bRBD = bRBD  #: reverse breakdown coefficient 2
+        self.VRBD = VRBD  #: [V] reverse breakdown voltage
+        self.nRBD = nRBD  #: reverse breakdown exponent
+        self.Eg = Eg  #: [eV] band gap of cSi
+        self.alpha_Isc = alpha_Isc  #: [1/K] short circuit temp. coeff.
+        self.Tcell = Tcell  #: [K] cell temperature
+        self.Ee = Ee  #: [suns] incident effective irradiance on cell
+        self.pvconst = pvconst  #: configuration constants
+        self.Icell = None  #: cell currents on IV curve [A]
+        self.Vcell = None  #: cell voltages on IV curve [V]
+        self.Pcell = None  #: cell power on IV curve [W]
+        self.VocSTC = self._VocSTC()  #: estimated Voc at STC [V]
+        # set calculation flag
+        self._calc_now = True  # overwrites the class attribute
+
+    def __str__(self):
+        fmt = '<PVcell(Ee=%g[suns], Tcell=%g[K], Isc=%g[A], Voc=%g[V])>'
+        return fmt % (self.Ee, self.Tcell, self.Isc, self.Voc)
+
+    def __repr__(self):
+        return str(self)
+
+    def __setattr__(self, key, value):
+        # check for floats
+        try:
+            value = np.float64(value)
+        except (TypeError, ValueError):
+            pass  # fail silently if not float, eg: pvconst or _calc_now
+        super(PVcell, self).__setattr__(key, value)
+        # recalculate IV curve
+        if self._calc_now:
+            if self.pvconst.lazy:
+                self.invalidate()
+                return
+            self._set_curves(*self._lookup_curves())
+
+    def __getattr__(self, name):
+        # only called if attribute is missing, IE: IV curve was invalidated
+        if name in CELL_CURVES:
+            calc_cells([self])
+            return self.__dict__[name]
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+        )
+
+    def invalidate(self):
+        """
+        Discard the IV curve, so it's calculated again on next access.
+        """
+        for name in CELL_CURVES:
+            self.__dict__.pop(name, None)
+
+    def _has_curves(self):
+        """True if the IV curve is calculated, *IE*: not invalidated"""
+        return CELL_CURVES[0] in self.__dict__
+
+    def _set_curves(self, Icell, Vcell, Pcell):
+        """Set the IV curve calculated by :func:`calc_cells`."""
+        self.__dict__.update(Icell=Icell, Vcell=Vcell, Pcell=Pcell)
+
+    def _copy(self, **params):
+        """
+        Copy the cell with new parameters, *EG*: ``Ee`` or ``Tcell``, without
+        calculating the IV curve. Use :func:`calc_cells` to calculate many
+        copies at once.
+
+        :param params: cell parameters to set on the copy
+        :return: new cell with an invalidated IV curve
+        """
+        new_pvcell = copy(self)
+        new_pvcell.__dict__['_calc_now'] = False  # don't calculate yet
+        for k, v in iteritems(params):
+            setattr(new_pvcell, k, v)
+        new_pvcell.invalidate()
+        new_pvcell.__dict__['_calc_now'] = True
+        return new_pvcell
+
+    def update(self, **kwargs):
+        """
+        Update user-defined constants.
+        """
+        # turn off calculation flag until all attributes are updated
+        self._calc_now = False
+        # don't use __dict__.update() instead use setattr() to go through
+        # custom __setattr__() so that numbers are cast to floats
+        for k, v in iteritems(kwargs):
+            setattr(self, k, v)
+        self._calc_now = True  # recalculate
+
+
+class PVcellParams(object):
+    """
+    Immutable diode parameters and configuration constants shared by
+    :class:`CompactPVcell` objects. Use :meth:`get` instead of creating them
+    so that cells with the same parameters share the same object.
+
+    :param pvconst: configuration constants object
+    :type pvconst: :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`
+    :param params: values of each of :data:`DIODE_PARAMS`
+    """
+    __slots__ = DIODE_PARAMS + ('pvconst', '__weakref__')
+    _shared = weakref.WeakValueDictionary()  # parameters in use
+
+    def __init__(self, pvconst, **params):
+        for k in DIODE_PARAMS:
+            object.__setattr__(self, k, np.float64(params[k]))
+        object.__setattr__(self, 'pvconst', pvconst)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('%s is immutable' % self.__class__.__name__)
+
+    def __reduce__(self):
+        params = dict((k, getattr(self, k)) for k in DIODE_PARAMS)
+        return _get_pvcell_params, (self.pvconst, params)
+
+    @classmethod
+    def get(cls, pvconst, **params):
+        """
+        Get the shared parameters with these values, or create them.
+
+        :param pvconst: configuration constants object
+        :param params: values of each of :data:`DIODE_PARAMS`
+        :return: shared parameters
+        """
+        key = tuple(np.float64(params[k]) for k in DIODE_PARAMS) + (
+            id(pvconst),  # shared parameters keep pvconst alive
+        )
+        shared = cls._shared.get(key)
+        if shared is None:
+            shared = cls(pvconst, **params)
+            cls._shared[key] = shared
+        return shared
+
+    def replace(self, **params):
+        """
+        Get shared parameters with some values replaced.
+
+        :param params: new values of some of :data:`DIODE_PARAMS`
+        :return: shared parameters
+        """
+        for k in DIODE_PARAMS:
+            params.setdefault(k, getattr(self, k))
+        return self.get(self.pvconst, **params)
+
+
+def _get_pvcell_params(pvconst, params):
+    """Unpickle shared parameters, see :meth:`PVcellParams.get`."""
+    return PVcellParams.get(pvconst, **params)
+
+
+def _diode_param(name, doc):
+    return property(lambda self: getattr(self.params, name), doc=doc)
+
+
+class CompactPVcell(PVcellBase):
+    """
+    Compact PV cell that only stores its irradiance and temperature. The
+    other parameters are shared with all cells that have the same values by
+    :class:`PVcellParams`, and the IV curve isn't stored but looked up in
+    :data:`CELL_CACHE` when it's used, so a compact cell is a fraction of the
+    size of a :class:`PVcell`. Modules, strings and systems use compact cells
+    the same as :class:`PVcell`, but the diode parameters are read-only, so
+    use :meth:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.setConditions`
+    to change them.
+
+    Takes the same arguments as :class:`PVcell`.
+    """
+    __slots__ = ('Ee', 'Tcell', 'params')
+
+    def __init__(self, Rs=RS, Rsh=RSH, Isat1_T0=ISAT1_T0, Isat2_T0=ISAT2_T0,
+                 Isc0_T0=ISC0_T0, aRBD=ARBD, bRBD=BRBD, VRBD=VRBD_,
+                 nRBD=NRBD, Eg=EG, alpha_Isc=ALPHA_ISC,
+                 Tcell=TCELL, Ee=1., pvconst=PVconstants()):
+        self.Tcell = np.float64(Tcell)  #: [K] cell temperature
+        self.Ee = np.float64(Ee)  #: [suns] incident effective irradiance
+        params = dict(Rs=Rs, Rsh=Rsh, Isat1_T0=Isat1_T0, Isat2_T0=Isat2_T0,
+                      Isc0_T0=Isc0_T0, aRBD=aRBD, bRBD=bRBD, VRBD=VRBD,
+                      nRBD=nRBD, Eg=Eg, alpha_Isc=alpha_Isc, VocSTC=np.nan)
+        # estimate Voc at STC from the other parameters first
+        self.params = PVcellParams.get(pvconst, **params)
+        self.params = self.params.replace(VocSTC=self._VocSTC())
+        """shared :class:`PVcellParams`"""
+
+    @classmethod
+    def from_pvcell(cls, pvcell):
+        """
+        Create a compact cell with the same parameters as a cell.
+
+        :param pvcell: cell
+        :type pvcell: :class:`PVcell`
+        :return: compact cell
+        """
+        new_pvcell = cls.__new__(cls)
+        new_pvcell.Tcell = np.float64(pvcell.Tcell)
+        new_pvcell.Ee = np.float64(pvcell.Ee)
+        new_pvcell.params = PVcellParams.get(
+            pvcell.pvconst, **dict((k, getattr(pvcell, k)) for k in DIODE_PARAMS)
+        )
+        return new_pvcell
+
+    def __str__(self):
+        fmt = '<CompactPVcell(Ee=%g[suns], Tcell=%g[K], Isc=%g[A], Voc=%g[V])>'
+        return fmt % (self.Ee, self.Tcell, self.Isc, self.Voc)
+
+    def __repr__(self):
+        return str(self)
+
+    Rs = _diode_param('Rs', '[ohm] series resistance')
+    Rsh = _diode_param('Rsh', '[ohm] shunt resistance')
+    Isat1_T0 = _diode_param('Isat1_T0', '[A] diode one sat. current at T0')
+    Isat2_T0 = _diode_param('Isat2_T0', '[A] diode two saturation current')
+    Isc0_T0 = _diode_param('Isc0_T0', '[A] short circuit current at T0')
+    aRBD = _diode_param('aRBD', 'reverse breakdown coefficient 1')
+    bRBD = _diode_param('bRBD', 'reverse breakdown coefficient 2')
+    VRBD = _diode_param('VRBD', '[V] reverse breakdown voltage')
+    nRBD = _diode_param('nRBD', 'reverse breakdown exponent')
+    Eg = _diode_param('Eg', '[eV] band gap of cSi')
+    alpha_Isc = _diode_param('alpha_Isc', '[1/K] short circuit temp. coeff.')
+    VocSTC = _diode_param('VocSTC', '[V] estimated Voc at STC')
+    pvconst = _diode_param('pvconst', 'configuration constants')
+
+    @property
+    def Icell(self):
+        """cell currents on IV curve [A]"""
+        return self._lookup_curves()[0]
+
+    @property
+    def Vcell(self):
+        """cell voltages on IV curve [V]"""
+        return self._lookup_curves()[1]
+
+    @property
+    def Pcell(self):
+        """cell power on IV curve [W]"""
+        return self._lookup_curves()[2]
+
+    def invalidate(self):
+        """Compact cells don't store IV curves, so there's nothing to do."""
+
+    def _has_curves(self):
+        return False  # always look up the curves in the cache
+
+    def _set_curves(self, Icell, Vcell, Pcell):
+        pass  # curves are in the cache
+
+    def _copy(self, **params):
+        """
+        Copy the cell with new parameters, *EG*: ``Ee`` or ``Tcell``.
+
+        :param params: cell parameters to set on the copy
+        :return: new cell
+        """
+        new_pvcell = copy(self)
+        for k in ('Ee', 'Tcell'):
+            if k in params:
+                setattr(new_pvcell, k, np.float64(params.pop(k)))
+        for k in params:
+            if k not in DIODE_PARAMS:
+                raise AttributeError('%s is not a cell parameter' % k)
+        if params:
+            new_pvcell.params = self.params.replace(**params)
+        return new_pvcell
+
+
+class PVcellArray(object):
+    """
+    Class for a population of PV cells evaluated together.
+
+    Each cell parameter is either a scalar shared by all cells or a sequence
+    with one value per cell. The I-V curves of all cells are calculated in a
+    single broadcast, instead of one
+    :meth:`~pvmismatch.pvmismatch_lib.pvcell.PVcell.calcCell` call per cell,
+    and are stored as ``(numberCells, 3 * npts)`` arrays.
+
+    :param Rs: series resistance [ohms]
+    :param Rsh: shunt resistance [ohms]
+    :param Isat1_T0: first saturation diode current at ref temp [A]
+    :param Isat2_T0: second saturation diode current [A]
+    :param Isc0_T0: short circuit current at ref temp [A]
+    :param aRBD: reverse breakdown coefficient 1
+    :param bRBD: reverse breakdown coefficient 2
+    :param VRBD: reverse breakdown voltage [V]
+    :param nRBD: reverse breakdown exponent
+    :param Eg: band gap [eV]
+    :param alpha_Isc: short circuit current temp coeff [1/K]
+    :param Tcell: cell temperature [K]
+    :param Ee: incident effective irradiance [suns]
+    :param pvconst: configuration constants object
+    :type pvconst: :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`
+    :param VocSTC: estimated Voc at STC [V], if ``None`` it is estimated at
+        ``Tcell`` like :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcell` does
+    """
+
+    #: names of cell parameters stored as parallel arrays
+    _params = CELL_PARAMS
+
+    def __init__(self, Rs=RS, Rsh=RSH, Isat1_T0=ISAT1_T0, Isat2_T0=ISAT2_T0,
+                 Isc0_T0=ISC0_T0, aRBD=ARBD, bRBD=BRBD, VRBD=VRBD_,
+                 nRBD=NRBD, Eg=EG, alpha_Isc=ALPHA_ISC,
+                 Tcell=TCELL, Ee=1., pvconst=PVconstants(), VocSTC=None):
+        params = np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(p, dtype=np.float64)) for p in
+              (Rs, Rsh, Isat1_T0, Isat2_T0, Isc0_T0, aRBD, bRBD, VRBD, nRBD,
+               Eg, alpha_Isc, Tcell, Ee)]
+        )
+        # copy so that broadcast views don't share memory with each other
+        (self.Rs, self.Rsh, self.Isat1_T0, self.Isat2_T0, self.Isc0_T0,
+         self.aRBD, self.bRBD, self.VRBD, self.nRBD, self.Eg, self.alpha_Isc,
+         self.Tcell, self.Ee) = [p.flatten() for p in params]
+        self.pvconst = pvconst  #: configuration constants
+        self.numberCells = self.Rs.size  #: number of cells in the population
+        if VocSTC is None:
+            self.VocSTC = self._VocSTC()  #: estimated Voc at STC [V]
+        else:
+            self.VocSTC = np.broadcast_to(
+                np.asarray(VocSTC, dtype=np.float64), (self.numberCells,)
+            ).flatten()
+        self.Icell, self.Vcell, self.Pcell = self.calcCells()
+
+    @classmethod
+    def from_pvcells(cls, pvcells):
+        """
+        Create a population from a sequence of
+        :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcell` objects, keeping
+        each cell's ``VocSTC``.
+
+        :param pvcells: cells, must all use the same ``pvconst``
+        :return: cell population
+        :rtype: :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcellArray`
+        """
+        pvconst = pvcells[0].pvconst
+        for p in pvcells:
+            if p.pvconst is not pvconst:
+                raise Exception('PVconstant must be the same for all cells')
+        kwargs = {k: [getattr(p, k) for p in pvcells] for k in cls._params}
+        return cls(pvconst=pvconst, **kwargs)
+
+    def __str__(self):
+        return '<PVcellArray(numberCells=%d)>' % self.numberCells
+
+    def __repr__(self):
+        return str(self)
+
+    def __len__(self):
+        return self.numberCells
+
+    def update(self, **kwargs):
+        """
+        Update user-defined constants and recalculate the I-V curves.
+        """
+        for k, v in iteritems(kwargs):
+            if k not in self._params:
+                raise AttributeError('%s is not a cell parameter' % k)
+            v = np.broadcast_to(np.asarray(v, dtype=np.float64),
+                                (self.numberCells,))
+            setattr(self, k, v.flatten())
+        self.Icell, self.Vcell, self.Pcell = self.calcCells()
+
+    @property
+    def Vt(self):
+        """
+        Thermal voltage in volts.
+        """
+        return self.pvconst.k * self.Tcell / self.pvconst.q
+
+    @property
+    def Isc(self):
+        return self.Ee * self.Isc0
+
+    @property
+    def Aph(self):
+        """
+        Photogenerated current coefficient, non-dimensional.
+        """
+        Isc = self.Isc
+        # short current (SC) conditions (Vcell = 0)
+        Vdiode_sc = Isc * self.Rs  # diode voltage at SC
+        Idiode1_sc = self.Isat1 * (np.exp(Vdiode_sc / self.Vt) - 1.)
+        Idiode2_sc = self.Isat2 * (np.exp(Vdiode_sc / 2. / self.Vt) - 1.)
+        Ishunt_sc = Vdiode_sc / self.Rsh  # diode voltage at SC
+        # Aph is undefined (0/0) if there is no irradiance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Aph = 1. + (Idiode1_sc + Idiode2_sc + Ishunt_sc) / Isc
+        return np.where(Isc == 0, np.nan, Aph)
+
+    @property
+    def Isat1(self):
+        """
+        Diode one saturation current at Tcell in amps.
+        """
+        _Tstar = self.Tcell ** 3. / self.pvconst.T0 ** 3.  # scaled temperature
+        _inv_delta_T = 1. / self.pvconst.T0 - 1. / self.Tcell  # [1/K]
+        _expTstar = np.exp(
+            self.Eg * self.pvconst.q / self.pvconst.k * _inv_delta_T
+        )
+        return self.Isat1_T0 * _Tstar * _expTstar  # [A] Isat1(Tcell)
+
+    @property
+    def Isat2(self):
+        """
+        Diode two saturation current at Tcell in amps.
+        """
+        _Tstar = self.Tcell ** 3. / self.pvconst.T0 ** 3.  # scaled temperature
+        _inv_delta_T = 1. / self.pvconst.T0 - 1. / self.Tcell  # [1/K]
+        _expTstar = np.exp(
+            self.Eg * self.pvconst.q / (2.0 * self.pvconst.k) * _inv_delta_T
+        )
+        return self.Isat2_T0 * _Tstar * _expTstar  # [A] Isat2(Tcell)
+
+    @property
+    def Isc0(self):
+        """
+        Short circuit current at Tcell in amps.
+        """
+        _delta_T = self.Tcell - self.pvconst.T0  # [K] temperature difference
+        return self.Isc0_T0 * (1. + self.alpha_Isc * _delta_T)  # [A] Isc0
+
+    @property
+    def Voc(self):
+        """
+        Estimate open circuit voltage of cells.
+        Returns Voc : numpy.ndarray of float, estimated open circuit voltage
+        """
+        Isat1, Isat2 = self.Isat1, self.Isat2
+        C = self.Aph * self.Isc + Isat1 + Isat2
+        delta = Isat2 ** 2. + 4. * Isat1 * C
+        return self.Vt * np.log(
+            ((-Isat2 + np.sqrt(delta)) / 2. / Isat1) ** 2.
+        )
+
+    def _VocSTC(self):
+        """
+        Estimate open circuit voltage of cells.
+        Returns Voc : numpy.ndarray of float, estimated open circuit voltage
+        """
+        Vdiode_sc = self.Isc0_T0 * self.Rs  # diode voltage at SC
+        Idiode1_sc = self.Isat1_T0 * (np.exp(Vdiode_sc / self.Vt) - 1.)
+        Idiode2_sc = self.Isat2_T0 * (np.exp(Vdiode_sc / 2. / self.Vt) - 1.)
+        Ishunt_sc = Vdiode_sc / self.Rsh  # diode voltage at SC
+        # photogenerated current coefficient
+        Aph = 1. + (Idiode1_sc + Idiode2_sc + Ishunt_sc) / self.Isc0_T0
+        # estimated Voc at STC
+        C = Aph * self.Isc0_T0 + self.Isat1_T0 + self.Isat2_T0
+        delta = self.Isat2_T0 ** 2. + 4. * self.Isat1_T0 * C
+        return self.Vt * np.log(
+            ((-self.Isat2_T0 + np.sqrt(delta)) / 2. / self.Isat1_T0) ** 2.
+        )
+
+    @property
+    def Igen(self):
+        """
+        Photovoltaic generated light current (AKA IL or Iph)
+        Returns Igen : numpy.ndarray of float, PV generated light current [A]
+
+        Photovoltaic generated light current is zero if irradiance is zero.
+        """
+        return np.where(self.Ee == 0, 0., self.Aph * self.Isc)
+
+    def calcCells(self):
+        """
+        Calculate the I-V curves of all cells at once, with adaptive points
+        like :meth:`~pvmismatch.pvmismatch_lib.pvcell.PVcell.calcCell` if
+        ``pvconst.adaptive`` is True.
+        Returns (Icell, Vcell, Pcell) : tuple of numpy.ndarray of float, each
+        with shape ``(numberCells, 3 * npts)``
+        """
+        # cell parameters are columns, IV points are rows
+        VRBD = self.VRBD[:, None]
+        Voc = self.Voc[:, None]
+        VocSTC = self.VocSTC[:, None]
+        Isc0_T0 = self.Isc0_T0[:, None]
+        Vreverse = VRBD * self.pvconst.negpts.T
+        # see PVcell.calcCell() for how the 4th quadrant points are chosen
+        delta_Voc = VocSTC - Voc
+        is_stc = delta_Voc == 0
+        is_hot = delta_Voc < 0
+        Vff = np.where(is_stc, 0.8 * Voc, np.where(is_hot, VocSTC, Voc))
+        delta_Voc = np.where(
+            is_stc, 0.2 * Voc, np.where(is_hot, -delta_Voc, delta_Voc)
+        )
+        Vquad4 = Vff + delta_Voc * self.pvconst.Vmod_q4pts.T
+        Vforward = Vff * self.pvconst.pts.T
+        Vdiode = np.concatenate((Vreverse, Vforward, Vquad4), axis=1)
+        Icell, Vcell = self.calcIV(Vdiode)
+        if self.pvconst.adaptive:
+            # move the diode voltages to where the curves bend
+            Vdiode = adaptive_points(Vdiode, Vcell, Icell, VocSTC, Isc0_T0)
+            Icell, Vcell = self.calcIV(Vdiode)
+        Pcell = Icell * Vcell
+        return as_dtype((Icell, Vcell, Pcell), self.pvconst.dtype)
+
+    def calcIV(self, Vdiode):
+        """
+        Calculate the currents and voltages of all cells at diode voltages.
+
+        :param Vdiode: diode voltages of each cell [V], shape
+            ``(numberCells, points)``
+        :return: cell currents [A] and voltages [V]
+        """
+        VRBD = self.VRBD[:, None]
+        Vt = self.Vt[:, None]
+        Rs, Rsh = self.Rs[:, None], self.Rsh[:, None]
+        Isc0_T0 = self.Isc0_T0[:, None]
+        Idiode1 = self.Isat1[:, None] * (np.exp(Vdiode / Vt) - 1.)
+        Idiode2 = self.Isat2[:, None] * (np.exp(Vdiode / 2. / Vt) - 1.)
+        Ishunt = Vdiode / Rsh
+        fRBD = 1. - Vdiode / VRBD
+        # use epsilon = 2.2204460492503131e-16 to avoid "divide by zero"
+        fRBD[fRBD == 0] = EPS
+        Vdiode_norm = Vdiode / Rsh / Isc0_T0
+        fRBD = Isc0_T0 * fRBD ** (-self.nRBD[:, None])
+        IRBD = (self.aRBD[:, None] * Vdiode_norm
+                + self.bRBD[:, None] * Vdiode_norm ** 2) * fRBD
+        Icell = self.Igen[:, None] - Idiode1 - Idiode2 - Ishunt - IRBD
+        Vcell = Vdiode - Icell * Rs
+        return Icell, Vcell
+
+    def _solver_args(self, x):
+        # cells are the first axis of x, other axes broadcast with each cell
+        extra = (1,) * max(np.ndim(x) - 1, 0)
+        return tuple(y.reshape(y.shape + extra) for y in (
+            self.Igen, self.Rs, self.Vt, self.Isat1, self.Isat2, self.Rsh
+        ))
+
+    def calcIcell(self, Vcell):
+        """
+        Calculate the current of all cells at cell voltages, without reverse
+        breakdown, using :func:`solve_Icell`.
+
+        :param Vcell: cell voltages [V], scalar for all cells, or the first
+            axis is the cells, *EG*: ``(numberCells, points)``
+        :return: cell currents [A], shape ``(numberCells, ...)``
+        """
+        return solve_Icell(Vcell, *self._solver_args(Vcell))
+
+    def calcVcell(self, Icell):
+        """
+        Calculate the voltage of all cells at cell currents, without reverse
+        breakdown, using :func:`solve_Vcell`.
+
+        :param Icell: cell currents [A], scalar for all cells, or the first
+            axis is the cells, *EG*: ``(numberCells, points)``
+        :return: cell voltages [V], shape ``(numberCells, ...)``
+        """
+        return solve_Vcell(Icell, *self._solver_args(Icell))
+
+
+def calc_cells(pvcells):
+    """
+    Calculate the I-V curves of many cells at once. Curves are looked up in
+    :data:`CELL_CACHE` first, then any missing curves are calculated together
+    by :class:`PVcellArray` and added to the cache. Use this instead of
+    setting attributes one cell at a time, *EG*: with ``_calc_now`` turned off
+    while setting attributes.
+
+    :param pvcells: cells to calculate
+    :type pvcells: list of :class:`PVcell`
+    """
+    misses = {}  # cells with the same key share the same curves
+    for pvc in pvcells:
+        key = pvc.cache_key
+        IVcell = CELL_CACHE.get(key)
+        if IVcell is None:
+            misses.setdefault(key, []).append(pvc)
+        else:
+            pvc._set_curves(*IVcell)
+    if not misses:
+        return
+    keys = list(misses)
+    pvcell_array = PVcellArray.from_pvcells([misses[k][0] for k in keys])
+    for n, key in enumerate(keys):
+        # same shape as PVcell.calcCell(), copy each row so evicting it from
+        # the cache frees it, instead of keeping the whole batch alive
+        IVcell = tuple(x[n].reshape(-1, 1).copy() for x in (
+            pvcell_array.Icell, pvcell_array.Vcell, pvcell_array.Pcell
+        ))
+        for x in IVcell:
+            x.flags.writeable = False
+        CELL_CACHE.put(key, IVcell)
+        for pvc in misses[key]:
+            pvc._set_curves(*IVcell)
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 """
 This module contains configuration constants for PVMismatch, such as number of
-points in IV curve to calculate, flag to use parallel processing and parallel
-processing parameters. This module also contains some utility functions like
+points in IV curve to calculate. Parallel processing of time series is
+configured by the ``processes`` and ``chunksize`` arguments of
+:meth:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem.simulate()`. This module
+also contains some utility functions like
 :func:`~pvmismatch.pvmismatch_lib.pvconstants.npinterpx()` and
 :func:`~pvmismatch.pvmismatch_lib.pvconstants.get_series_cells()` are defined
 here too.
@@ -10,6 +12,7 @@ here too.
 
 # TODO: move this to pvmismatch_lib/__init__.py
 
+from collections import OrderedDict
 import numpy as np
 import scipy.constants
 
@@ -20,6 +23,9 @@ NUMBERCELLS = MODSIZES[2]  # default is 96-cell module
 NUMBERMODS = 10  # default number of modules
 NUMBERSTRS = 10  # default number of strings
 EPS = np.finfo(np.float64).eps
+CACHE_SIZE = 1024  # default max number of items in caches
+CACHE_DIGITS = 12  # number of significant digits of quantized cache keys
+ADAPTIVE_FLOOR = 0.5  # fraction of adaptive points spaced like the log grid
 
 
 def npinterpx(x, xp, fp):
@@ -61,12 +67,268 @@ def npinterpx(x, xp, fp):
     return y
 
 
+def npinterpx_batch(x, xp, fp, dtype=np.float64):
+    """
+    Vectorized version of :func:`npinterpx` that interpolates many curves at
+    once with linear extrapolation.
+
+    Parameters
+    ----------
+    x : array_like
+        The x-coordinates of the interpolated values, shape ``(..., M)``. The
+        same x-coordinates are used for all of the curves in a batch.
+
+    xp : array_like
+        The x-coordinates of the data points, shape ``(..., C, N)``, each of
+        the ``C`` curves must be increasing.
+
+    fp : array_like
+        The y-coordinates of the data points, same shape as `xp`.
+
+    dtype : data-type, optional
+        The floating point type to interpolate with, default is float64.
+
+    Returns
+    -------
+    y : ndarray
+        The interpolated values of each curve, shape ``(..., C, M)``, where the
+        leading batch dimensions of `x` and `xp` are broadcast together.
+    """
+    x = np.asarray(x, dtype=dtype)
+    xp = np.asarray(xp, dtype=dtype)
+    fp = np.asarray(fp, dtype=dtype)
+    npoints = xp.shape[-1]
+    shape = np.broadcast(x[..., None, :], xp[..., :1]).shape
+    # x must be sorted, so that it stays in order after merging it with xp
+    order = None
+    if np.any(x[..., 1:] < x[..., :-1]):
+        order = np.argsort(x, axis=-1, kind='mergesort')
+        x = np.sort(x, axis=-1, kind='mergesort')
+    x = np.broadcast_to(x[..., None, :], shape)
+    xp = np.broadcast_to(xp, shape[:-1] + (npoints,))
+    fp = np.broadcast_to(fp, shape[:-1] + (npoints,))
+    # merge x into each curve, since both are sorted a stable sort only has
+    # to merge two runs, and data points are before equal x, so the position
+    # of each x in the merged curve minus its own index is the number of data
+    # points that are less than or equal to it
+    merged = np.concatenate((xp, x), axis=-1)
+    is_x = np.argsort(merged, axis=-1, kind='mergesort') >= npoints
+    npos = merged.shape[-1]
+    idx = np.flatnonzero(is_x).reshape(shape) % npos - np.arange(shape[-1])
+    # flatten curves and get index of start of segment that contains each x
+    ncurves = idx.size // shape[-1]
+    curve = np.arange(ncurves).reshape(shape[:-1] + (1,))
+    j = np.clip(idx - 1, 0, npoints - 2)
+    xp = np.ascontiguousarray(xp).reshape(ncurves, npoints)
+    fp = np.ascontiguousarray(fp).reshape(ncurves, npoints)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # same formulas as np.interp() and npinterpx() use
+        slopes = (fp[:, 1:] - fp[:, :-1]) / (xp[:, 1:] - xp[:, :-1])
+        x0 = xp.take(j + npoints * curve)
+        f0 = fp.take(j + npoints * curve)
+        y = slopes.take(j + (npoints - 1) * curve) * (x - x0) + f0
+        np.copyto(y, f0, where=(x == x0))
+        # use the first and last segments to extrapolate
+        for outside, k0, k1 in ((idx == 0, 0, 1),
+                                (idx == npoints, npoints - 1, npoints - 2)):
+            if outside.any():
+                c = np.broadcast_to(curve, shape)[outside]
+                x_out, x0, x1 = x[outside], xp[c, k0], xp[c, k1]
+                f0, f1 = fp[c, k0], fp[c, k1]
+                y[outside] = f0 + (x_out - x0) / (x1 - x0) * (f1 - f0)
+    if order is not None:
+        # put interpolated values back in the original order of x
+        order = np.broadcast_to(order[..., None, :], shape)
+        order = order.reshape(ncurves, shape[-1])
+        y = y.reshape(ncurves, shape[-1])
+        y[np.arange(ncurves).reshape(ncurves, 1), order] = y.copy()
+        y = y.reshape(shape)
+    return y
+
+
+def adaptive_points(t, X, Y, Xscale, Yscale, floor=ADAPTIVE_FLOOR):
+    """
+    Move the points of IV curves to where the curves bend. Each curve is
+    sampled at increasing parameters ``t``, *EG*: diode voltages, currents or
+    voltages, on the log spaced grid. The same number of points is spread
+    along each curve so that their density is proportional to the square root
+    of the curvature, which makes the error of linear interpolation between
+    points about the same everywhere, and mixed with the density of the log
+    spaced grid so that no part of a curve is left without points.
+
+    Parameters
+    ----------
+    t : array_like
+        The increasing parameters of the points, shape ``(..., N)``.
+
+    X : array_like
+        The voltages of the points [V], same shape as `t`.
+
+    Y : array_like
+        The currents of the points [A], same shape as `t`.
+
+    Xscale, Yscale : array_like
+        Typical voltage and current of each curve, shape ``(..., 1)``. The
+        coordinates are scaled by ``arcsinh(X / Xscale)``, which is linear near
+        zero and logarithmic far away, so the steep reverse bias breakdown
+        doesn't take all of the points.
+
+    floor : float
+        Fraction of the points spaced like the log grid, between zero and one.
+
+    Returns
+    -------
+    t : ndarray
+        The parameters of the moved points, same shape as `t`, with the same
+        first and last points.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    npoints = t.shape[-1]
+    X = np.arcsinh(X / Xscale)
+    Y = np.arcsinh(Y / Yscale)
+    dX, dY = np.diff(X, axis=-1), np.diff(Y, axis=-1)
+    length = np.hypot(dX, dY)
+    # angle turned at each point between segments, wrapped from -pi to pi
+    turn = np.diff(np.arctan2(dY, dX), axis=-1)
+    turn = np.abs((turn + np.pi) % (2. * np.pi) - np.pi)
+    # curvature is the angle turned per length, ignore repeated points
+    mid_length = (length[..., 1:] + length[..., :-1]) / 2.
+    bends = (length[..., 1:] > 0) & (length[..., :-1] > 0)
+    curvature = np.zeros_like(turn)
+    np.divide(turn, mid_length, out=curvature, where=bends)
+    # curvature of each segment is the mean of its ends
+    segment_curvature = np.zeros_like(length)
+    segment_curvature[..., 1:] += curvature / 2.
+    segment_curvature[..., :-1] += curvature / 2.
+    weight = np.cumsum(length * np.sqrt(segment_curvature), axis=-1)
+    total = weight[..., -1:]
+    weight = np.where(
+        total > 0, weight / np.where(total > 0, total, 1.), 0.
+    )
+    # cumulative density of points from zero to one at each point
+    uniform = np.linspace(0., 1., npoints)
+    density = floor * uniform + (1. - floor) * np.concatenate(
+        (np.zeros(weight.shape[:-1] + (1,)), weight), axis=-1
+    )
+    # flat curves keep the log spaced grid
+    density = np.where(total > 0, density, uniform)
+    moved = npinterpx_batch(uniform, density[..., None, :], t[..., None, :])
+    moved = moved[..., 0, :]
+    moved[..., 0], moved[..., -1] = t[..., 0], t[..., -1]
+    return moved
+
+
+def _scale(x):
+    """
+    Absolute value of a typical voltage or current, or one if it's zero.
+
+    :param x: typical voltage [V] or current [A]
+    :return: scale for :func:`adaptive_points`
+    """
+    x = np.abs(x)
+    return np.where(x > 0, x, 1.)
+
+
+def quantize(value, digits=CACHE_DIGITS):
+    """
+    Round a number to significant digits so that it can be used in a cache key.
+
+    :param value: number to round
+    :param digits: number of significant digits
+    :return: rounded number
+    :rtype: float
+    """
+    return float('%.*g' % (digits, value))
+
+
+class LRUCache(object):
+    """
+    Size bounded cache that evicts the least recently used item when full.
+
+    :param maxsize: max number of items, zero disables the cache
+    :type maxsize: int
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize  #: max number of items in cache
+        self.hits = 0  #: number of lookups found in cache
+        self.misses = 0  #: number of lookups not found in cache
+        self._cache = OrderedDict()
+
+    def __str__(self):
+        fmt = '<LRUCache(maxsize=%d, size=%d, hits=%d, misses=%d)>'
+        return fmt % (self.maxsize, len(self), self.hits, self.misses)
+
+    def __repr__(self):
+        return str(self)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def get(self, key, default=None):
+        """
+        Get an item from the cache and count the hit or miss.
+
+        :param key: cache key
+        :param default: returned if key isn't in cache
+        :return: cached item or default
+        """
+        try:
+            value = self._cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._cache[key] = value  # most recently used is last
+        return value
+
+    def put(self, key, value):
+        """
+        Put an item in the cache, evicting least recently used items if full.
+
+        :param key: cache key
+        :param value: item to cache
+        """
+        if self.maxsize <= 0:
+            return
+        self._cache.pop(key, None)
+        self._cache[key] = value
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)  # least recently used is first
+
+    def clear(self):
+        """
+        Remove all items and reset hit and miss counters.
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        """fraction of lookups found in cache"""
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.
+
+
 class PVconstants(object):
     """
     Class for configuration constants
 
     :param npts: number of points in IV curve
     :type npts: int
+    :param lazy: calculate IV curves on first access instead of when inputs
+        change
+    :type lazy: bool
+    :param adaptive: move the points of each IV curve to where it bends, see
+        :func:`adaptive_points`
+    :type adaptive: bool
+    :param dtype: floating point type of the IV curves, *EG*: ``np.float32``
+        halves the memory of large systems, see :attr:`dtype`
+    :type dtype: :class:`numpy.dtype`
     """
     # hard constants
     k = scipy.constants.k  #: [J/K] Boltzmann constant
@@ -74,7 +336,20 @@ class PVconstants(object):
     E0 = 1000.  #: [W/m^2] irradiance of 1 sun
     T0 = 298.15  #: [K] reference temperature
 
-    def __init__(self, npts=NPTS):
+    def __init__(self, npts=NPTS, lazy=False, adaptive=False,
+                 dtype=np.float64):
+        self.lazy = lazy
+        """if True, IV curves of cells, modules, strings and systems are
+        calculated on first access instead of when their inputs change"""
+        self.adaptive = adaptive
+        """if True, each IV curve is first calculated on the log spaced grid,
+        then calculated again with the same number of points moved to where
+        the curve bends, which is more accurate with fewer points"""
+        self.dtype = np.dtype(dtype)
+        """floating point type of the IV curves of cells, modules, strings
+        and systems, which are combined in series and parallel with this type,
+        but cell curves are always calculated with float64, since the diode
+        exponentials need its range"""
         self._npts = None
         self.pts = None
         """array of points with decreasing spacing from exactly zero to one"""
@@ -117,7 +392,12 @@ class PVconstants(object):
         self.Vmod_q4pts = np.flipud(self.Imod_negpts)
 
     def __str__(self):
-        return '<PVconstants(npts=%d)>' % self.npts
+        args = 'npts=%d' % self.npts
+        if self.adaptive:
+            args += ', adaptive=True'
+        if self.dtype != np.float64:
+            args += ', dtype=%s' % self.dtype.name
+        return '<PVconstants(%s)>' % args
 
     def __repr__(self):
         return str(self)
@@ -128,6 +408,17 @@ class PVconstants(object):
         voltage in increasing order by voltage, the average short circuit
         current and the max current at the breakdown voltage.
 
+        The IV curves are combined all at once using
+        :func:`npinterpx_batch`. A leading batch axis combines several series
+        circuits in a single call, *EG*: ``I`` and ``V`` with shape
+        ``(batch, number in series, 3 * npts)`` and ``meanIsc`` and ``Imax``
+        with shape ``(batch,)`` return currents and voltages with shape
+        ``(batch, 3 * npts)``.
+
+        If :attr:`adaptive` is True, then the currents of each curve are moved
+        to where it bends by :func:`adaptive_points` and the voltages are
+        added up again.
+
         :param I: cell or substring currents [A]
         :param V: cell or substring voltages [V]
         :param meanIsc: average short circuit current [A]
@@ -137,28 +428,55 @@ class PVconstants(object):
         # make sure all inputs are numpy arrays, but don't make extra copies
         I = np.asarray(I)  # currents [A]
         V = np.asarray(V)  # voltages [V]
-        meanIsc = np.asarray(meanIsc)  # mean Isc [A]
-        Imax = np.asarray(Imax)  # max current [A]
+        meanIsc = np.asarray(meanIsc)[..., None]  # mean Isc [A]
+        Imax = np.asarray(Imax)[..., None]  # max current [A]
         # create array of currents optimally spaced from mean Isc to  max VRBD
-        Ireverse = (Imax - meanIsc) * self.Imod_pts_sq + meanIsc
+        Ireverse = (Imax - meanIsc) * self.Imod_pts_sq.flatten() + meanIsc
         # range of currents in forward bias from 0 to mean Isc
-        Iforward = meanIsc * self.pts
-        Imin = np.minimum(I.min(), 0.)  # minimum cell current, at most zero
+        Iforward = meanIsc * self.pts.flatten()
+        # minimum cell current, at most zero
+        Imin = np.minimum(I.min(axis=(-2, -1)), 0.)[..., None]
         # range of negative currents in the 4th quadrant from min current to 0
-        Iquad4 = Imin * self.Imod_negpts
+        Iquad4 = Imin * self.Imod_negpts.flatten()
         # create range for interpolation from forward to reverse bias
-        Itot = np.concatenate((Iquad4, Iforward, Ireverse), axis=0).flatten()
-        Vtot = np.zeros((3 * self.npts,))
+        batch = np.broadcast(meanIsc[..., 0], Imax[..., 0], Imin[..., 0]).shape
+        Itot = np.concatenate(
+            [np.broadcast_to(Ix, batch + Ix.shape[-1:])
+             for Ix in (Iquad4, Iforward, Ireverse)], axis=-1
+        )
+        Itot = Itot.astype(self.dtype, copy=False)
         # add up all series cell voltages
-        for i, v in zip(I, V):
-            # interp requires x, y to be sorted by x in increasing order
-            Vtot += npinterpx(Itot, np.flipud(i), np.flipud(v))
-        return np.flipud(Itot), np.flipud(Vtot)
-
-    def calcParallel(self, I, V, Vmax, Vmin, Voc=None):
+        # interp requires x, y to be sorted by x in increasing order
+        Vtot = npinterpx_batch(
+            Itot, I[..., ::-1], V[..., ::-1], self.dtype
+        ).sum(axis=-2)
+        if self.adaptive:
+            # move currents of each curve to where it bends, the first current
+            # in forward bias is zero, so its voltage is Voc
+            Itot = adaptive_points(
+                np.broadcast_to(Itot, Vtot.shape), Vtot, Itot,
+                _scale(Vtot[..., self.npts, None]), _scale(meanIsc)
+            ).astype(self.dtype, copy=False)
+            Vtot = npinterpx_batch(
+                Itot, I[..., ::-1], V[..., ::-1], self.dtype
+            ).sum(axis=-2)
+        return Itot[..., ::-1], Vtot[..., ::-1]
+
+    def calcParallel(self, I, V, Vmax, Vmin, Voc=None, shared_voltages=False):
         """
         Calculate IV curve for cells and substrings in parallel.
 
+        The IV curves are combined all at once using :func:`npinterpx_batch`.
+        A leading batch axis combines several parallel circuits in a single
+        call, *EG*: ``I`` and ``V`` with shape
+        ``(batch, number in parallel, 3 * npts)`` and ``Vmax``, ``Vmin`` and
+        ``Voc`` with shape ``(batch,)`` return currents and voltages with shape
+        ``(batch, 3 * npts)``.
+
+        If :attr:`adaptive` is True, then the voltages of each curve are moved
+        to where it bends by :func:`adaptive_points` and the currents are
+        added up again, except if ``shared_voltages`` is True.
+
         :param I: currents [A]
         :type: I: list, :class:`numpy.ndarray`
         :param V: voltages [V]
@@ -166,28 +484,44 @@ class PVconstants(object):
         :param Vmax: max voltage limit, should be max Voc [V]
         :param Vmin: min voltage limit, could be zero or Vrbd [V]
         :param Voc: (``None``) open circuit voltage [V]
+        :param shared_voltages: (``False``) if True the voltages aren't moved
+            even if :attr:`adaptive` is True, so the whole batch has the same
+            voltages, *EG*: strings combined separately, whose currents are
+            added up later
+        :return: current [A] and voltage [V] of parallel
         """
         if Voc is None:
             Voc = Vmax
         I, V = np.asarray(I), np.asarray(V)
-        Vmax = np.asarray(Vmax)
-        Vmin = np.asarray(Vmin)
-        Voc = np.asarray(Voc)
-        Vff = Voc
+        Vmax = np.asarray(Vmax)[..., None]
+        Vmin = np.asarray(Vmin)[..., None]
+        Voc = np.asarray(Voc)[..., None]
         delta_Voc = Vmax - Voc
-        if np.isclose(delta_Voc, 0):
-            Vff = 0.8 * Voc
-            delta_Voc = 0.2 * Voc
-        elif delta_Voc < 0:
-            Vff = Vmax
-            delta_Voc = -delta_Voc
-        Vquad4 = Vff + delta_Voc * self.Vmod_q4pts
-        Vreverse = Vmin * self.negpts
-        Vforward = Vff * self.pts
-        Vtot = np.concatenate((Vreverse, Vforward, Vquad4), axis=0).flatten()
-        Itot = np.zeros((3 * self.npts,))
-        for i, v in zip(I, V):
-            Itot += npinterpx(Vtot, v, i)
+        # if Vmax is Voc then use 80% of Voc as the fill factor voltage,
+        # otherwise use the lesser of Vmax and Voc
+        is_Voc = np.isclose(delta_Voc, 0)
+        Vff = np.where(is_Voc, 0.8 * Voc, np.minimum(Vmax, Voc))
+        delta_Voc = np.where(is_Voc, 0.2 * Voc, np.abs(delta_Voc))
+        Vquad4 = Vff + delta_Voc * self.Vmod_q4pts.flatten()
+        Vreverse = Vmin * self.negpts.flatten()
+        Vforward = Vff * self.pts.flatten()
+        batch = np.broadcast(Vff[..., 0], Vmin[..., 0]).shape
+        Vtot = np.concatenate(
+            [np.broadcast_to(Vx, batch + Vx.shape[-1:])
+             for Vx in (Vreverse, Vforward, Vquad4)], axis=-1
+        )
+        Vtot = Vtot.astype(self.dtype, copy=False)
+        # add up all parallel currents
+        Itot = npinterpx_batch(Vtot, V, I, self.dtype).sum(axis=-2)
+        if self.adaptive and not shared_voltages:
+            # move voltages of each curve to where it bends, the first voltage
+            # in forward bias is zero, so its current is Isc
+            Isc = Itot[..., self.npts, None]
+            Vtot = np.broadcast_to(Vtot, Itot.shape)
+            Vtot = adaptive_points(
+                Vtot, Vtot, Itot, _scale(Voc), _scale(Isc)
+            ).astype(self.dtype, copy=False)
+            Itot = npinterpx_batch(Vtot, V, I, self.dtype).sum(axis=-2)
         return Itot, Vtot
 
 
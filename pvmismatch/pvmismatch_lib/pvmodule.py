@@ -6,17 +6,23 @@ This module defines the :class:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule`.
 from __future__ import absolute_import
 from past.builtins import xrange, range
 from builtins import zip
-from six import itervalues
+from six import iteritems
 import numpy as np
-from copy import copy
-from matplotlib import pyplot as plt
 # use absolute imports instead of relative, so modules are portable
-from pvmismatch.pvmismatch_lib.pvconstants import PVconstants, get_series_cells
-from pvmismatch.pvmismatch_lib.pvcell import PVcell
+from pvmismatch.pvmismatch_lib.pvconstants import (
+    PVconstants, LRUCache, get_series_cells, npinterpx_batch
+)
+from pvmismatch.pvmismatch_lib.pvcell import PVcell, CELL_PARAMS, calc_cells
 from pvmismatch.pvmismatch_lib.pvexceptions import PVexception
 
 VBYPASS = np.float64(-0.5)  # [V] trigger voltage of bypass diode
 CELLAREA = np.float64(153.33)  # [cm^2] cell area
+#: attributes set by :meth:`PVmodule.calcMod`
+MODULE_CURVES = ('Imod', 'Vmod', 'Pmod', 'Isubstr', 'Vsubstr')
+#: operating points returned by :func:`calc_operating_points`
+OPERATING_POINTS = ('Vmod', 'Isubstr', 'Vsubstr', 'bypassed', 'Icell',
+                    'Vcell')
+CELL_PARAM_NAMES = {'Ee': ('irradiance', 'Ee'), 'Tcell': ('temperature', 'Tc')}
 DEFAULT_BYPASS = 0
 MODULE_BYPASS = 1
 CUSTOM_SUBSTR_BYPASS = 2
@@ -134,25 +140,20 @@ def combine_parallel_circuits(IVprev_cols, pvconst):
     :param pvconst: an instance of :class:`~pvmismatch.pvconstants.PVconstants`
     :return: current [A] and voltage [V] of the combined parallel circuites
     """
-    # combine crosstied circuits
-    Irows, Vrows = [], []
-    Isc_rows, Imax_rows = [], []
-    for IVcols in zip(*IVprev_cols):
-        Iparallel, Vparallel, Voc_parallel = zip(*IVcols)
-        Iparallel = np.asarray(Iparallel)
-        Vparallel = np.asarray(Vparallel)
-        Voc_parallel = np.mean(Voc_parallel)
-        Irow, Vrow = pvconst.calcParallel(
-            Iparallel, Vparallel, Vparallel.max(),
-            Vparallel.min(), Voc=Voc_parallel
-        )
-        Irows.append(Irow)
-        Vrows.append(Vrow)
-        Isc_rows.append(np.interp(np.float64(0), Vrow, Irow))
-        Imax_rows.append(Irow.max())
-    Irows, Vrows = np.asarray(Irows), np.asarray(Vrows)
-    Isc_rows = np.asarray(Isc_rows)
-    Imax_rows = np.asarray(Imax_rows)
+    # combine crosstied circuits, all rows at once
+    Iparallel = np.asarray([[np.ravel(Icol) for Icol, _, _ in IVcols]
+                            for IVcols in zip(*IVprev_cols)])
+    Vparallel = np.asarray([[np.ravel(Vcol) for _, Vcol, _ in IVcols]
+                            for IVcols in zip(*IVprev_cols)])
+    Voc_parallel = np.asarray([[Voc for _, _, Voc in IVcols]
+                               for IVcols in zip(*IVprev_cols)])
+    Irows, Vrows = pvconst.calcParallel(
+        Iparallel, Vparallel, Vparallel.max(axis=(1, 2)),
+        Vparallel.min(axis=(1, 2)), Voc=Voc_parallel.mean(axis=1),
+        shared_voltages=False
+    )
+    Isc_rows = npinterpx_batch(np.zeros(1), Vrows, Irows)
+    Imax_rows = Irows.max(axis=1)
     return pvconst.calcSeries(
         Irows, Vrows, Isc_rows.mean(), Imax_rows.max()
     )
@@ -185,6 +186,344 @@ def parse_diode_config(Vbypass, cell_pos):
         else:
             raise PVexception("wrong number of bypass diode values passed : %d"%(len(Vbypass)))
 
+def compile_plan(cell_pos, Vbypass):
+    """
+    Compile the cell position pattern and bypass diodes into a plan of integer
+    index arrays used by :meth:`PVmodule.calcMod` to combine cells, so the
+    nested cell position pattern is only traversed once.
+
+    :param cell_pos: cell position pattern
+    :param Vbypass: bypass diode trigger voltages [V]
+    :return: plan
+    :rtype: dict
+
+    The plan contains:
+
+    * ``topology``: hashable tuple of cell indices and crossties
+    * ``series``: list of ``(groups, idxs)`` where ``idxs`` is a 2-D array of
+      the cells in each group of series cells with the same length
+    * ``substrs``: list of each substring as one of ``('series', group)``,
+      ``('crosstie', idxs)`` where ``idxs`` is a 2-D array of rows of
+      crosstied cells, or ``('mixed', blocks, remaining)`` where each block is
+      a list of columns of ``(group, idxs)`` circuits between crossties
+    * ``Vbypass_substr``: array of substring bypass voltages, ``NaN`` if none
+    * ``Vbypass_module``: module bypass voltage or ``None``
+    """
+    series_groups = []  # lists of indices of cells in series
+
+    def add_series_group(idxs):
+        series_groups.append(idxs)
+        return len(series_groups) - 1
+
+    substrs = []
+    for substr in cell_pos:
+        # check if cells are in series or any crosstied circuits
+        if all(r['crosstie'] == False for c in substr for r in c):
+            idxs = [r['idx'] for c in substr for r in c]
+            substrs.append(('series', add_series_group(idxs)))
+        elif all(r['crosstie'] == True for c in substr for r in c):
+            idxs = np.array([[c['idx'] for c in row] for row in zip(*substr)])
+            substrs.append(('crosstie', idxs))
+        else:
+            blocks = []
+            prev_col = None
+            cols = []
+            for col in substr:
+                circuits = []
+                is_first = True
+                # combine series between crossties
+                for idxs in get_series_cells(col, prev_col):
+                    if not idxs:
+                        # first row should always be empty since it must be
+                        # crosstied
+                        is_first = False
+                        continue
+                    elif is_first:
+                        # TODO: use pvmismatch exceptions
+                        raise Exception(
+                            "First row and last rows must be crosstied."
+                        )
+                    elif len(idxs) > 1:
+                        circuits.append((add_series_group(idxs), idxs))
+                    else:
+                        circuits.append((None, idxs))
+                cols.append(circuits)
+                if prev_col:
+                    # if circuits are same in both columns then continue
+                    if not all(icol['crosstie'] == jcol['crosstie']
+                               for icol, jcol in zip(prev_col, col)):
+                        # crosstied circuits are combined in a block
+                        blocks.append(cols)
+                        # reset prev_col
+                        prev_col = None
+                        cols = []
+                        continue
+                # set prev_col and continue
+                prev_col = col
+            substrs.append(('mixed', blocks, cols))
+    # batch series groups with the same number of cells
+    lengths = {}
+    for group, idxs in enumerate(series_groups):
+        lengths.setdefault(len(idxs), []).append(group)
+    series = [
+        (np.array(groups), np.array([series_groups[g] for g in groups]))
+        for _, groups in sorted(lengths.items())
+    ]
+    # bypass diodes
+    Vbypass_config = parse_diode_config(Vbypass, cell_pos)
+    Vbypass_module = None
+    if Vbypass_config == DEFAULT_BYPASS:
+        Vbypass_substr = np.full(len(cell_pos), Vbypass, dtype=np.float64)
+    elif Vbypass_config == CUSTOM_SUBSTR_BYPASS:
+        Vbypass_substr = np.array(
+            [np.nan if v is None else v for v in Vbypass], dtype=np.float64
+        )
+    else:
+        # module bypass value is assigned after substrings are combined
+        Vbypass_substr = np.full(len(cell_pos), np.nan)
+        Vbypass_module = Vbypass[0]
+    topology = tuple(
+        tuple(tuple((r['idx'], r['crosstie']) for r in c) for c in substr)
+        for substr in cell_pos
+    )
+    return {'topology': topology, 'series': series, 'substrs': substrs,
+            'Vbypass_substr': Vbypass_substr, 'Vbypass_module': Vbypass_module}
+
+
+def calc_modules(plan, Icell, Vcell, Isc, Voc, VRBD, pvconst):
+    """
+    Calculate the IV curves of many modules with the same :attr:`plan` at
+    once. Each step of the plan combines the cells of all of the modules
+    together, except mixed substrings, which are combined one module at a
+    time.
+
+    :param plan: plan compiled by :func:`compile_plan`
+    :param Icell: cell currents [A], shape ``(modules, cells, 3 * npts)``
+    :param Vcell: cell voltages [V], same shape as ``Icell``
+    :param Isc: cell short circuit currents [A], shape ``(modules, cells)``
+    :param Voc: cell open circuit voltages [V], same shape as ``Isc``
+    :param VRBD: cell reverse breakdown voltages [V], same shape as ``Isc``
+    :param pvconst: configuration constants object
+    :return: module currents [A], voltages [V] and powers [W], and substring
+        currents [A] and voltages [V], with a leading axis for modules
+    """
+    nmods = Icell.shape[0]
+    # current of each cell at its reverse breakdown voltage
+    IatVrbd = npinterpx_batch(
+        VRBD[..., None], Vcell[..., None, :], Icell[..., None, :]
+    )[..., 0, 0]
+    # combine all groups of series cells with the same length at once
+    series_iv = {}
+    for groups, idxs in plan['series']:
+        Iseries, Vseries = pvconst.calcSeries(
+            Icell[:, idxs], Vcell[:, idxs], Isc[:, idxs].mean(axis=-1),
+            IatVrbd[:, idxs].max(axis=-1)
+        )
+        for n, group in enumerate(groups):
+            series_iv[group] = (Iseries[:, n], Vseries[:, n])
+    Isubstr, Vsubstr = [], []
+    for substr in plan['substrs']:
+        if substr[0] == 'series':
+            Isub, Vsub = series_iv[substr[1]]
+        elif substr[0] == 'crosstie':
+            # combine all crosstied rows in parallel at once
+            idxs = substr[1]
+            Irows, Vrows = pvconst.calcParallel(
+                Icell[:, idxs], Vcell[:, idxs], Voc[:, idxs].max(axis=-1),
+                VRBD.min(axis=-1)[:, None], Voc=Voc[:, idxs].mean(axis=-1),
+                shared_voltages=False
+            )
+            Isc_rows = npinterpx_batch(np.zeros((nmods, 1)), Vrows, Irows)
+            Imax_rows = Irows.max(axis=-1)
+            Isub, Vsub = pvconst.calcSeries(
+                Irows, Vrows, Isc_rows.mean(axis=(1, 2)), Imax_rows.max(axis=1)
+            )
+        else:
+            IVsub = [
+                _calc_mixed_substr(
+                    substr, dict((g, (I[m], V[m]))
+                                 for g, (I, V) in iteritems(series_iv)),
+                    Icell[m], Vcell[m], Voc[m], pvconst
+                ) for m in range(nmods)
+            ]
+            Isub = np.asarray([I for I, _ in IVsub])
+            Vsub = np.asarray([V for _, V in IVsub])
+        Isubstr.append(Isub)
+        Vsubstr.append(Vsub)
+    Isubstr, Vsubstr = np.stack(Isubstr, axis=1), np.stack(Vsubstr, axis=1)
+    # bypass substrings, NaN means no bypass diode
+    Vbypass = plan['Vbypass_substr'][:, None].astype(Vsubstr.dtype)
+    Vsubstr = np.where(Vsubstr < Vbypass, Vbypass, Vsubstr)
+    Isc_substr = npinterpx_batch(np.zeros((nmods, 1)), Vsubstr, Isubstr)
+    Imax_substr = Isubstr.max(axis=-1)
+    Imod, Vmod = pvconst.calcSeries(
+        Isubstr, Vsubstr, Isc_substr.mean(axis=(1, 2)), Imax_substr.max(axis=1)
+    )
+    # if entire module has only one bypass diode
+    if plan['Vbypass_module'] is not None:
+        bypassed = Vmod < plan['Vbypass_module']
+        Vmod[bypassed] = plan['Vbypass_module']
+    Pmod = Imod * Vmod
+    return Imod, Vmod, Pmod, Isubstr, Vsubstr
+
+
+def _calc_mixed_substr(substr, series_iv, Icell, Vcell, Voc, pvconst):
+    """
+    Combine a substring with some crosstied circuits of one module.
+
+    :param substr: ``('mixed', blocks, remaining)`` step of plan
+    :param series_iv: IV curves of each group of series cells in the module
+    :param Icell: cell currents [A]
+    :param Vcell: cell voltages [V]
+    :param Voc: cell open circuit voltages [V]
+    :param pvconst: configuration constants object
+    :return: substring current [A] and voltage [V]
+    """
+    _, blocks, remaining = substr
+    IVall_cols = []
+    for cols in (blocks or [remaining]):
+        IVprev_cols = [
+            [series_iv[group] + (Voc[idxs].sum(),)
+             if group is not None else
+             (Icell[idxs], Vcell[idxs], Voc[idxs].sum())
+             for group, idxs in circuits]
+            for circuits in cols
+        ]
+        # combine crosstied circuits
+        IVall_cols.append(combine_parallel_circuits(IVprev_cols, pvconst))
+    if not blocks:
+        return IVall_cols[0]
+    Iparallel, Vparallel = zip(*IVall_cols)
+    Iparallel = np.asarray(Iparallel)
+    Vparallel = np.asarray(Vparallel)
+    Voc_parallel = np.asarray([
+        np.interp(np.float64(0), np.flipud(i_par), np.flipud(v_par))
+        for i_par, v_par in zip(Iparallel, Vparallel)])
+    return pvconst.calcParallel(
+        Iparallel, Vparallel, Vparallel.max(), Vparallel.min(),
+        Voc=Voc_parallel.mean(), shared_voltages=False
+    )
+
+
+def calc_operating_points(plan, Iop, Imod, Vmod, Isubstr, Vsubstr, Icell,
+                          Vcell, Voc, VRBD, pvconst):
+    """
+    Calculate the operating points of the substrings and cells of many
+    modules with the same :attr:`plan` at one current per module. Cells in
+    a substring carry the module current, unless its bypass diode is on,
+    then the rest of the current goes through the diode and the cells
+    operate where the sum of their voltages is the bypass voltage. Cells in
+    crosstied rows share the row voltage. Substrings with only some crosstied
+    circuits are approximated as if all of their rows were crosstied.
+
+    :param plan: plan compiled by :func:`compile_plan`
+    :param Iop: module currents [A], shape ``(modules,)``
+    :param Imod: module IV curve currents [A], shape ``(modules, points)``
+    :param Vmod: module IV curve voltages [V], same shape as ``Imod``
+    :param Isubstr: substring IV curve currents [A], shape
+        ``(modules, substrings, points)``
+    :param Vsubstr: substring IV curve voltages [V], same shape as
+        ``Isubstr``
+    :param Icell: cell IV curve currents [A], shape
+        ``(modules, cells, 3 * npts)``
+    :param Vcell: cell IV curve voltages [V], same shape as ``Icell``
+    :param Voc: cell open circuit voltages [V], shape ``(modules, cells)``
+    :param VRBD: cell reverse breakdown voltages [V], same shape as ``Voc``
+    :param pvconst: configuration constants object
+    :return: module voltages [V], shape ``(modules,)``, substring currents
+        through the cells [A], substring voltages [V] and bypass diode flags,
+        shape ``(modules, substrings)``, and cell currents [A] and voltages
+        [V], shape ``(modules, cells)``
+    """
+    nmods, nsubstr = Isubstr.shape[:2]
+    Iop = np.asarray(Iop, dtype=np.float64).reshape(nmods, 1)
+    # IV curves are in order of decreasing current, so flip them to
+    # interpolate voltages at currents
+    Vmod_op = npinterpx_batch(
+        Iop, Imod[:, None, ::-1], Vmod[:, None, ::-1]
+    )[:, 0, 0]
+    Vsubstr_op = npinterpx_batch(
+        Iop, Isubstr[..., ::-1], Vsubstr[..., ::-1]
+    )[..., 0]
+    Isubstr_op = np.repeat(Iop, nsubstr, axis=1)
+    Vbypass = plan['Vbypass_substr']
+    with np.errstate(invalid='ignore'):
+        bypassed = Vsubstr_op <= Vbypass  # NaN means no bypass diode
+    Vbypass_module = plan['Vbypass_module']
+    if Vbypass_module is not None and np.any(Vmod_op <= Vbypass_module):
+        # substring voltages add up to the module bypass voltage
+        on = Vmod_op <= Vbypass_module
+        Vsum = npinterpx_batch(
+            Imod[on], Isubstr[on, :, ::-1], Vsubstr[on, :, ::-1]
+        ).sum(axis=1)
+        Ibypass = npinterpx_batch(
+            np.full((on.sum(), 1), Vbypass_module), Vsum[:, None],
+            Imod[on, None]
+        )[:, 0]
+        Isubstr_op[on] = Ibypass
+        Vsubstr_op[on] = npinterpx_batch(
+            Ibypass[..., None], Isubstr[on, :, None, ::-1],
+            Vsubstr[on, :, None, ::-1]
+        )[..., 0, 0]
+        bypassed[on] = True
+    series_idxs = {}
+    for groups, idxs in plan['series']:
+        series_idxs.update(zip(groups, idxs))
+    Icell_op = np.empty(Voc.shape)
+    Vcell_op = np.empty(Voc.shape)
+    for n, substr in enumerate(plan['substrs']):
+        if substr[0] == 'series':
+            # each cell is a row
+            idxs = series_idxs[substr[1]]
+            Irows, Vrows = Icell[:, idxs], Vcell[:, idxs]
+        else:
+            if substr[0] == 'crosstie':
+                idxs = substr[1]
+            else:
+                idxs = np.array([[idx for idx, _ in row]
+                                 for row in zip(*plan['topology'][n])])
+            Irows, Vrows = pvconst.calcParallel(
+                Icell[:, idxs], Vcell[:, idxs], Voc[:, idxs].max(axis=-1),
+                VRBD.min(axis=-1)[:, None], Voc=Voc[:, idxs].mean(axis=-1),
+                shared_voltages=False
+            )
+            Irows, Vrows = np.broadcast_arrays(Irows, Vrows)
+        Irows, Vrows = Irows[..., ::-1], Vrows[..., ::-1]
+        on = bypassed[:, n] & ~np.isnan(Vbypass[n])
+        if on.any():
+            # substring voltage without the bypass diode is the sum of the
+            # row voltages, which is linear between the points of all of the
+            # rows, so solve for the current at the bypass voltage on them
+            Iknots = np.sort(Irows[on].reshape(on.sum(), -1), axis=-1)
+            Vsum = npinterpx_batch(Iknots, Irows[on], Vrows[on]).sum(axis=1)
+            # voltage decreases with current, so flip to interpolate current
+            Isubstr_op[on, n] = npinterpx_batch(
+                np.full((on.sum(), 1), Vbypass[n]), Vsum[:, None, ::-1],
+                Iknots[:, None, ::-1]
+            )[:, 0, 0]
+        Vrows_op = npinterpx_batch(
+            Isubstr_op[:, n, None], Irows, Vrows
+        )[..., 0]
+        if substr[0] == 'series':
+            Icell_op[:, idxs] = Isubstr_op[:, n, None]
+            Vcell_op[:, idxs] = Vrows_op
+        else:
+            # crosstied cells share the row voltage
+            Vcell_op[:, idxs] = Vrows_op[..., None]
+            Icell_op[:, idxs] = npinterpx_batch(
+                Vcell_op[:, idxs, None], Vcell[:, idxs, None],
+                Icell[:, idxs, None]
+            )[..., 0, 0]
+    return Vmod_op, Isubstr_op, Vsubstr_op, bypassed, Icell_op, Vcell_op
+
+
+MODULE_CACHE = LRUCache()
+"""
+Process-wide cache of module IV curves keyed by :attr:`PVmodule.cache_key`, set
+``MODULE_CACHE.maxsize = 0`` to disable it
+"""
+
+
 class PVmodule(object):
     """
     A Class for PV modules.
@@ -199,14 +538,16 @@ class PVmodule(object):
         bypass diode trigger voltage [V]
         default case - one bypass diode per cell string (VBYPASS = -0.5V(V)) \n
         float - one bypass diode per cell string with Vf = Vbypass (V) \n
-        len(list) == 1 - one bypass diode per module (bypasses entire module ) \n
-        len(list) == len(cell_pos) - bypass diode value across cell string as defined in the list \n
+        len(list) == 1 - one bypass diode per module (bypasses entire
+        module) \n
+        len(list) == len(cell_pos) - bypass diode value across cell string
+        as defined in the list \n
     :param cellArea: cell area [cm^2]
     """
     def __init__(self, cell_pos=STD96, pvcells=None, pvconst=None,
                  Vbypass=None, cellArea=CELLAREA):
         # TODO: check cell position pattern
-        self.cell_pos = cell_pos  #: cell position pattern dictionary
+        self.cell_pos = cell_pos
         self.numberCells = sum([len(c) for s in self.cell_pos for c in s])
         """number of cells in the module"""
         # is pvcells a list?
@@ -228,14 +569,17 @@ class PVmodule(object):
             pvconst = pvc0.pvconst
             for p in pvcells:
                 if p.pvconst is not pvconst:
-                    raise Exception('PVconstant must be the same for all cells')
+                    raise Exception(
+                        'PVconstant must be the same for all cells'
+                    )
         self.pvconst = pvconst  #: configuration constants
         
         # set default value of Vbypass if None
         if Vbypass is None:
-            self.Vbypass = VBYPASS  #: [V] trigger voltage of bypass diode
+            self.Vbypass = VBYPASS
         else:
-            # if an object is passed, use that to determine the config of bypass diodes
+            # if an object is passed, use that to determine the config of
+            # bypass diodes
             self.Vbypass = Vbypass
         self.Vbypass_config = parse_diode_config(self.Vbypass, self.cell_pos)
 
@@ -245,48 +589,165 @@ class PVmodule(object):
             raise ValueError(
                 "Number of cells doesn't match cell position pattern."
             )
-        self.pvcells = pvcells  #: list of `PVcell` objects in this `PVmodule`
+        self.pvcells = pvcells
         self.numSubStr = len(self.cell_pos)  #: number of substrings
         self.subStrCells = [len(_) for _ in self.cell_pos]  #: cells per substr
-        # initialize members so PyLint doesn't get upset
-        self.Imod, self.Vmod, self.Pmod, self.Isubstr, self.Vsubstr = self.calcMod()
+        self.plan  # compile plan, so cell position pattern errors raise now
+        self._recalc()
 
     # TODO: use __getattr__ to check for updates to pvcells
 
+    def __getattr__(self, name):
+        # only called if attribute is missing, IE: IV curves were invalidated
+        if name in MODULE_CURVES:
+            self._calc_curves()
+            return self.__dict__[name]
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+        )
+
+    def invalidate(self):
+        """
+        Discard the module IV curves, so they're calculated again on next
+        access. Call this after changing cells in place in lazy mode, see
+        :attr:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants.lazy`.
+        """
+        self._cell_arrays = {}  # cells may have changed in place
+        for name in MODULE_CURVES:
+            self.__dict__.pop(name, None)
+
+    def _recalc(self):
+        """
+        Calculate the module IV curves now, or on first access in lazy mode.
+        """
+        if self.pvconst.lazy:
+            self.invalidate()
+        else:
+            self._calc_curves()
+
+    def _calc_curves(self):
+        """Calculate the module IV curves and set them."""
+        (self.Imod, self.Vmod, self.Pmod,
+         self.Isubstr, self.Vsubstr) = self.calcMod()
+
+    @property
+    def cell_pos(self):
+        """cell position pattern dictionary"""
+        return self._cell_pos
+
+    @cell_pos.setter
+    def cell_pos(self, cell_pos):
+        self._cell_pos = cell_pos
+        self._plan = None  # compile plan again
+
+    @property
+    def Vbypass(self):
+        """[V] trigger voltage of bypass diodes"""
+        return self._Vbypass
+
+    @Vbypass.setter
+    def Vbypass(self, Vbypass):
+        self._Vbypass = Vbypass
+        self._plan = None  # compile plan again
+
+    @property
+    def plan(self):
+        """
+        Plan to combine cells compiled from the cell position pattern and
+        bypass diodes by :func:`compile_plan`.
+        """
+        if self._plan is None:
+            self._plan = compile_plan(self.cell_pos, self.Vbypass)
+        return self._plan
+
+    @property
+    def cache_key(self):
+        """
+        The state of the module: the cell position pattern, the bypass diode
+        trigger voltages, the number of points in the IV curve, if the points
+        are adaptive, the floating point type of the curves and the cache key
+        of each cell, see
+        :attr:`~pvmismatch.pvmismatch_lib.pvcell.PVcell.cache_key`. Modules
+        with the same key have the same IV curves.
+        """
+        topology = self.plan['topology']
+        if self.Vbypass_config == DEFAULT_BYPASS:
+            Vbypass = self.Vbypass
+        else:
+            Vbypass = tuple(self.Vbypass)
+        # only get keys of unique cells, since most cells are shared
+        cell_keys = {pvc: pvc.cache_key for pvc in dict.fromkeys(self.pvcells)}
+        return (topology, Vbypass, self.pvconst.npts, self.pvconst.adaptive,
+                self.pvconst.dtype.name,
+                tuple(cell_keys[pvc] for pvc in self.pvcells))
+
+    @property
+    def pvcells(self):
+        """list of :class:`~pvmismatch.pvmismatch_lib.pvcell.PVcell`"""
+        return self._pvcells
+
+    @pvcells.setter
+    def pvcells(self, pvcells):
+        self._pvcells = pvcells
+        # don't clear the dictionary, copies of this module may share it
+        self._cell_arrays = {}
+
+    def _cell_array(self, name):
+        """
+        Get an array of a cell attribute with one row per cell. The array is
+        cached until the list of cells is set or :meth:`calcMod` is called, so
+        call :meth:`calcMod` after changing cells in place.
+
+        :param name: name of cell attribute
+        :return: read-only array with shape ``(numberCells, ...)``
+        """
+        cell_array = self._cell_arrays.get(name)
+        if cell_array is None:
+            # most cells are shared, so only get values of the unique cells
+            unique_cells = {}
+            for pvc in self.pvcells:
+                unique_cells.setdefault(pvc, len(unique_cells))
+            values = np.array([getattr(pvc, name).flatten()
+                               for pvc in unique_cells])
+            cell_array = values[[unique_cells[pvc] for pvc in self.pvcells]]
+            cell_array.flags.writeable = False
+            self._cell_arrays[name] = cell_array
+        return cell_array
+
     # copy some values from cells to modules
     @property
     def Ee(self):
-        return np.array([pvc.Ee.flatten() for pvc in self.pvcells])
+        return self._cell_array('Ee')
 
     @property
     def Tcell(self):
-        return np.array([pvc.Tcell.flatten() for pvc in self.pvcells])
+        return self._cell_array('Tcell')
 
     @property
     def Icell(self):
-        return np.array([pvc.Icell.flatten() for pvc in self.pvcells])
+        return self._cell_array('Icell')
 
     @property
     def Vcell(self):
-        return np.array([pvc.Vcell.flatten() for pvc in self.pvcells])
+        return self._cell_array('Vcell')
 
     @property
     def Pcell(self):
-        return np.array([pvc.Pcell.flatten() for pvc in self.pvcells])
+        return self._cell_array('Pcell')
 
     @property
     def Isc(self):
-        return np.array([pvc.Isc.flatten() for pvc in self.pvcells])
+        return self._cell_array('Isc')
 
     @property
     def Voc(self):
-        return np.array([pvc.Voc.flatten() for pvc in self.pvcells])
+        return self._cell_array('Voc')
 
     @property
     def VRBD(self):
-        return np.array([pvc.VRBD.flatten() for pvc in self.pvcells])
+        return self._cell_array('VRBD')
 
-    def setSuns(self, Ee, cells=None):
+    def setSuns(self, Ee, cells=None, Tc=None):
         """
         Set the irradiance in suns, Ee, on the solar cells in the module.
         Recalculates cell current (Icell [A]), voltage (Vcell [V]) and power
@@ -296,67 +757,10 @@ class PVmodule(object):
         Args:
             Ee (:class:`numpy.ndarray`): Effective Irradiance [suns]
             cells (list): Cells to change [Optional]
+            Tc (:class:`numpy.ndarray`): Cell Temperature [K], set together
+                with irradiance [Optional]
         """
-        if cells is None:
-            if np.isscalar(Ee):
-                new_pvcells = range(self.numberCells)  # new list of cells
-                old_pvcells = dict.fromkeys(self.pvcells)  # same as set(pvcells)
-                for cell_id, pvcell in enumerate(self.pvcells):
-                    if old_pvcells[pvcell] is None:
-                        new_pvcells[cell_id] = copy(pvcell)
-                        old_pvcells[pvcell] = new_pvcells[cell_id]
-                    else:
-                        new_pvcells[cell_id] = old_pvcells[pvcell]
-                self.pvcells = new_pvcells
-                pvcell_set = itervalues(old_pvcells)
-                for pvc in pvcell_set:
-                    pvc.Ee = Ee
-            elif np.size(Ee) == self.numberCells:
-                self.pvcells = copy(self.pvcells)  # copy list first
-                for cell_idx, Ee_idx in enumerate(Ee):
-                    self.pvcells[cell_idx] = copy(self.pvcells[cell_idx])
-                    self.pvcells[cell_idx].Ee = Ee_idx
-            else:
-                raise Exception("Input irradiance value (Ee) for each cell!")
-        else:
-            Ncells = np.size(cells)
-            self.pvcells = copy(self.pvcells)  # copy list first
-            if np.isscalar(Ee):
-                cells_to_update = [self.pvcells[i] for i in cells]
-                old_pvcells = dict.fromkeys(cells_to_update)
-                for cell_id, pvcell in zip(cells, cells_to_update):
-                    if old_pvcells[pvcell] is None:
-                        self.pvcells[cell_id] = copy(pvcell)
-                        self.pvcells[cell_id].Ee = Ee
-                        old_pvcells[pvcell] = self.pvcells[cell_id]
-                    else:
-                        self.pvcells[cell_id] = old_pvcells[pvcell]
-            elif np.size(Ee) == Ncells:
-                # Find unique irradiance values
-                # TODO possible "cleaner" alternative by grouping cells into tuples that match the set irradiance
-                # E.g: pvsys.setSuns({X: {Y: {'Ee': (0.33, 0.99), 'cells': [(2, 3), 17]}}})
-                cells = np.array(cells)
-                Ee = np.array(Ee)
-                unique_ee = np.unique(Ee)
-                for a_Ee in unique_ee:
-                    cells_subset = cells[Ee == a_Ee]
-                    cells_to_update = [self.pvcells[i] for i in cells_subset]
-                    old_pvcells = dict.fromkeys(cells_to_update)
-                    for cell_id, pvcell in zip(cells_subset, cells_to_update):
-                        if old_pvcells[pvcell] is None:
-                            self.pvcells[cell_id] = copy(pvcell)
-                            self.pvcells[cell_id].Ee = a_Ee
-                            old_pvcells[pvcell] = self.pvcells[cell_id]
-                        else:
-                            self.pvcells[cell_id] = old_pvcells[pvcell]
-            else:
-                raise Exception("Input irradiance value (Ee) for each cell!")
-        self.Imod, self.Vmod, self.Pmod, self.Isubstr, self.Vsubstr = self.calcMod()
-
-    # TODO setTemps is a nearly identical copy of setSuns. The DRY principle
-    # says that we should not be copying code.
-    # TODO Replace both setSuns() and setTemps() with a single method for
-    # updating cell parameters that works for all params
+        self.setConditions(Ee=Ee, Tc=Tc, cells=cells)
 
     def setTemps(self, Tc, cells=None):
         """
@@ -369,213 +773,151 @@ class PVmodule(object):
             Tc (:class:`numpy.ndarray`): Cell Temperature [K]
             cells (list): Cells to change [Optional]
         """
+        self.setConditions(Tc=Tc, cells=cells)
+
+    def setConditions(self, Ee=None, Tc=None, cells=None, **cell_params):
+        """
+        Set the irradiance in suns, Ee, the temperature in Kelvin, Tc, and any
+        other cell parameters, *EG*: ``Rsh``, on the solar cells in the module
+        and recalculate once.
+
+        Args:
+            Ee (:class:`numpy.ndarray`): Effective Irradiance [suns]
+            Tc (:class:`numpy.ndarray`): Cell Temperature [K]
+            cells (list): Cells to change [Optional]
+            cell_params: other cell parameters [Optional]
+        """
+        for name in cell_params:
+            if name not in CELL_PARAMS or name in ('Ee', 'Tcell', 'VocSTC'):
+                raise AttributeError('%s is not a cell parameter' % name)
+        if Ee is not None:
+            cell_params['Ee'] = Ee
+        if Tc is not None:
+            cell_params['Tcell'] = Tc
+        self._setCells(cells, **cell_params)
+
+    def _setCells(self, cells=None, **params):
+        """
+        Set cell attributes, *EG*: ``Ee`` or ``Tcell``, on the solar cells in
+        the module, then recalculate the module.
+
+        Cells are copied on write: each cell is replaced by a new cell, but
+        cells that were the same object before and get the same values are
+        replaced by the same new cell. The I-V curves of all of the new cells
+        are calculated at once by
+        :func:`~pvmismatch.pvmismatch_lib.pvcell.calc_cells`.
+
+        :param cells: indices of cells to change, ``None`` changes all cells
+        :param params: attributes to set, either scalars or one value per cell
+        """
         if cells is None:
-            if np.isscalar(Tc):
-                new_pvcells = range(self.numberCells)  # new list of cells
-                old_pvcells = dict.fromkeys(self.pvcells)  # same as set(pvcells)
-                for cell_id, pvcell in enumerate(self.pvcells):
-                    if old_pvcells[pvcell] is None:
-                        new_pvcells[cell_id] = copy(pvcell)
-                        old_pvcells[pvcell] = new_pvcells[cell_id]
-                    else:
-                        new_pvcells[cell_id] = old_pvcells[pvcell]
-                self.pvcells = new_pvcells
-                pvcell_set = itervalues(old_pvcells)
-                for pvc in pvcell_set:
-                    pvc.Tcell = Tc
-            elif np.size(Tc) == self.numberCells:
-                self.pvcells = copy(self.pvcells)  # copy list first
-                for cell_idx, Tc_idx in enumerate(Tc):
-                    self.pvcells[cell_idx] = copy(self.pvcells[cell_idx])
-                    self.pvcells[cell_idx].Tcell = Tc_idx
-            else:
-                raise Exception("Input temperature value (Tc) for each cell!")
-        else:
-            Ncells = np.size(cells)
-            self.pvcells = copy(self.pvcells)  # copy list first
-            if np.isscalar(Tc):
-                cells_to_update = [self.pvcells[i] for i in cells]
-                old_pvcells = dict.fromkeys(cells_to_update)
-                for cell_id, pvcell in zip(cells, cells_to_update):
-                    if old_pvcells[pvcell] is None:
-                        self.pvcells[cell_id] = copy(pvcell)
-                        self.pvcells[cell_id].Tcell = Tc
-                        old_pvcells[pvcell] = self.pvcells[cell_id]
-                    else:
-                        self.pvcells[cell_id] = old_pvcells[pvcell]
-            elif np.size(Tc) == Ncells:
-                # Find unique irradiance values
-                # TODO possible "cleaner" alternative by grouping cells into tuples that match the set temp
-                # E.g: pvsys.setTemps({X: {Y: {'Tc': (280, 290), 'cells': [(2, 3), 17]}}})
-                cells = np.array(cells)
-                Tc = np.array(Tc)
-                unique_tc = np.unique(Tc)
-                for a_Tc in unique_tc:
-                    cells_subset = cells[Tc == a_Tc]
-                    cells_to_update = [self.pvcells[i] for i in cells_subset]
-                    old_pvcells = dict.fromkeys(cells_to_update)
-                    for cell_id, pvcell in zip(cells_subset, cells_to_update):
-                        if old_pvcells[pvcell] is None:
-                            self.pvcells[cell_id] = copy(pvcell)
-                            self.pvcells[cell_id].Tcell = a_Tc
-                            old_pvcells[pvcell] = self.pvcells[cell_id]
-                        else:
-                            self.pvcells[cell_id] = old_pvcells[pvcell]
-            else:
-                raise Exception("Input temperature value (Tc) for each cell!")
-        self.Imod, self.Vmod, self.Pmod, self.Isubstr, self.Vsubstr = self.calcMod()
+            cells = range(self.numberCells)
+        ncells = len(cells)
+        values = []
+        for name, value in params.items():
+            value = np.asarray(value, dtype=np.float64)
+            if value.ndim and value.size != ncells:
+                raise Exception(
+                    "Input %s value (%s) for each cell!" %
+                    CELL_PARAM_NAMES.get(name, (name, name))
+                )
+            values.append(np.broadcast_to(value.ravel(), (ncells,)).tolist())
+        names = list(params)
+        new_pvcells = list(self.pvcells)  # copy list first
+        copied_pvcells = {}  # new cell for each old cell and new values
+        for cell_id, cell_values in zip(cells, zip(*values)):
+            pvcell = self.pvcells[cell_id]
+            key = (pvcell,) + cell_values
+            new_pvcell = copied_pvcells.get(key)
+            if new_pvcell is None:
+                # don't calculate until all cells are set
+                new_pvcell = pvcell._copy(**dict(zip(names, cell_values)))
+                copied_pvcells[key] = new_pvcell
+            new_pvcells[cell_id] = new_pvcell
+        if not self.pvconst.lazy:
+            calc_cells(list(copied_pvcells.values()))
+        self.pvcells = new_pvcells
+        self._recalc()
 
     def calcMod(self):
         """
-        Calculate module I-V curves.
+        Calculate module I-V curves, or get them from :data:`MODULE_CACHE` if a
+        module with the same :attr:`cache_key` was already calculated. The
+        cached curves are shared by modules, so they are read-only.
 
-        Returns module currents [A], voltages [V] and powers [W]
+        Returns module currents [A], voltages [V] and powers [W], and substring
+        currents [A] and voltages [V]
         """
-        # iterate over substrings
-        # TODO: benchmark speed difference append() vs preallocate space
-        Isubstr, Vsubstr, Isc_substr, Imax_substr = [], [], [], []
-        for substr_idx, substr in enumerate(self.cell_pos):
-            # check if cells are in series or any crosstied circuits
-            if all(r['crosstie'] == False for c in substr for r in c):
-                idxs = [r['idx'] for c in substr for r in c]
-                IatVrbd = np.asarray(
-                    [np.interp(vrbd, v, i) for vrbd, v, i in
-                     zip(self.VRBD[idxs], self.Vcell[idxs], self.Icell[idxs])]
-                )
-                Isub, Vsub = self.pvconst.calcSeries(
-                    self.Icell[idxs], self.Vcell[idxs], self.Isc[idxs].mean(),
-                    IatVrbd.max()
-                )
-            elif all(r['crosstie'] == True for c in substr for r in c):
-                Irows, Vrows = [], []
-                Isc_rows, Imax_rows = [], []
-                for row in zip(*substr):
-                    idxs = [c['idx'] for c in row]
-                    Irow, Vrow = self.pvconst.calcParallel(
-                        self.Icell[idxs], self.Vcell[idxs],
-                        self.Voc[idxs].max(), self.VRBD.min(),
-                        Voc=self.Voc[idxs].mean()
-                    )
-                    Irows.append(Irow)
-                    Vrows.append(Vrow)
-                    Isc_rows.append(np.interp(np.float64(0), Vrow, Irow))
-                    Imax_rows.append(Irow.max())
-                Irows, Vrows = np.asarray(Irows), np.asarray(Vrows)
-                Isc_rows = np.asarray(Isc_rows)
-                Imax_rows = np.asarray(Imax_rows)
-                Isub, Vsub = self.pvconst.calcSeries(
-                    Irows, Vrows, Isc_rows.mean(), Imax_rows.max()
-                )
-            else:
-                IVall_cols = []
-                prev_col = None
-                IVprev_cols = []
-                for col in substr:
-                    IVcols = []
-                    is_first = True
-                    # combine series between crossties
-                    for idxs in get_series_cells(col, prev_col):
-                        if not idxs:
-                            # first row should always be empty since it must be
-                            # crosstied
-                            is_first = False
-                            continue
-                        elif is_first:
-                            # TODO: use pvmismatch exceptions
-                            raise Exception(
-                                "First row and last rows must be crosstied."
-                            )
-                        elif len(idxs) > 1:
-                            IatVrbd = np.asarray(
-                                [np.interp(vrbd, v, i) for vrbd, v, i in
-                                 zip(self.VRBD[idxs], self.Vcell[idxs],
-                                     self.Icell[idxs])]
-                            )
-                            Icol, Vcol = self.pvconst.calcSeries(
-                                self.Icell[idxs], self.Vcell[idxs],
-                                self.Isc[idxs].mean(), IatVrbd.max()
-                            )
-                        else:
-                            Icol, Vcol = self.Icell[idxs], self.Vcell[idxs]
-                        IVcols.append([Icol, Vcol, self.Voc[idxs].sum()])
-                    # append IVcols and continue
-                    IVprev_cols.append(IVcols)
-                    if prev_col:
-                        # if circuits are same in both columns then continue
-                        if not all(icol['crosstie'] == jcol['crosstie']
-                                   for icol, jcol in zip(prev_col, col)):
-                            # combine crosstied circuits
-                            Iparallel, Vparallel = combine_parallel_circuits(
-                                IVprev_cols, self.pvconst
-                            )
-                            IVall_cols.append([Iparallel, Vparallel])
-                            # reset prev_col
-                            prev_col = None
-                            IVprev_cols = []
-                            continue
-                    # set prev_col and continue
-                    prev_col = col
-                # combine any remaining crosstied circuits in substring
-                if not IVall_cols:
-                    # combine crosstied circuits
-                    Isub, Vsub = combine_parallel_circuits(
-                        IVprev_cols, self.pvconst
-                    )
-                else:
-                    Iparallel, Vparallel = zip(*IVall_cols)
-                    Iparallel = np.asarray(Iparallel)
-                    Vparallel = np.asarray(Vparallel)
-                    Voc_parallel = np.asarray([
-                        np.interp(np.float64(0), np.flipud(i_par), np.flipud(v_par))
-                        for i_par, v_par in zip(Iparallel, Vparallel)])
-                    Isub, Vsub = self.pvconst.calcParallel(
-                        Iparallel, Vparallel, Vparallel.max(), Vparallel.min(),
-                        Voc=Voc_parallel.mean()
-                    )
+        self._cell_arrays = {}  # cells may have changed in place
+        key = self.cache_key
+        IVmod = MODULE_CACHE.get(key)
+        if IVmod is None:
+            IVmod = self._calcMod()
+            for x in IVmod:
+                x.flags.writeable = False
+            MODULE_CACHE.put(key, IVmod)
+        return IVmod
+
+    def _calcMod(self):
+        """
+        Calculate module I-V curves by executing the :attr:`plan`.
 
+        Returns module currents [A], voltages [V] and powers [W]
+        """
+        # calculate all invalidated cells at once instead of on first access
+        calc_cells([pvc for pvc in dict.fromkeys(self.pvcells)
+                    if not pvc._has_curves()])
+        IVmods = calc_modules(
+            self.plan, self.Icell[None], self.Vcell[None],
+            self.Isc.reshape(1, -1), self.Voc.reshape(1, -1),
+            self.VRBD.reshape(1, -1), self.pvconst
+        )
+        return tuple(x[0] for x in IVmods)
 
-            if self.Vbypass_config == DEFAULT_BYPASS:
-                bypassed = Vsub < self.Vbypass
-                Vsub[bypassed] = self.Vbypass
-            elif self.Vbypass_config == CUSTOM_SUBSTR_BYPASS:
-                if self.Vbypass[substr_idx] is None:
-                    # no bypass for this substring
-                    pass
-                else:
-                    # bypass the substring
-                    bypassed = Vsub < self.Vbypass[substr_idx]
-                    Vsub[bypassed] = self.Vbypass[substr_idx]
-            elif self.Vbypass_config == MODULE_BYPASS:
-                # module bypass value will be assigned after the for loop for substrings is over
-                pass
-
-            Isubstr.append(Isub)
-            Vsubstr.append(Vsub)
-            Isc_substr.append(np.interp(np.float64(0), Vsub, Isub))
-            Imax_substr.append(Isub.max())
-            
-        Isubstr, Vsubstr = np.asarray(Isubstr), np.asarray(Vsubstr)
-        Isc_substr = np.asarray(Isc_substr)
-        Imax_substr = np.asarray(Imax_substr)
-        Imod, Vmod = self.pvconst.calcSeries(
-            Isubstr, Vsubstr, Isc_substr.mean(), Imax_substr.max()
+    def operating_point(self, I):
+        """
+        Calculate the operating points of the substrings and cells at module
+        currents, see :func:`calc_operating_points`.
+
+        :param I: module current [A], scalar or array
+        :return: dictionary of module voltage, ``Vmod`` [V], substring
+            currents, ``Isubstr`` [A], voltages, ``Vsubstr`` [V] and bypass
+            diode flags, ``bypassed``, and cell currents, ``Icell`` [A],
+            voltages, ``Vcell`` [V] and powers, ``Pcell`` [W], the shape is
+            the shape of ``I`` followed by substrings or cells
+        """
+        I = np.asarray(I, dtype=np.float64)
+        curves = (self.Imod.ravel(), self.Vmod.ravel(), self.Isubstr,
+                  self.Vsubstr, self.Icell, self.Vcell, self.Voc.ravel(),
+                  self.VRBD.ravel())
+        op = calc_operating_points(
+            self.plan, I.ravel(),
+            *[np.broadcast_to(x, (I.size,) + x.shape) for x in curves],
+            pvconst=self.pvconst
         )
-        
-        # if entire module has only one bypass diode
-        if self.Vbypass_config == MODULE_BYPASS:
-            bypassed = Vmod < self.Vbypass[0]
-            Vmod[bypassed] = self.Vbypass[0]
-        else:
-            pass
+        op = dict((k, x.reshape(I.shape + x.shape[1:]))
+                  for k, x in zip(OPERATING_POINTS, op))
+        op['Pcell'] = op['Icell'] * op['Vcell']
+        return op
 
-        Pmod = Imod * Vmod
-        return Imod, Vmod, Pmod, Isubstr, Vsubstr
+    def bypass_reverse_bias(self, I):
+        """
+        Bypass diodes that are on and cells that are reverse biased at module
+        currents, see :meth:`operating_point`.
+
+        :param I: module current [A], scalar or array
+        :return: bypass diode flags, shape ``I.shape + (numSubStr,)``, and
+            reverse biased cell flags, shape ``I.shape + (numberCells,)``
+        """
+        op = self.operating_point(I)
+        return op['bypassed'], op['Vcell'] < 0
 
     def plotCell(self):
         """
         Plot cell I-V curves.
         Returns cellPlot : matplotlib.pyplot figure
         """
+        from matplotlib import pyplot as plt  # only import to plot
         cellPlot = plt.figure()
         plt.subplot(2, 2, 1)
         plt.plot(self.Vcell.T, self.Icell.T)
@@ -615,6 +957,7 @@ class PVmodule(object):
         Plot module I-V curves.
         Returns modPlot : matplotlib.pyplot figure
         """
+        from matplotlib import pyplot as plt  # only import to plot
         modPlot = plt.figure()
         ax = plt.subplot(2, 1, 1)
         plt.plot(self.Vmod, self.Imod)
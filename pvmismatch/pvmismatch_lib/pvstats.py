@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the :class:`~pvmismatch.pvmismatch_lib.pvstats.PVstats`
+class, which records how much time is spent in each stage of the calculation.
+The stages are only instrumented while stats are recording, otherwise the
+methods aren't changed at all, so there's no cost when stats are off.
+
+For example::
+
+    >>> from pvmismatch.pvmismatch_lib.pvstats import PVstats
+    >>> with PVstats() as stats:
+    ...     pvsys.setSuns(Ee)
+    >>> print(stats)  # table of calls, times and cache hit rates
+"""
+
+from __future__ import absolute_import, division
+from collections import OrderedDict
+from functools import wraps
+from timeit import default_timer
+import numpy as np
+from pvmismatch.pvmismatch_lib import pvsystem
+from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
+from pvmismatch.pvmismatch_lib.pvcell import (
+    PVcellBase, PVcellArray, CELL_CACHE
+)
+from pvmismatch.pvmismatch_lib.pvmodule import PVmodule, MODULE_CACHE
+from pvmismatch.pvmismatch_lib.pvstring import PVstring
+from pvmismatch.pvmismatch_lib.pvexceptions import PVexception
+
+#: stages that are timed, name of stage and the class or module and attribute
+STAGES = OrderedDict([
+    ('PVcell.calcCell', (PVcellBase, 'calcCell')),
+    ('PVcellArray.calcCells', (PVcellArray, 'calcCells')),
+    ('PVconstants.calcSeries', (PVconstants, 'calcSeries')),
+    ('PVconstants.calcParallel', (PVconstants, 'calcParallel')),
+    ('PVmodule.calcMod', (PVmodule, 'calcMod')),
+    ('PVstring.calcString', (PVstring, 'calcString')),
+    ('calc_mpp', (pvsystem, 'calc_mpp')),
+    ('PVsystem.update', (pvsystem.PVsystem, 'update')),
+    ('PVsystemArray.update', (pvsystem.PVsystemArray, 'update'))
+])
+#: caches with hit rates
+CACHES = OrderedDict([('cells', CELL_CACHE), ('modules', MODULE_CACHE)])
+PERCENTILES = (50, 90, 99)  # percentiles of call times in the table
+_RECORDING = []  # stats that are recording, only one at a time
+
+
+class PVstats(object):
+    """
+    Number of calls, times and cache hit rates of each of the :data:`STAGES`
+    while recording. Use it as a context manager, or call :meth:`start` and
+    :meth:`stop`. Times of stages include the stages they call, *EG*:
+    ``PVmodule.calcMod`` includes ``PVconstants.calcSeries``, and calls in
+    worker processes of
+    :meth:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem.simulate` aren't
+    recorded.
+
+    :param stages: (``None``) names of stages to record, default is all
+    :type stages: list
+    """
+    def __init__(self, stages=None):
+        if stages is None:
+            stages = list(STAGES)
+        self.times = OrderedDict((stage, []) for stage in stages)
+        """time of each call of each stage [s]"""
+        self.hits = dict.fromkeys(CACHES, 0)  #: number of cache hits
+        self.misses = dict.fromkeys(CACHES, 0)  #: number of cache misses
+        self._originals = None
+        self._caches = None
+
+    def __str__(self):
+        lines = ['%-24s %8s %10s' % ('stage', 'calls', 'total [s]') + ''.join(
+            '%10s' % ('p%d [ms]' % q) for q in PERCENTILES
+        )]
+        for stage in self.times:
+            if not self.calls(stage):
+                continue
+            lines.append('%-24s %8d %10.4f' % (
+                stage, self.calls(stage), self.total(stage)
+            ) + ''.join(
+                '%10.3f' % (1e3 * p) for p in self.percentiles(stage)
+            ))
+        for cache in CACHES:
+            lines.append('%s cache hit rate: %.1f%% of %d' % (
+                cache, 100. * self.hit_rate(cache),
+                self.hits[cache] + self.misses[cache]
+            ))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return '<PVstats(stages=%d, calls=%d)>' % (
+            len(self.times), sum(len(t) for t in self.times.values())
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def recording(self):
+        """True if stats are recording"""
+        return self._originals is not None
+
+    def start(self):
+        """
+        Start recording by replacing the method of each stage with a timed
+        wrapper.
+        """
+        if _RECORDING:
+            raise PVexception('Stats are already recording.')
+        _RECORDING.append(self)
+        self._originals = {}
+        for stage in self.times:
+            owner, name = STAGES[stage]
+            original = owner.__dict__[name]
+            self._originals[stage] = original
+            setattr(owner, name, self._timed(stage, original))
+        self._caches = dict(
+            (cache, (c.hits, c.misses)) for cache, c in CACHES.items()
+        )
+
+    def stop(self):
+        """Stop recording and restore the methods of each stage."""
+        if not self.recording:
+            return
+        for stage, original in self._originals.items():
+            owner, name = STAGES[stage]
+            setattr(owner, name, original)
+        for cache, (hits, misses) in self._caches.items():
+            self.hits[cache] += CACHES[cache].hits - hits
+            self.misses[cache] += CACHES[cache].misses - misses
+        self._originals = None
+        self._caches = None
+        _RECORDING.remove(self)
+
+    def _timed(self, stage, func):
+        """
+        Wrap a function to append the time of each call to its stage.
+
+        :param stage: name of stage
+        :param func: function to time
+        :return: timed function
+        """
+        times = self.times[stage]
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                times.append(default_timer() - start)
+        return timed
+
+    def clear(self):
+        """Discard all recorded times and cache hits."""
+        for times in self.times.values():
+            del times[:]
+        for cache in CACHES:
+            self.hits[cache] = self.misses[cache] = 0
+        if self.recording:
+            self._caches = dict(
+                (cache, (c.hits, c.misses)) for cache, c in CACHES.items()
+            )
+
+    def calls(self, stage):
+        """
+        Number of calls of a stage.
+
+        :param stage: name of stage
+        """
+        return len(self.times[stage])
+
+    def total(self, stage):
+        """
+        Cumulative time of a stage [s].
+
+        :param stage: name of stage
+        """
+        return sum(self.times[stage])
+
+    def percentiles(self, stage, q=PERCENTILES):
+        """
+        Percentiles of the call times of a stage [s].
+
+        :param stage: name of stage
+        :param q: percentiles between 0 and 100
+        :return: time of each percentile, NaN if the stage wasn't called
+        """
+        if not self.times[stage]:
+            return np.full(len(q), np.nan)
+        return np.percentile(self.times[stage], q)
+
+    def hit_rate(self, cache):
+        """
+        Fraction of lookups in a cache that were found while recording.
+
+        :param cache: name of cache, ``'cells'`` or ``'modules'``
+        """
+        lookups = self.hits[cache] + self.misses[cache]
+        return self.hits[cache] / lookups if lookups else 0.
+
+    def summary(self):
+        """
+        Calls, cumulative time and percentiles of each stage that was called
+        and hit rate of each cache.
+
+        :return: dictionary of stages and caches
+        """
+        stages = OrderedDict()
+        for stage in self.times:
+            if self.calls(stage):
+                stages[stage] = dict(
+                    calls=self.calls(stage), total=self.total(stage),
+                    **dict(('p%d' % q, p) for q, p in
+                           zip(PERCENTILES, self.percentiles(stage)))
+                )
+        caches = dict((cache, self.hit_rate(cache)) for cache in CACHES)
+        return {'stages': stages, 'caches': caches}
@@ -9,11 +9,76 @@ from past.builtins import range
 from future.utils import iteritems
 import numpy as np
 from copy import copy
-from matplotlib import pyplot as plt
 # use absolute imports instead of relative, so modules are portable
 from pvmismatch.pvmismatch_lib.pvconstants import PVconstants, NUMBERMODS
 from pvmismatch.pvmismatch_lib.pvmodule import PVmodule
 
+#: attributes set by :meth:`PVstring.calcString`
+STRING_CURVES = ('Istring', 'Vstring', 'Pstring')
+#: names of module cell attributes for names used in conditions
+CONDITION_ATTRS = {'Tc': 'Tcell'}
+
+
+def parse_conditions(name, cell_value):
+    """
+    Parse the conditions of a module in any of the forms used by
+    :meth:`PVstring.setSuns`: a scalar or array, a list of values and cells,
+    or a dictionary of cells and values.
+
+    :param name: name of condition, *EG*: ``Ee`` or ``Tc``
+    :param cell_value: conditions of module
+    :return: list of conditions as ``(name, cells, value)``
+    """
+    if hasattr(cell_value, 'keys'):
+        cells = cell_value.get('cells')
+        return [(k, cells, v) for k, v in iteritems(cell_value)
+                if k != 'cells']
+    if isinstance(cell_value, (list, tuple)) and len(cell_value) == 1:
+        return [(name, None, cell_value[0])]
+    if isinstance(cell_value, (list, tuple)) and len(cell_value) == 2:
+        return [(name, cell_value[1], cell_value[0])]
+    return [(name, None, cell_value)]
+
+
+def set_module_conditions(pvmod, conditions):
+    """
+    Set conditions on a module with one recalculation, merging conditions for
+    different cells.
+
+    :param pvmod: module
+    :type pvmod: :class:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule`
+    :param conditions: list of conditions as ``(name, cells, value)``
+    """
+    cells = [c for _, c, _ in conditions]
+    if all(c is None for c in cells) or all(
+            c is not None and np.array_equal(c, cells[0]) for c in cells):
+        # all conditions are for the same cells
+        pvmod.setConditions(
+            cells=cells[0], **dict((name, value)
+                                   for name, _, value in conditions)
+        )
+        return
+    # merge conditions, keeping the current values of other cells
+    all_cells = list(range(pvmod.numberCells))
+    values = {}
+    for name, cells, value in conditions:
+        if name not in values:
+            attr = CONDITION_ATTRS.get(name, name)
+            values[name] = np.array(
+                [getattr(pvc, attr) for pvc in pvmod.pvcells]
+            )
+        if cells is None:
+            cells = all_cells
+        values[name][np.asarray(cells, dtype=int)] = value
+    changed = sorted(set(
+        c for _, cells, _ in conditions
+        for c in (all_cells if cells is None else np.ravel(cells).tolist())
+    ))
+    pvmod.setConditions(
+        cells=changed, **dict((name, value[changed])
+                              for name, value in iteritems(values))
+    )
+
 
 class PVstring(object):
     """
@@ -51,32 +116,139 @@ class PVstring(object):
         self.pvconst = pvconst  #: ``PVconstants`` used in  ``PVstring``
         self.numberMods = numberMods  #: number of module in string
         self.pvmods = pvmods  #: list of ``PVModule`` in ``PVstring``
+        self._mod_curves = None  # cached module curves, see _update_mods()
         # calculate string
-        self.Istring, self.Vstring, self.Pstring = self.calcString()
+        self._recalc()
 
     # TODO: use __getattr__ to check for updates to pvcells
 
+    def __getattr__(self, name):
+        # only called if attribute is missing, IE: IV curves were invalidated
+        if name in STRING_CURVES:
+            self.Istring, self.Vstring, self.Pstring = self.calcString()
+            return self.__dict__[name]
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+        )
+
+    def invalidate(self):
+        """
+        Discard the string IV curves, so they're calculated again on next
+        access. Modules that were replaced or recalculated are found then.
+        """
+        for name in STRING_CURVES:
+            self.__dict__.pop(name, None)
+
+    def _recalc(self, dirty=None):
+        """
+        Calculate the string IV curves now, or on first access in lazy mode.
+
+        :param dirty: indices of modules that changed, ``None`` checks all of
+            the modules
+        """
+        if self.pvconst.lazy:
+            self.invalidate()
+        else:
+            self.Istring, self.Vstring, self.Pstring = self.calcString(dirty)
+
+    def _update_mods(self, dirty=None):
+        """
+        Update the cached curves and totals of modules that changed since the
+        last update. Modules are dirty if they were replaced or recalculated,
+        *IE*: their IV curves aren't the same objects as the cached ones. The
+        cached arrays are never changed in place because copies of the string
+        share them.
+
+        :param dirty: indices of modules that changed, ``None`` checks all of
+            the modules
+        """
+        pvmods = self.pvmods
+        curves = self._mod_curves
+        if curves is None or len(curves) != len(pvmods):
+            # calculate all modules
+            npts = pvmods[0].Imod.size
+            curves = [None] * len(pvmods)
+            self._Imod = np.empty((len(pvmods), npts), self.pvconst.dtype)
+            self._Vmod = np.empty((len(pvmods), npts), self.pvconst.dtype)
+            self._Isc_mod = np.empty(len(pvmods))
+            self._Voc_mod = np.empty(len(pvmods))
+            self._suns_mod = np.empty(len(pvmods))
+            dirty = range(len(pvmods))
+        else:
+            if dirty is None:
+                dirty = [
+                    mod_id for mod_id, pvmod in enumerate(pvmods)
+                    if curves[mod_id][0] is not pvmod.Imod
+                    or curves[mod_id][1] is not pvmod.Vmod
+                ]
+            if not dirty:
+                return
+            curves = list(curves)
+            self._Imod = self._Imod.copy()
+            self._Vmod = self._Vmod.copy()
+            self._Isc_mod = self._Isc_mod.copy()
+            self._Voc_mod = self._Voc_mod.copy()
+            self._suns_mod = self._suns_mod.copy()
+        for mod_id in dirty:
+            pvmod = pvmods[mod_id]
+            curves[mod_id] = (pvmod.Imod, pvmod.Vmod)
+            self._Imod[mod_id] = pvmod.Imod.flat
+            self._Vmod[mod_id] = pvmod.Vmod.flat
+            self._Isc_mod[mod_id] = pvmod.Isc.mean()
+            self._Voc_mod[mod_id] = pvmod.Voc.sum()
+            self._suns_mod[mod_id] = pvmod.Ee.sum() * pvmod.cellArea
+        for cached in (self._Imod, self._Vmod, self._Isc_mod, self._Voc_mod,
+                       self._suns_mod):
+            cached.flags.writeable = False
+        self._mod_curves = curves
+
     @property
     def Imod(self):
-        return np.array([mod.Imod.flatten() for mod in self.pvmods])
+        """
+        Module currents [A], shape ``(numberMods, points)``. The array is
+        cached and read-only, so copy it to change it.
+        """
+        self._update_mods()
+        return self._Imod
 
     @property
     def Vmod(self):
-        return np.array([mod.Vmod.flatten() for mod in self.pvmods])
+        """
+        Module voltages [V], shape ``(numberMods, points)``. The array is
+        cached and read-only, so copy it to change it.
+        """
+        self._update_mods()
+        return self._Vmod
 
     @property
     def Voc_mod(self):
-        return np.array([mod.Voc.sum() for mod in self.pvmods])
+        """Open circuit voltage of each module [V], cached and read-only."""
+        self._update_mods()
+        return self._Voc_mod
 
-    def calcString(self):
+    @property
+    def totalSuns(self):
+        """
+        Total irradiance times cell area of all cells in string
+        [suns * cm^2].
         """
-        Calculate string I-V curves.
+        self._update_mods()
+        return self._suns_mod.sum()
+
+    def calcString(self, dirty=None):
+        """
+        Calculate string I-V curves. Only the modules that changed since the
+        last calculation are updated.
+
+        :param dirty: indices of modules that changed, ``None`` checks all of
+            the modules
         Returns (Istring, Vstring, Pstring) : tuple of numpy.ndarray of float
         """
+        self._update_mods(dirty)
         # Imod is already set to the range from Vrbd to the minimum current
-        meanIsc = np.mean([pvmod.Isc.mean() for pvmod in self.pvmods])
-        Istring, Vstring = self.pvconst.calcSeries(self.Imod, self.Vmod,
-                                                   meanIsc, self.Imod.max())
+        meanIsc = np.mean(self._Isc_mod)
+        Istring, Vstring = self.pvconst.calcSeries(self._Imod, self._Vmod,
+                                                   meanIsc, self._Imod.max())
         Pstring = Istring * Vstring
         return Istring, Vstring, Pstring
 
@@ -102,49 +274,7 @@ class PVstring(object):
             #   71 to 0.45 suns and module 72 to 0.35 suns.
 
         """
-        if np.isscalar(Ee):
-            new_pvmods = range(self.numberMods)  # new list of modules
-            old_pvmods = dict.fromkeys(self.pvmods)  # same as set(pvmods)
-            for mod_id, pvmod in enumerate(self.pvmods):
-                if old_pvmods[pvmod] is None:
-                    new_pvmods[mod_id] = copy(pvmod)
-                    old_pvmods[pvmod] = new_pvmods[mod_id]
-                else:
-                    new_pvmods[mod_id] = old_pvmods[pvmod]
-            self.pvmods = new_pvmods
-            for pvmod in iter(self.pvmods):
-                pvmod.setSuns(Ee)
-        else:
-            self.pvmods = copy(self.pvmods)  # copy list first
-            try:
-                for pvmod, cell_Ee in iteritems(Ee):
-                    pvmod = int(pvmod)
-                    self.pvmods[pvmod] = copy(self.pvmods[pvmod])
-                    if hasattr(cell_Ee, 'keys'):
-                        self.pvmods[pvmod].setSuns(**cell_Ee)
-                    else:
-                        try:
-                            self.pvmods[pvmod].setSuns(*cell_Ee)
-                        except TypeError:
-                            self.pvmods[pvmod].setSuns(cell_Ee)
-            except AttributeError:
-                # Ee was a list? just take first item in list
-                if len(Ee) > 1:
-                    raise TypeError('Irradiance, Ee, should be scalar or dict')
-                Ee = Ee[0]
-                new_pvmods = range(self.numberMods)  # new list of modules
-                old_pvmods = dict.fromkeys(self.pvmods)  # same as set(pvmods)
-                for mod_id, pvmod in enumerate(self.pvmods):
-                    if old_pvmods[pvmod] is None:
-                        new_pvmods[mod_id] = copy(pvmod)
-                        old_pvmods[pvmod] = new_pvmods[mod_id]
-                    else:
-                        new_pvmods[mod_id] = old_pvmods[pvmod]
-                self.pvmods = new_pvmods
-                for pvmod in iter(self.pvmods):
-                    pvmod.setSuns(Ee)
-        # update modules
-        self.Istring, self.Vstring, self.Pstring = self.calcString()
+        self.setConditions(Ee=Ee)
 
     def setTemps(self, Tc):
         """
@@ -165,55 +295,84 @@ class PVstring(object):
             Tc={12: 348.15}  # set module with index 12 to 348.15K (75°C)
 
         """
-        if np.isscalar(Tc):
-            new_pvmods = range(self.numberMods)  # new list of modules
-            old_pvmods = dict.fromkeys(self.pvmods)  # same as set(pvmods)
-            for mod_id, pvmod in enumerate(self.pvmods):
-                if old_pvmods[pvmod] is None:
-                    new_pvmods[mod_id] = copy(pvmod)
-                    old_pvmods[pvmod] = new_pvmods[mod_id]
-                else:
-                    new_pvmods[mod_id] = old_pvmods[pvmod]
-            self.pvmods = new_pvmods
-            for pvmod in iter(self.pvmods):
-                pvmod.setTemps(Tc)
-        else:
-            self.pvmods = copy(self.pvmods)  # copy list first
-            try:
-                for pvmod, cell_Tc in iteritems(Tc):
-                    pvmod = int(pvmod)
-                    self.pvmods[pvmod] = copy(self.pvmods[pvmod])
-                    if hasattr(cell_Tc, 'keys'):
-                        self.pvmods[pvmod].setTemps(**cell_Tc)
-                    else:
-                        try:
-                            self.pvmods[pvmod].setTemps(*cell_Tc)
-                        except TypeError:
-                            self.pvmods[pvmod].setTemps(cell_Tc)
-            except AttributeError:
-                # Tc was a list? just take first item in list
-                if len(Tc) > 1:
-                    raise TypeError('Irradiance, Ee, should be scalar or dict')
-                Tc = Tc[0]
-                new_pvmods = range(self.numberMods)  # new list of modules
-                old_pvmods = dict.fromkeys(self.pvmods)  # same as set(pvmods)
-                for mod_id, pvmod in enumerate(self.pvmods):
-                    if old_pvmods[pvmod] is None:
-                        new_pvmods[mod_id] = copy(pvmod)
-                        old_pvmods[pvmod] = new_pvmods[mod_id]
-                    else:
-                        new_pvmods[mod_id] = old_pvmods[pvmod]
-                self.pvmods = new_pvmods
-                for pvmod in iter(self.pvmods):
-                    pvmod.setTemps(Tc)
+        self.setConditions(Tc=Tc)
+
+    def setConditions(self, Ee=None, Tc=None, **cell_params):
+        """
+        Set irradiance, temperature and any other cell parameters on cells in
+        modules of string in system, then recalculate once. Each argument is
+        addressed the same as in :meth:`setSuns`, *EG*: it can be a scalar
+        for all modules in the string or a dictionary of modules, and the
+        module values are passed to
+        :meth:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.setConditions()`.
+        A module dictionary can set several parameters on the same cells.
+
+        :param Ee: irradiance [suns]
+        :type Ee: dict or float
+        :param Tc: temperature [K]
+        :type Tc: dict or float
+        :param cell_params: other cell parameters
+
+        For Example::
+
+            Ee={0: {'cells': (1, 2, 3), 'Ee': 0.5, 'Tc': 323.15}}
+            Tc={0: {'cells': (4, 5), 'Tc': 348.15}, 1: 318.15}
+            # set cells 1, 2 and 3 of module 0 to 0.5 suns and 323.15K, cells
+            # 4 and 5 of module 0 to 348.15K and module 1 to 318.15K
+
+        """
+        cell_params['Ee'] = Ee
+        cell_params['Tc'] = Tc
+        # conditions of each module as a list of (name, cells, value)
+        mod_conditions = [[] for _ in range(self.numberMods)]
+        for name, value in iteritems(cell_params):
+            if value is None:
+                continue
+            if not hasattr(value, 'keys'):
+                if isinstance(value, (list, tuple)):
+                    # value was a list? just take first item in list
+                    if len(value) > 1:
+                        raise TypeError(
+                            '%s should be scalar or dict' % name
+                        )
+                    value = value[0]
+                condition = (name, None, value)  # same object for all
+                for conditions in mod_conditions:
+                    conditions.append(condition)
+                continue
+            for pvmod, cell_value in iteritems(value):
+                mod_conditions[int(pvmod)].extend(
+                    parse_conditions(name, cell_value)
+                )
+        new_pvmods = list(self.pvmods)  # copy list first
+        # modules that were the same and get the same conditions are copied
+        # once and stay the same
+        copied_pvmods = {}
+        dirty = []
+        for mod_id, conditions in enumerate(mod_conditions):
+            if not conditions:
+                continue
+            dirty.append(mod_id)
+            pvmod = self.pvmods[mod_id]
+            key = (pvmod,) + tuple(
+                (name, id(cells), id(value)) for name, cells, value in conditions
+            )
+            new_pvmod = copied_pvmods.get(key)
+            if new_pvmod is None:
+                new_pvmod = copy(pvmod)
+                set_module_conditions(new_pvmod, conditions)
+                copied_pvmods[key] = new_pvmod
+            new_pvmods[mod_id] = new_pvmod
+        self.pvmods = new_pvmods
         # update modules
-        self.Istring, self.Vstring, self.Pstring = self.calcString()
+        self._recalc(dirty)
 
     def plotStr(self):
         """
         Plot string I-V curves.
         Returns strPlot : matplotlib.pyplot figure
         """
+        from matplotlib import pyplot as plt  # only import to plot
         strPlot = plt.figure()
         ax = plt.subplot(2, 1, 1)
         plt.plot(self.Vstring, self.Istring)
@@ -1,237 +1,976 @@
-# -*- coding: utf-8 -*-
-"""
-This module contains the :class:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem`
-class.
-"""
-
-from __future__ import absolute_import
-from past.builtins import basestring
-from future.utils import iteritems
-import numpy as np
-from copy import copy
-from matplotlib import pyplot as plt
-# use absolute imports instead of relative, so modules are portable
-from pvmismatch.pvmismatch_lib.pvconstants import PVconstants, NUMBERMODS, \
-    NUMBERSTRS
-from pvmismatch.pvmismatch_lib.pvstring import PVstring
-
-
-class PVsystem(object):
-    """
-    A class for PV systems.
-
-    :param pvconst: configuration constants object
-    :type pvconst: :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`
-    :param numberStrs: number of strings
-    :param pvstrs: list of parallel strings, a ``PVstring`` object or None
-    :param numberMods: number of modules per string
-    :param pvmods: list of modules, a ``PVmodule`` object or None
-    """
-    def __init__(self, pvconst=None, numberStrs=NUMBERSTRS,
-                 pvstrs=None, numberMods=NUMBERMODS, pvmods=None):
-        # is pvstrs a list?
-        try:
-            pvstr0 = pvstrs[0]
-        except TypeError:
-            # is pvstrs a PVstring object?
-            try:
-                pvconst = pvstrs.pvconst
-            except AttributeError:
-                # try to use the pvconst arg or create one if none
-                if not pvconst:
-                    pvconst = PVconstants()
-                # create a pvstring
-                pvstrs = PVstring(numberMods=numberMods, pvmods=pvmods,
-                                  pvconst=pvconst)
-            # expand pvstrs to list
-            pvstrs = [pvstrs] * numberStrs
-            numberMods = [numberMods] * numberStrs
-        else:
-            pvconst = pvstr0.pvconst
-            numberStrs = len(pvstrs)
-            numberMods = []
-            for p in pvstrs:
-                if p.pvconst is not pvconst:
-                    raise Exception('pvconst must be the same for all strings')
-                numberMods.append(len(p.pvmods))
-        self.pvconst = pvconst  #: ``PVconstants`` used in ``PVsystem``
-        self.numberStrs = numberStrs  #: number strings in the system
-        self.numberMods = numberMods  #: list of number of modules per string
-        self.pvstrs = pvstrs  #: list of ``PVstring`` in system
-        # calculate pvsystem
-        self.update()
-
-    def update(self):
-        """Update system calculations."""
-        self.Isys, self.Vsys, self.Psys = self.calcSystem()
-        (self.Imp, self.Vmp, self.Pmp,
-         self.Isc, self.Voc, self.FF, self.eff) = self.calcMPP_IscVocFFeff()
-
-    # TODO: use __getattr__ to check for updates to pvcells
-
-    @property
-    def pvmods(self):
-        return [pvstr.pvmods for pvstr in self.pvstrs]
-
-    @property
-    def Istring(self):
-        return np.asarray([pvstr.Istring.flatten() for pvstr in self.pvstrs])
-
-    @property
-    def Vstring(self):
-        return np.asarray([pvstr.Vstring.flatten() for pvstr in self.pvstrs])
-
-    @property
-    def Voc_str(self):
-        return np.asarray([pvstr.Voc_mod.sum() for pvstr in self.pvstrs])
-
-    def calcSystem(self):
-        """
-        Calculate system I-V curves.
-        Returns (Isys, Vsys, Psys) : tuple of numpy.ndarray of float
-        """
-        Isys, Vsys = self.pvconst.calcParallel(
-            self.Istring, self.Vstring, self.Voc_str.max(), self.Vstring.min()
-        )
-        Psys = Isys * Vsys
-        return Isys, Vsys, Psys
-
-    def calcMPP_IscVocFFeff(self):
-        mpp = np.argmax(self.Psys)
-        P = self.Psys[mpp - 1:mpp + 2]
-        V = self.Vsys[mpp - 1:mpp + 2]
-        I = self.Isys[mpp - 1:mpp + 2]
-        # calculate derivative dP/dV using central difference
-        dP = np.diff(P, axis=0)  # size is (2, 1)
-        dV = np.diff(V, axis=0)  # size is (2, 1)
-        Pv = dP / dV  # size is (2, 1)
-        # dP/dV is central difference at midpoints,
-        Vmid = (V[1:] + V[:-1]) / 2.0  # size is (2, 1)
-        Imid = (I[1:] + I[:-1]) / 2.0  # size is (2, 1)
-        # interpolate to find Vmp
-        Vmp = (-Pv[0] * np.diff(Vmid, axis=0) / np.diff(Pv, axis=0) + Vmid[0]).item()
-        Imp = (-Pv[0] * np.diff(Imid, axis=0) / np.diff(Pv, axis=0) + Imid[0]).item()
-        # calculate max power at Pv = 0
-        Pmp = Imp * Vmp
-        # calculate Voc, current must be increasing so flipup()
-        Voc = np.interp(np.float64(0), np.flipud(self.Isys),
-                        np.flipud(self.Vsys))
-        Isc = np.interp(np.float64(0), self.Vsys, self.Isys)  # calculate Isc
-        FF = Pmp / Isc / Voc
-        totalSuns = sum(
-            [pvmod.Ee.sum() * pvmod.cellArea for pvstr in self.pvmods
-             for pvmod in pvstr]
-        )
-        # convert cellArea from cm^2 to m^2
-        Psun = self.pvconst.E0 * totalSuns / 100 / 100
-        eff = Pmp / Psun
-        return Imp, Vmp, Pmp, Isc, Voc, FF, eff
-
-    def setSuns(self, Ee):
-        """
-        Set irradiance on cells in modules of string in system.
-        If Ee is ...
-        ... scalar, then sets the entire system to that irradiance.
-        ... a dictionary, then each key refers to a pv-string in the system,
-        and the corresponding value is either a dictionary or a scalar.
-        If the dictionary's value is another dictionary, then its keys are pv-
-        modules and its values are either cells and corresponding Ee, cells and
-        a scalar Ee, a scalar Ee value for all cells or an array of Ee values
-        for all cells in the module. The values of pv-modules are passed to
-        :meth:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.setSuns()`
-
-        :param Ee: irradiance [suns]
-        :type Ee: dict, float
-
-        For Example::
-
-            Ee={0: {0: {'cells': (0, 1, 2), 'Ee': (0.9, 0.3, 0.5)}}}
-            Ee=0.91  # set all modules in all strings to 0.91 suns
-            Ee={12: 0.77}  # set all modules in string with index 12 to 0.77 suns
-            Ee={3: {8: 0.23, 7: 0.45}}
-            # set module with index 8 to 0.23 suns and module with index 7 to
-            # 0.45 suns in string with index 3
-
-        """
-        if np.isscalar(Ee):
-            for pvstr in self.pvstrs:
-                pvstr.setSuns(Ee)
-        else:
-            for pvstr, pvmod_Ee in iteritems(Ee):
-                pvstr = int(pvstr)
-                self.pvstrs[pvstr] = copy(self.pvstrs[pvstr])
-                self.pvstrs[pvstr].setSuns(pvmod_Ee)
-        # calculate pvsystem
-        self.update()
-
-    def setTemps(self, Tc):
-        """
-        Set temperature on cells in modules of string in system.
-        If Tc is ...
-        ... scalar, then sets the entire system to that cell temperature.
-        ... a dictionary, then each key refers to a pv-string in the system,
-        and the corresponding value is either a dictionary or a scalar.
-        If the dictionary's value is another dictionary, then its keys are pv-
-        modules and its values are either cells and corresponding Tc, cells and
-        a scalar Tc, a scalar Tc value for all cells or an array of Tc values
-        for all cells in the module. The values of pv-modules are passed to
-        :meth:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.setTemps()`
-
-        :param Tc: temperature [K]
-        :type Tc: dict, float
-
-        For Example::
-
-            Tc={0: {0: {'cells': (1,2,3), 'Tc': (323.15, 348.15, 373.15)}}}
-            Tc=323.15  # set all modules in all strings to 323.15K (50°C)
-            Tc={12: 348.15}  # set all modules in string with index 12 to 348.15K (75°C)
-            Tc={3: {8: 333.15, 7: 373.15}}
-            # set module with index 8 to 333.15K (60°C) and module with index 7 to
-            # 373.15K (100°C) in string with index 3
-
-        """
-        if np.isscalar(Tc):
-            for pvstr in self.pvstrs:
-                pvstr.setTemps(Tc)
-        else:
-            for pvstr, pvmod_Tc in iteritems(Tc):
-                pvstr = int(pvstr)
-                self.pvstrs[pvstr] = copy(self.pvstrs[pvstr])
-                self.pvstrs[pvstr].setTemps(pvmod_Tc)
-        # calculate pvsystem
-        self.update()
-
-    def plotSys(self, sysPlot=None, fmt=''):
-        """
-        Plot system I-V curves.
-
-        :param sysPlot: integer, string, or existing figure
-        :returns: new figure
-        """
-        # create new figure if sysPlot or make the specified sysPlot current
-        # and clear it
-        try:
-            sysPlot.clear()
-        except (AttributeError, SyntaxError):
-            sysPlot = plt.figure(sysPlot)
-        ax = plt.subplot(2, 1, 1)
-        plt.plot(self.Vsys, self.Isys, fmt)
-        plt.xlim(0, self.Voc * 1.1)
-        plt.ylim(0, self.Isc * 1.1)
-        plt.axvline(self.Vmp, color='r', linestyle=':')
-        plt.axhline(self.Imp, color='r', linestyle=':')
-        plt.title('System I-V Characteristics')
-        plt.ylabel('System Current, I [A]')
-        plt.grid()
-        plt.subplot(2, 1, 2, sharex=ax)
-        plt.plot(self.Vsys, self.Psys / 1000, fmt)
-        plt.xlim(0, self.Voc * 1.1)
-        plt.ylim(0, self.Pmp * 1.1 / 1000)
-        plt.axvline(self.Vmp, color='r', linestyle=':')
-        plt.axhline(self.Pmp / 1000, color='r', linestyle=':')
-        plt.title('System P-V Characteristics')
-        plt.xlabel('System Voltage, V [V]')
-        plt.ylabel('System Power, P [kW]')
-        plt.grid()
-        plt.tight_layout()
-        return sysPlot
+# -*- coding: utf-8 -*-
+"""
+This module contains the :class:`~pvmismatch.pvmismatch_lib.pvsystem.PVsystem`
+class.
+"""
+
+from __future__ import absolute_import
+from past.builtins import basestring
+from future.utils import iteritems, itervalues
+import numpy as np
+from copy import copy
+from multiprocessing import Pool, cpu_count
+import pickle
+# use absolute imports instead of relative, so modules are portable
+from pvmismatch.pvmismatch_lib.pvconstants import PVconstants, NUMBERMODS, \
+    NUMBERSTRS, LRUCache, npinterpx_batch
+from pvmismatch.pvmismatch_lib.pvstring import PVstring
+from pvmismatch.pvmismatch_lib.pvmodule import (
+    PVmodule, calc_modules, calc_operating_points, OPERATING_POINTS
+)
+from pvmismatch.pvmismatch_lib.pvcell import (
+    PVcellArray, DIODE_PARAMS, calc_cells
+)
+
+#: attributes set by :meth:`PVsystem.update`
+SYSTEM_RESULTS = ('Isys', 'Vsys', 'Psys', 'Imp', 'Vmp', 'Pmp', 'Isc', 'Voc',
+                  'FF', 'eff')
+SIMULATE_RESULTS = ('Pmp', 'Vmp', 'Imp', 'Isc', 'Voc', 'FF')
+_TEMPLATE = None  # system template unpickled in each worker process
+_CACHES = None  # cells, modules and strings reused by each worker process
+ARRAY_CHUNKSIZE = 32  # max number of modules calculated at once by arrays
+
+
+def _init_simulate_worker(template):
+    """
+    Unpickle the system template once in each worker process.
+
+    :param template: pickled :class:`PVsystem`
+    """
+    global _TEMPLATE, _CACHES
+    _TEMPLATE = pickle.loads(template)
+    _CACHES = LRUCache(), LRUCache(), LRUCache()
+
+
+def _simulate_chunk(series):
+    """
+    Simulate a chunk of timesteps with the worker's system template. The
+    template isn't changed, so cells, modules and strings of previous chunks
+    are reused.
+
+    :param series: irradiance and temperature of the chunk
+    :return: results of :meth:`PVsystem.simulate`
+    """
+    Ee_series, Tc_series = series
+    pvsys = copy(_TEMPLATE)
+    Ee_series = pvsys._broadcast_series(Ee_series, 'Ee_series')
+    if Tc_series is not None:
+        Tc_series = pvsys._broadcast_series(Tc_series, 'Tc_series')
+    return pvsys._simulate(Ee_series, Tc_series, _CACHES)
+
+
+def calc_mpp(Isys, Vsys, Psys, Istring=None, Vstring=None):
+    """
+    Calculate the max power point, short circuit current, open circuit voltage
+    and fill factor of an IV curve.
+
+    The max power point is the largest power in ``Psys``. If the string IV
+    curves are also given, then the system current between the neighbors of
+    the largest power is recalculated at every string IV point instead of only
+    at the system voltages, which keeps ``Pmp`` accurate with fewer points.
+    Current is linear between IV points, so in practice the max power is at
+    one of the IV points, and the system curve alone can't refine it.
+
+    :param Isys: currents [A]
+    :param Vsys: voltages [V]
+    :param Psys: powers [W]
+    :param Istring: (``None``) string currents [A], shape
+        ``(strings, points)``
+    :param Vstring: (``None``) string voltages [V], same shape as ``Istring``
+    :return: ``Imp``, ``Vmp``, ``Pmp``, ``Isc``, ``Voc`` and ``FF``
+    """
+    mpp = np.argmax(Psys)
+    bracket = slice(max(mpp - 1, 0), mpp + 2)
+    # refine with float64 even if the curves are float32
+    V = np.asarray(Vsys[bracket], dtype=np.float64)
+    I = np.asarray(Isys[bracket], dtype=np.float64)
+    if Istring is not None:
+        Vstring = np.asarray(Vstring)
+        inside = (Vstring > V[0]) & (Vstring < V[-1])
+        V = np.union1d(V, Vstring[inside])
+        I = npinterpx_batch(V, Vstring, Istring).sum(axis=0)
+    mpp = np.argmax(I * V)
+    Imp, Vmp = I[mpp].item(), V[mpp].item()
+    # calculate max power
+    Pmp = Imp * Vmp
+    # calculate Voc, current must be increasing so flipup()
+    Voc = np.interp(np.float64(0), np.flipud(Isys), np.flipud(Vsys))
+    Isc = np.interp(np.float64(0), Vsys, Isys)  # calculate Isc
+    FF = Pmp / Isc / Voc
+    return Imp, Vmp, Pmp, Isc, Voc, FF
+
+
+class PVsystem(object):
+    """
+    A class for PV systems.
+
+    :param pvconst: configuration constants object
+    :type pvconst: :class:`~pvmismatch.pvmismatch_lib.pvconstants.PVconstants`
+    :param numberStrs: number of strings
+    :param pvstrs: list of parallel strings, a ``PVstring`` object or None
+    :param numberMods: number of modules per string
+    :param pvmods: list of modules, a ``PVmodule`` object or None
+    """
+    def __init__(self, pvconst=None, numberStrs=NUMBERSTRS,
+                 pvstrs=None, numberMods=NUMBERMODS, pvmods=None):
+        # is pvstrs a list?
+        try:
+            pvstr0 = pvstrs[0]
+        except TypeError:
+            # is pvstrs a PVstring object?
+            try:
+                pvconst = pvstrs.pvconst
+            except AttributeError:
+                # try to use the pvconst arg or create one if none
+                if not pvconst:
+                    pvconst = PVconstants()
+                # create a pvstring
+                pvstrs = PVstring(numberMods=numberMods, pvmods=pvmods,
+                                  pvconst=pvconst)
+            # expand pvstrs to list
+            pvstrs = [pvstrs] * numberStrs
+            numberMods = [numberMods] * numberStrs
+        else:
+            pvconst = pvstr0.pvconst
+            numberStrs = len(pvstrs)
+            numberMods = []
+            for p in pvstrs:
+                if p.pvconst is not pvconst:
+                    raise Exception('pvconst must be the same for all strings')
+                numberMods.append(len(p.pvmods))
+        self.pvconst = pvconst  #: ``PVconstants`` used in ``PVsystem``
+        self.numberStrs = numberStrs  #: number strings in the system
+        self.numberMods = numberMods  #: list of number of modules per string
+        self.pvstrs = pvstrs  #: list of ``PVstring`` in system
+        self._str_curves = None  # cached string curves, see _update_strs()
+        self._Vlims = None  # voltage limits of cached system curve
+        self._sys_curves = None  # string curves of each cached system row
+        # calculate pvsystem
+        self.update()
+
+    def update(self, dirty=None):
+        """
+        Update system calculations. Only the strings that changed since the
+        last update are combined again. In lazy mode the results are only
+        invalidated and calculated on first access.
+
+        :param dirty: indices of strings that changed, ``None`` checks all of
+            the strings
+        """
+        if self.pvconst.lazy:
+            self.invalidate()
+        else:
+            self._update(dirty)
+
+    def _update(self, dirty=None):
+        """Calculate system results now, see :meth:`update`."""
+        self.Isys, self.Vsys, self.Psys = self.calcSystem(dirty)
+        (self.Imp, self.Vmp, self.Pmp,
+         self.Isc, self.Voc, self.FF, self.eff) = self.calcMPP_IscVocFFeff()
+
+    # TODO: use __getattr__ to check for updates to pvcells
+
+    def __getattr__(self, name):
+        # only called if attribute is missing, IE: results were invalidated
+        if name in SYSTEM_RESULTS:
+            self._update()
+            return self.__dict__[name]
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+        )
+
+    def invalidate(self):
+        """
+        Discard the system results, so they're calculated again on next
+        access. Strings that were replaced or recalculated are found then.
+        """
+        for name in SYSTEM_RESULTS:
+            self.__dict__.pop(name, None)
+
+    def _update_strs(self, dirty=None):
+        """
+        Update the cached curves and totals of strings that changed since the
+        last update. Strings are dirty if they were replaced or recalculated,
+        *IE*: their IV curves aren't the same objects as the cached ones, or
+        if they're in ``dirty``.
+
+        :param dirty: indices of strings that changed, strings that were
+            replaced are always found too
+        """
+        pvstrs = self.pvstrs
+        curves = self._str_curves
+        new_curves = [(pvstr.Istring, pvstr.Vstring) for pvstr in pvstrs]
+        npts = new_curves[0][0].size
+        if (curves is None or len(curves) != len(pvstrs)
+                or self._Istr.shape[1] != npts):
+            # calculate all strings
+            dtype = new_curves[0][0].dtype
+            self._Voc_str = np.empty(len(pvstrs))
+            self._Vmin_str = np.empty(len(pvstrs))
+            self._suns_str = np.empty(len(pvstrs))
+            self._Istr = np.empty((len(pvstrs), npts), dtype)
+            self._Vstr = np.empty((len(pvstrs), npts), dtype)
+            self._Vlims = None
+            dirty = range(len(pvstrs))
+        else:
+            dirty = set(dirty or ()).union(
+                str_id for str_id, (Istr, Vstr) in enumerate(curves)
+                if Istr is not new_curves[str_id][0]
+                or Vstr is not new_curves[str_id][1]
+            )
+            if not dirty:
+                return
+            self._Voc_str = self._Voc_str.copy()
+            self._Vmin_str = self._Vmin_str.copy()
+            self._suns_str = self._suns_str.copy()
+            self._Istr = self._Istr.copy()
+            self._Vstr = self._Vstr.copy()
+        for str_id in dirty:
+            pvstr = pvstrs[str_id]
+            self._Voc_str[str_id] = pvstr.Voc_mod.sum()
+            self._Vmin_str[str_id] = pvstr.Vstring.min()
+            self._suns_str[str_id] = pvstr.totalSuns
+            self._Istr[str_id] = pvstr.Istring.flat
+            self._Vstr[str_id] = pvstr.Vstring.flat
+        self._str_curves = new_curves
+
+    @property
+    def pvmods(self):
+        return [pvstr.pvmods for pvstr in self.pvstrs]
+
+    @property
+    def Istring(self):
+        self._update_strs()
+        return self._Istr.copy()
+
+    @property
+    def Vstring(self):
+        self._update_strs()
+        return self._Vstr.copy()
+
+    @property
+    def Voc_str(self):
+        self._update_strs()
+        return self._Voc_str.copy()
+
+    @property
+    def totalSuns(self):
+        """
+        Total irradiance times cell area of all cells in system
+        [suns * cm^2].
+        """
+        self._update_strs()
+        return self._suns_str.sum()
+
+    def calcSystem(self, dirty=None):
+        """
+        Calculate system I-V curves. The current of each string at the system
+        voltages is cached, so only the strings that changed since the last
+        calculation are combined again, unless the system voltage limits
+        changed.
+
+        :param dirty: indices of strings that changed, ``None`` checks all of
+            the strings
+        Returns (Isys, Vsys, Psys) : tuple of numpy.ndarray of float
+        """
+        self._update_strs(dirty)
+        curves = self._str_curves
+        Vlims = (self._Voc_str.max(), self._Vmin_str.min())
+        if Vlims != self._Vlims:
+            # system voltages changed so combine all strings again
+            dirty = range(len(self.pvstrs))
+            self._Isys_str = None
+            self._sys_curves = [None] * len(self.pvstrs)
+        else:
+            # each row of the system currents is stale if it wasn't combined
+            # from the current curves of its string
+            dirty = sorted(set(dirty or ()).union(
+                str_id for str_id, sys_curves in enumerate(self._sys_curves)
+                if sys_curves is None
+                or sys_curves[0] is not curves[str_id][0]
+                or sys_curves[1] is not curves[str_id][1]
+            ))
+            if dirty:
+                self._Isys_str = self._Isys_str.copy()
+                self._sys_curves = list(self._sys_curves)
+        # strings that are the same object are only combined once
+        same_strs = {}
+        for str_id in dirty:
+            same_strs.setdefault(id(self.pvstrs[str_id]), []).append(str_id)
+        if same_strs:
+            str_ids = [ids[0] for ids in same_strs.values()]
+            Istr, Vsys = self.pvconst.calcParallel(
+                self._Istr[str_ids, None], self._Vstr[str_ids, None], *Vlims,
+                shared_voltages=True
+            )
+            if self._Isys_str is None:
+                self._Isys_str = np.empty((len(self.pvstrs), Vsys.size),
+                                          Istr.dtype)
+                self._Vsys = Vsys
+                self._Vlims = Vlims
+            for ids, Ix in zip(same_strs.values(), Istr):
+                self._Isys_str[ids] = Ix
+                for str_id in ids:
+                    self._sys_curves[str_id] = curves[str_id]
+        # add up all parallel currents
+        Isys = self._Isys_str.sum(axis=0)
+        Vsys = self._Vsys
+        Psys = Isys * Vsys
+        return Isys, Vsys, Psys
+
+    def calcMPP_IscVocFFeff(self):
+        self._update_strs()
+        Imp, Vmp, Pmp, Isc, Voc, FF = calc_mpp(
+            self.Isys, self.Vsys, self.Psys, self._Istr, self._Vstr
+        )
+        totalSuns = self.totalSuns
+        # convert cellArea from cm^2 to m^2
+        Psun = self.pvconst.E0 * totalSuns / 100 / 100
+        eff = Pmp / Psun
+        return Imp, Vmp, Pmp, Isc, Voc, FF, eff
+
+    def operating_point(self, V=None):
+        """
+        Calculate the operating point of every string, module, substring and
+        cell at a system voltage. The current of each string is where the
+        voltages of its modules add up to the system voltage, then modules
+        with the same plan are combined in chunks by
+        :func:`~pvmismatch.pvmismatch_lib.pvmodule.calc_operating_points`.
+        If strings have different numbers of modules, or modules have
+        different numbers of substrings or cells, then the arrays are padded
+        with ``NaN`` and ``False``.
+
+        :param V: (``None``) system voltage [V], default is ``Vmp``
+        :return: dictionary of system voltage, ``V`` [V], string currents,
+            ``Istring`` [A], shape ``(strings,)``, module voltages, ``Vmod``
+            [V], shape ``(strings, modules)``, substring currents,
+            ``Isubstr`` [A], voltages, ``Vsubstr`` [V] and bypass diode
+            flags, ``bypassed``, shape ``(strings, modules, substrings)``,
+            and cell currents, ``Icell`` [A], voltages, ``Vcell`` [V] and
+            powers, ``Pcell`` [W], shape ``(strings, modules, cells)``
+        """
+        if V is None:
+            V = self.Vmp
+        # same strings and modules are only interpolated once
+        same_strs = {}
+        for str_id, pvstr in enumerate(self.pvstrs):
+            same_strs.setdefault(id(pvstr), []).append(str_id)
+        Istring = np.empty(self.numberStrs)
+        for str_ids in itervalues(same_strs):
+            same_mods = {}
+            for pvmod in self.pvstrs[str_ids[0]].pvmods:
+                same_mods.setdefault(id(pvmod), []).append(pvmod)
+            Imod = np.array([mods[0].Imod.ravel()[::-1]
+                             for mods in itervalues(same_mods)])
+            Vmod = np.array([mods[0].Vmod.ravel()[::-1]
+                             for mods in itervalues(same_mods)])
+            nmods = np.array([len(mods) for mods in itervalues(same_mods)])
+            # module voltages are linear between the currents of all of the
+            # modules, so their sum is exact at these currents
+            Igrid = np.unique(Imod)
+            Vstr = np.dot(nmods, npinterpx_batch(Igrid, Imod, Vmod))
+            Istring[str_ids] = npinterpx_batch(
+                np.full(1, V, dtype=np.float64), Vstr[None, ::-1],
+                Igrid[None, ::-1]
+            )[0, 0]
+        # modules with the same plan and curve sizes are combined together
+        groups = {}
+        for str_id, pvmods in enumerate(self.pvmods):
+            for mod_id, pvmod in enumerate(pvmods):
+                plan = pvmod.plan
+                key = (plan['topology'], plan['Vbypass_substr'].tobytes(),
+                       plan['Vbypass_module'], pvmod.Imod.size,
+                       pvmod.Icell.shape[-1])
+                groups.setdefault(key, []).append((str_id, mod_id, pvmod))
+        pvmods = [pvmod for mods in self.pvmods for pvmod in mods]
+        shape = (self.numberStrs, max(self.numberMods))
+        nsubstr = max(pvmod.numSubStr for pvmod in pvmods)
+        ncells = max(pvmod.numberCells for pvmod in pvmods)
+        op = {'V': V, 'Istring': Istring, 'Vmod': np.full(shape, np.nan),
+              'Isubstr': np.full(shape + (nsubstr,), np.nan),
+              'Vsubstr': np.full(shape + (nsubstr,), np.nan),
+              'bypassed': np.zeros(shape + (nsubstr,), dtype=bool),
+              'Icell': np.full(shape + (ncells,), np.nan),
+              'Vcell': np.full(shape + (ncells,), np.nan)}
+        for mods in itervalues(groups):
+            for start in range(0, len(mods), ARRAY_CHUNKSIZE):
+                str_ids, mod_ids, chunk = zip(
+                    *mods[start:start + ARRAY_CHUNKSIZE]
+                )
+                curves = [
+                    np.array([getattr(pvmod, name) for pvmod in chunk])
+                    for name in ('Isubstr', 'Vsubstr', 'Icell', 'Vcell')
+                ]
+                curves[:0] = [
+                    np.array([getattr(pvmod, name).ravel() for pvmod in chunk])
+                    for name in ('Imod', 'Vmod')
+                ]
+                curves += [
+                    np.array([getattr(pvmod, name).ravel() for pvmod in chunk])
+                    for name in ('Voc', 'VRBD')
+                ]
+                results = calc_operating_points(
+                    chunk[0].plan, Istring[list(str_ids)], *curves,
+                    pvconst=self.pvconst
+                )
+                for name, x in zip(OPERATING_POINTS, results):
+                    if x.ndim == 1:
+                        op[name][str_ids, mod_ids] = x
+                    else:
+                        op[name][str_ids, mod_ids, :x.shape[1]] = x
+        op['Pcell'] = op['Icell'] * op['Vcell']
+        return op
+
+    def bypass_reverse_bias(self, V=None):
+        """
+        Bypass diodes that are on and cells that are reverse biased at a
+        system voltage, see :meth:`operating_point`.
+
+        :param V: (``None``) system voltage [V], default is ``Vmp``
+        :return: bypass diode flags, shape ``(strings, modules, substrings)``,
+            and reverse biased cell flags, shape ``(strings, modules, cells)``
+        """
+        op = self.operating_point(V)
+        return op['bypassed'], op['Vcell'] < 0
+
+    def setSuns(self, Ee):
+        """
+        Set irradiance on cells in modules of string in system.
+        If Ee is ...
+        ... scalar, then sets the entire system to that irradiance.
+        ... a dictionary, then each key refers to a pv-string in the system,
+        and the corresponding value is either a dictionary or a scalar.
+        If the dictionary's value is another dictionary, then its keys are pv-
+        modules and its values are either cells and corresponding Ee, cells and
+        a scalar Ee, a scalar Ee value for all cells or an array of Ee values
+        for all cells in the module. The values of pv-modules are passed to
+        :meth:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.setSuns()`
+
+        A scalar changes the strings in place. A dictionary replaces the
+        strings that it sets with copies, see :meth:`setConditions`.
+
+        :param Ee: irradiance [suns]
+        :type Ee: dict, float
+
+        For Example::
+
+            Ee={0: {0: {'cells': (0, 1, 2), 'Ee': (0.9, 0.3, 0.5)}}}
+            Ee=0.91  # set all modules in all strings to 0.91 suns
+            Ee={12: 0.77}  # set all modules in string with index 12 to 0.77 suns
+            Ee={3: {8: 0.23, 7: 0.45}}
+            # set module with index 8 to 0.23 suns and module with index 7 to
+            # 0.45 suns in string with index 3
+
+        """
+        self.setConditions(Ee=Ee)
+
+    def setTemps(self, Tc):
+        """
+        Set temperature on cells in modules of string in system.
+        If Tc is ...
+        ... scalar, then sets the entire system to that cell temperature.
+        ... a dictionary, then each key refers to a pv-string in the system,
+        and the corresponding value is either a dictionary or a scalar.
+        If the dictionary's value is another dictionary, then its keys are pv-
+        modules and its values are either cells and corresponding Tc, cells and
+        a scalar Tc, a scalar Tc value for all cells or an array of Tc values
+        for all cells in the module. The values of pv-modules are passed to
+        :meth:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.setTemps()`
+
+        A scalar changes the strings in place. A dictionary replaces the
+        strings that it sets with copies, see :meth:`setConditions`.
+
+        :param Tc: temperature [K]
+        :type Tc: dict, float
+
+        For Example::
+
+            Tc={0: {0: {'cells': (1,2,3), 'Tc': (323.15, 348.15, 373.15)}}}
+            Tc=323.15  # set all modules in all strings to 323.15K (50°C)
+            Tc={12: 348.15}  # set all modules in string with index 12 to 348.15K (75°C)
+            Tc={3: {8: 333.15, 7: 373.15}}
+            # set module with index 8 to 333.15K (60°C) and module with index 7 to
+            # 373.15K (100°C) in string with index 3
+
+        """
+        self.setConditions(Tc=Tc)
+
+    def setConditions(self, Ee=None, Tc=None, **cell_params):
+        """
+        Set irradiance, temperature and any other cell parameters on cells in
+        modules of strings in system, then recalculate once. Each argument is
+        addressed the same as in :meth:`setSuns`, *EG*: it can be a scalar
+        for the entire system or a dictionary of strings, and the string
+        values are passed to
+        :meth:`~pvmismatch.pvmismatch_lib.pvstring.PVstring.setConditions()`.
+
+        If all of the arguments are scalars, then the strings are changed in
+        place. Otherwise the strings in the dictionaries are replaced by
+        copies, because strings can be shared by other strings in the system
+        or by other systems. References to the old strings, *EG*:
+        ``pvstr = pvsys.pvstrs[0]``, keep their previous state, so get the
+        strings from :attr:`pvstrs` again after setting them.
+
+        :param Ee: irradiance [suns]
+        :type Ee: dict, float
+        :param Tc: temperature [K]
+        :type Tc: dict, float
+        :param cell_params: other cell parameters
+
+        For Example::
+
+            Ee={0: {0: {'cells': (0, 1, 2), 'Ee': 0.5, 'Tc': 323.15}}}
+            Tc=318.15
+            # set cells 0, 1 and 2 of module 0 in string 0 to 0.5 suns and
+            # 323.15K and all other cells in the system to 318.15K
+
+        """
+        cell_params['Ee'] = Ee
+        cell_params['Tc'] = Tc
+        if not any(hasattr(v, 'keys') for v in itervalues(cell_params)):
+            # set the entire system in place, each string only once
+            conditions = dict((name, value) for name, value in
+                              iteritems(cell_params) if value is not None)
+            if conditions:
+                for pvstr in dict.fromkeys(self.pvstrs):
+                    pvstr.setConditions(**conditions)
+                self.update(range(self.numberStrs))
+            return
+        str_conditions = [{} for _ in range(self.numberStrs)]
+        for name, value in iteritems(cell_params):
+            if value is None:
+                continue
+            if not hasattr(value, 'keys'):
+                for conditions in str_conditions:
+                    conditions[name] = value
+                continue
+            for pvstr, pvmod_value in iteritems(value):
+                str_conditions[int(pvstr)][name] = pvmod_value
+        # strings that were the same and get the same conditions are copied
+        # once and stay the same
+        copied_pvstrs = {}
+        for str_id, conditions in enumerate(str_conditions):
+            if not conditions:
+                continue
+            pvstr = self.pvstrs[str_id]
+            key = (pvstr,) + tuple(sorted(
+                (name, id(value)) for name, value in iteritems(conditions)
+            ))
+            new_pvstr = copied_pvstrs.get(key)
+            if new_pvstr is None:
+                new_pvstr = copy(pvstr)
+                new_pvstr.setConditions(**conditions)
+                copied_pvstrs[key] = new_pvstr
+            self.pvstrs[str_id] = new_pvstr
+        # calculate pvsystem, only the strings that changed are combined again
+        self.update([str_id for str_id, conditions in enumerate(str_conditions)
+                     if conditions])
+
+    def _broadcast_series(self, series, name):
+        """
+        Broadcast a time series of irradiance or temperature to an array with
+        shape ``(T, numberStrs, numberMods, numberCells)``.
+        """
+        series = np.asarray(series, dtype=np.float64)
+        numberMods = set(self.numberMods)
+        numberCells = set(pvmod.numberCells for pvstr in self.pvstrs
+                          for pvmod in pvstr.pvmods)
+        if series.ndim < 1 or series.ndim > 4:
+            raise ValueError('%s must have 1 to 4 dimensions' % name)
+        if len(numberMods) > 1 or len(numberCells) > 1:
+            raise ValueError(
+                'All strings must have the same number of modules and all '
+                'modules must have the same number of cells to simulate.'
+            )
+        shape = (series.shape[0], self.numberStrs, numberMods.pop(),
+                 numberCells.pop())
+        series = series.reshape(series.shape + (1,) * (4 - series.ndim))
+        try:
+            return np.broadcast_to(series, shape)
+        except ValueError:
+            raise ValueError('%s with shape %r must broadcast to %r' %
+                             (name, series.shape, shape))
+
+    def simulate(self, Ee_series, Tc_series=None, processes=1,
+                 chunksize=None):
+        """
+        Simulate the system at each timestep in a time series of irradiance
+        and temperature. The first axis of ``Ee_series`` and ``Tc_series`` is
+        time and the remaining axes are strings, modules and cells, so the
+        shape is either ``(T,)`` for the entire system, ``(T, numberStrs)``
+        per string, ``(T, numberStrs, numberMods)`` per module or
+        ``(T, numberStrs, numberMods, numberCells)`` per cell.
+
+        The system's current strings, modules and cells are templates for each
+        timestep. Cells and modules are shared between timesteps in the same
+        state, and their IV curves are looked up in
+        :data:`~pvmismatch.pvmismatch_lib.pvcell.CELL_CACHE` and
+        :data:`~pvmismatch.pvmismatch_lib.pvmodule.MODULE_CACHE`, so only new
+        states are calculated. Timesteps without any irradiance return zeros.
+        After simulating, the system is left in the state of the last timestep
+        with irradiance.
+
+        If ``processes`` isn't one, then the timesteps are split into chunks
+        that are simulated by a pool of worker processes. The system is pickled
+        once and each worker unpickles its own copy to use as the template, so
+        only the chunks of irradiance and temperature are sent to the workers,
+        and the results are merged in order. Call this from the main module
+        guarded by ``if __name__ == '__main__':`` on platforms that spawn new
+        processes, *EG*: Windows and macOS. Each worker has to start and
+        calculate its own cell and module IV curves, because the caches
+        aren't shared between processes, so the pool only pays off for long
+        time series, *EG*: a year of hourly timesteps, on a machine with more
+        than one CPU. Otherwise it's slower than one process.
+
+        :param Ee_series: irradiance [suns]
+        :type Ee_series: :class:`numpy.ndarray`
+        :param Tc_series: cell temperature [K], ``None`` keeps the current cell
+            temperatures
+        :type Tc_series: :class:`numpy.ndarray`
+        :param processes: number of worker processes, ``None`` uses all CPUs
+        :type processes: int
+        :param chunksize: number of timesteps sent to a worker at a time,
+            ``None`` splits the timesteps into four chunks per worker, *IE*:
+            ``ceil(T / (4 * processes))``
+        :type chunksize: int
+        :return: ``Pmp``, ``Vmp``, ``Imp``, ``Isc``, ``Voc`` and ``FF`` arrays
+            with one value per timestep
+        :rtype: dict
+
+        For Example::
+
+            # hourly irradiance & temperature of each module for a year
+            Ee = np.random.rand(8760, pvsys.numberStrs, pvsys.numberMods[0])
+            Tc = 298.15 + 30. * Ee
+            results = pvsys.simulate(Ee, Tc)
+            energy = results['Pmp'].sum()  # [Wh]
+        """
+        Ee_compact, Tc_compact = Ee_series, Tc_series
+        Ee_series = self._broadcast_series(Ee_series, 'Ee_series')
+        if Tc_series is not None:
+            Tc_series = self._broadcast_series(Tc_series, 'Tc_series')
+            if Tc_series.shape[0] != Ee_series.shape[0]:
+                raise ValueError(
+                    'Ee_series and Tc_series must have the same timesteps'
+                )
+        if processes != 1:
+            # send workers the original arrays, not the broadcast ones
+            return self._simulate_pool(
+                np.asarray(Ee_compact, dtype=np.float64),
+                None if Tc_compact is None else
+                np.asarray(Tc_compact, dtype=np.float64),
+                processes, chunksize
+            )
+        return self._simulate(Ee_series, Tc_series)
+
+    def _simulate(self, Ee_series, Tc_series, caches=None):
+        """
+        Simulate timesteps in this process, see :meth:`simulate`.
+
+        :param Ee_series: irradiance [suns], shape
+            ``(T, numberStrs, numberMods, numberCells)``
+        :param Tc_series: cell temperature [K], same shape, or ``None``
+        :param caches: (``None``) caches of recent cells, modules and strings
+            to reuse, default is new caches
+        :return: results of :meth:`simulate`
+        """
+        results = dict((k, np.zeros(Ee_series.shape[0]))
+                       for k in SIMULATE_RESULTS)
+        # templates are the current state of the system
+        pvstrs = list(self.pvstrs)
+        # reuse recent cells, modules and strings in the same state
+        if caches is None:
+            caches = LRUCache(), LRUCache(), LRUCache()
+        pvcells, pvmods, strings = caches
+        for t, Ee in enumerate(Ee_series):
+            if not Ee.any():
+                continue  # no irradiance
+            Tc = None if Tc_series is None else Tc_series[t]
+            new_pvstrs = []
+            for str_idx, pvstr in enumerate(pvstrs):
+                new_pvmods, mod_keys = [], []
+                for mod_idx, pvmod in enumerate(pvstr.pvmods):
+                    mod_Ee = Ee[str_idx, mod_idx]
+                    mod_Tc = None if Tc is None else Tc[str_idx, mod_idx]
+                    key = (id(pvmod), mod_Ee.tobytes(),
+                           None if mod_Tc is None else mod_Tc.tobytes())
+                    new_pvmod = pvmods.get(key)
+                    if new_pvmod is None:
+                        new_pvmod = self._simulate_module(
+                            pvmod, mod_Ee, mod_Tc, pvcells
+                        )
+                        pvmods.put(key, new_pvmod)
+                    new_pvmods.append(new_pvmod)
+                    mod_keys.append(key)
+                key = (id(pvstr),) + tuple(mod_keys)
+                new_pvstr = strings.get(key)
+                if new_pvstr is None:
+                    new_pvstr = copy(pvstr)
+                    new_pvstr.pvmods = new_pvmods
+                    (new_pvstr.Istring, new_pvstr.Vstring,
+                     new_pvstr.Pstring) = new_pvstr.calcString()
+                    strings.put(key, new_pvstr)
+                new_pvstrs.append(new_pvstr)
+            self.pvstrs = new_pvstrs
+            self.update()
+            for k in results:
+                results[k][t] = getattr(self, k)
+        return results
+
+    def _simulate_pool(self, Ee_series, Tc_series, processes, chunksize):
+        """
+        Simulate chunks of timesteps in a pool of worker processes.
+
+        :param Ee_series: irradiance [suns]
+        :param Tc_series: cell temperature [K] or ``None``
+        :param processes: number of worker processes or ``None`` for all CPUs
+        :param chunksize: number of timesteps per chunk or ``None``
+        :return: results of :meth:`simulate`
+        """
+        if processes is None:
+            processes = cpu_count()
+        ntimes = Ee_series.shape[0]
+        if chunksize is None:
+            chunksize = max(1, -(-ntimes // (4 * processes)))  # ceiling
+        chunks = [
+            (Ee_series[t:t + chunksize],
+             None if Tc_series is None else Tc_series[t:t + chunksize])
+            for t in range(0, ntimes, chunksize)
+        ]
+        template = pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+        # don't start more workers than chunks
+        pool = Pool(min(processes, len(chunks)), _init_simulate_worker,
+                    (template,))
+        try:
+            # map returns results in the same order as the chunks
+            chunk_results = pool.map(_simulate_chunk, chunks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        results = dict((k, np.concatenate([r[k] for r in chunk_results]))
+                       for k in SIMULATE_RESULTS)
+        # leave system in the state of the last timestep with irradiance
+        lit = np.flatnonzero(Ee_series.reshape(ntimes, -1).any(axis=1))
+        if lit.size:
+            t = lit[-1]
+            self.simulate(Ee_series[t:t + 1],
+                          None if Tc_series is None else Tc_series[t:t + 1])
+        return results
+
+    @staticmethod
+    def _simulate_module(pvmod, Ee, Tc, pvcells):
+        """
+        Copy a module and set the irradiance and temperature of its cells.
+
+        :param pvmod: template module
+        :param Ee: irradiance of each cell [suns]
+        :param Tc: temperature of each cell [K] or ``None``
+        :param pvcells: cache of new cells by template cell and state
+        :return: new module
+        """
+        if Tc is None:
+            Tc = [pvc.Tcell for pvc in pvmod.pvcells]
+        new_pvcells, calc_pvcells = [], []
+        for pvc, cell_Ee, cell_Tc in zip(pvmod.pvcells, Ee, Tc):
+            key = (id(pvc), cell_Ee, cell_Tc)
+            new_pvc = pvcells.get(key)
+            if new_pvc is None:
+                # don't calculate until all cells are set
+                new_pvc = pvc._copy(Ee=cell_Ee, Tcell=cell_Tc)
+                pvcells.put(key, new_pvc)
+                calc_pvcells.append(new_pvc)
+            new_pvcells.append(new_pvc)
+        calc_cells(calc_pvcells)
+        new_pvmod = copy(pvmod)
+        new_pvmod.pvcells = new_pvcells
+        (new_pvmod.Imod, new_pvmod.Vmod, new_pvmod.Pmod, new_pvmod.Isubstr,
+         new_pvmod.Vsubstr) = new_pvmod.calcMod()
+        return new_pvmod
+
+    def plotSys(self, sysPlot=None, fmt=''):
+        """
+        Plot system I-V curves.
+
+        :param sysPlot: integer, string, or existing figure
+        :returns: new figure
+        """
+        from matplotlib import pyplot as plt  # only import to plot
+        # create new figure if sysPlot or make the specified sysPlot current
+        # and clear it
+        try:
+            sysPlot.clear()
+        except (AttributeError, SyntaxError):
+            sysPlot = plt.figure(sysPlot)
+        ax = plt.subplot(2, 1, 1)
+        plt.plot(self.Vsys, self.Isys, fmt)
+        plt.xlim(0, self.Voc * 1.1)
+        plt.ylim(0, self.Isc * 1.1)
+        plt.axvline(self.Vmp, color='r', linestyle=':')
+        plt.axhline(self.Imp, color='r', linestyle=':')
+        plt.title('System I-V Characteristics')
+        plt.ylabel('System Current, I [A]')
+        plt.grid()
+        plt.subplot(2, 1, 2, sharex=ax)
+        plt.plot(self.Vsys, self.Psys / 1000, fmt)
+        plt.xlim(0, self.Voc * 1.1)
+        plt.ylim(0, self.Pmp * 1.1 / 1000)
+        plt.axvline(self.Vmp, color='r', linestyle=':')
+        plt.axhline(self.Pmp / 1000, color='r', linestyle=':')
+        plt.title('System P-V Characteristics')
+        plt.xlabel('System Voltage, V [V]')
+        plt.ylabel('System Power, P [kW]')
+        plt.grid()
+        plt.tight_layout()
+        return sysPlot
+
+
+class PVsystemArray(object):
+    """
+    Array-native PV system for utility-scale arrays. Every string has the same
+    number of modules and every module is a copy of one template module, so
+    instead of cell, module and string objects the irradiance and temperature
+    of every cell are stored in arrays with shape
+    ``(numberStrs, numberMods, numberCells)``. The modules share the compiled
+    :attr:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule.plan` of the template
+    and are calculated together by
+    :func:`~pvmismatch.pvmismatch_lib.pvmodule.calc_modules` a chunk of
+    strings at a time, calculating identical cells and modules in a chunk
+    only once. Only the string IV curves are kept, so memory is proportional
+    to the size of the arrays. The results are the same as :class:`PVsystem`.
+
+    Change :attr:`Ee` or :attr:`Tc` in place, then call :meth:`update`.
+
+    :param pvmod: template module with the cell position pattern, bypass
+        diodes, cell area and the parameters of the cell in each position,
+        ``None`` uses a default module
+    :type pvmod: :class:`~pvmismatch.pvmismatch_lib.pvmodule.PVmodule`
+    :param numberStrs: number of strings
+    :param numberMods: number of modules per string
+    :param Ee: irradiance [suns], broadcast to
+        ``(numberStrs, numberMods, numberCells)``, ``None`` uses the
+        irradiance of the template cells
+    :param Tc: cell temperature [K], broadcast like ``Ee``, ``None`` uses the
+        temperature of the template cells
+    :param chunksize: max number of modules calculated at once
+    """
+    def __init__(self, pvmod=None, numberStrs=NUMBERSTRS,
+                 numberMods=NUMBERMODS, Ee=None, Tc=None,
+                 chunksize=ARRAY_CHUNKSIZE):
+        if pvmod is None:
+            pvmod = PVmodule()
+        self.pvmod = pvmod  #: template ``PVmodule``
+        self.pvconst = pvmod.pvconst  #: ``PVconstants`` used in system
+        self.numberStrs = numberStrs  #: number strings in the system
+        self.numberMods = numberMods  #: number of modules per string
+        self.numberCells = pvmod.numberCells  #: number of cells per module
+        self.chunksize = chunksize  #: max number of modules calculated at once
+        shape = (numberStrs, numberMods, self.numberCells)
+        self.Ee = np.empty(shape)  #: [suns] irradiance of each cell
+        self.Ee[...] = pvmod.Ee.ravel() if Ee is None else Ee
+        self.Tc = np.empty(shape)  #: [K] temperature of each cell
+        self.Tc[...] = pvmod.Tcell.ravel() if Tc is None else Tc
+        # parameters of the cell in each position of the template module
+        pvcells = PVcellArray.from_pvcells(pvmod.pvcells)
+        self._cell_params = np.column_stack(
+            [getattr(pvcells, k) for k in DIODE_PARAMS]
+        )
+        # positions with the same parameters share the same calculations
+        _, self._cell_pos, self._cell_groups = np.unique(
+            self._cell_params, axis=0, return_index=True, return_inverse=True
+        )
+        self._cell_groups = self._cell_groups.reshape(-1)
+        self.Istring = None  #: string currents [A]
+        self.Vstring = None  #: string voltages [V]
+        self.Voc_str = None  #: [V] sum of cell Voc of each string
+        self.update()
+
+    @property
+    def totalSuns(self):
+        """
+        Total irradiance times cell area of all cells in system
+        [suns * cm^2].
+        """
+        return self.Ee.sum() * self.pvmod.cellArea
+
+    def update(self, strings=None):
+        """
+        Calculate the system.
+
+        :param strings: indices of strings that changed, ``None`` calculates
+            all of the strings
+        """
+        if strings is None or self.Istring is None:
+            strings = np.arange(self.numberStrs)
+        strings = np.asarray(strings, dtype=int).ravel()
+        strs_per_chunk = max(1, self.chunksize // self.numberMods)
+        for start in range(0, strings.size, strs_per_chunk):
+            idx = strings[start:start + strs_per_chunk]
+            Istring, Vstring, Voc_str = self._calc_strings(
+                self.Ee[idx], self.Tc[idx]
+            )
+            if self.Istring is None:
+                npts = Istring.shape[-1]
+                self.Istring = np.empty((self.numberStrs, npts), Istring.dtype)
+                self.Vstring = np.empty((self.numberStrs, npts), Vstring.dtype)
+                self.Voc_str = np.empty(self.numberStrs)
+            self.Istring[idx] = Istring
+            self.Vstring[idx] = Vstring
+            self.Voc_str[idx] = Voc_str
+        self.Isys, self.Vsys = self.pvconst.calcParallel(
+            self.Istring, self.Vstring, self.Voc_str.max(),
+            self.Vstring.min()
+        )
+        self.Psys = self.Isys * self.Vsys
+        (self.Imp, self.Vmp, self.Pmp,
+         self.Isc, self.Voc, self.FF) = calc_mpp(self.Isys, self.Vsys,
+                                                 self.Psys, self.Istring,
+                                                 self.Vstring)
+        # convert cellArea from cm^2 to m^2
+        Psun = self.pvconst.E0 * self.totalSuns / 100 / 100
+        self.eff = self.Pmp / Psun
+
+    def _calc_strings(self, Ee, Tc):
+        """
+        Calculate a chunk of strings.
+
+        :param Ee: irradiance [suns], shape ``(strings, modules, cells)``
+        :param Tc: cell temperature [K], same shape as ``Ee``
+        :return: string currents [A] and voltages [V] and the sum of cell
+            Voc of each string [V]
+        """
+        nstrs, nmods, ncells = Ee.shape
+        # identical modules are only calculated once
+        states = np.concatenate([Ee, Tc], axis=-1).reshape(nstrs * nmods, -1)
+        states, mod_idx = np.unique(states, axis=0, return_inverse=True)
+        mod_idx = mod_idx.reshape(-1)
+        nuniq = states.shape[0]
+        # identical cells are only calculated once
+        cells = np.column_stack([
+            np.broadcast_to(self._cell_groups, (nuniq, ncells)).ravel(),
+            states[:, :ncells].ravel(), states[:, ncells:].ravel()
+        ])
+        cells, cell_idx = np.unique(cells, axis=0, return_inverse=True)
+        cell_idx = cell_idx.reshape(-1)
+        params = self._cell_params[self._cell_pos[cells[:, 0].astype(int)]]
+        pvcells = PVcellArray(
+            Ee=cells[:, 1], Tcell=cells[:, 2], pvconst=self.pvconst,
+            **dict(zip(DIODE_PARAMS, params.T))
+        )
+        Icell = pvcells.Icell[cell_idx].reshape(nuniq, ncells, -1)
+        Vcell = pvcells.Vcell[cell_idx].reshape(nuniq, ncells, -1)
+        Isc = pvcells.Isc[cell_idx].reshape(nuniq, ncells)
+        Voc = pvcells.Voc[cell_idx].reshape(nuniq, ncells)
+        VRBD = pvcells.VRBD[cell_idx].reshape(nuniq, ncells)
+        Imod, Vmod = calc_modules(
+            self.pvmod.plan, Icell, Vcell, Isc, Voc, VRBD, self.pvconst
+        )[:2]
+        # combine modules in series, same as PVstring.calcString()
+        Imod = Imod[mod_idx].reshape(nstrs, nmods, -1)
+        Vmod = Vmod[mod_idx].reshape(nstrs, nmods, -1)
+        Isc_mod = Isc.mean(axis=1)[mod_idx].reshape(nstrs, nmods)
+        Istring, Vstring = self.pvconst.calcSeries(
+            Imod, Vmod, Isc_mod.mean(axis=1), Imod.max(axis=(1, 2))
+        )
+        Voc_str = Voc.sum(axis=1)[mod_idx].reshape(nstrs, nmods).sum(axis=1)
+        return Istring, Vstring, Voc_str
+
@@ -8,8 +8,15 @@ from PIL import Image, ImageTk
 from Tkconstants import RIGHT, LEFT, BOTH, E, W, HORIZONTAL
 from Tkinter import Frame, Label, Button, Toplevel, OptionMenu, Scale, Entry, \
     Message, Spinbox, IntVar, StringVar, DoubleVar
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, \
-    NavigationToolbar2TkAgg
+# matplotlib is an optional requirement of PVMismatch, but the app needs it
+try:
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, \
+        NavigationToolbar2TkAgg
+except ImportError:
+    raise ImportError(
+        "matplotlib is required by the PVMismatch application, install it"
+        " with the plot extra: 'pip install pvmismatch[plot]'"
+    )
 from threading import Thread
 from tkFont import nametofont
 import Queue
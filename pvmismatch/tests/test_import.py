@@ -0,0 +1,65 @@
+"""
+Test importing the package.
+"""
+
+import subprocess
+import sys
+import pvmismatch
+
+IMPORT_BUDGET = 2.0  # [s] generous so slow CI machines don't fail
+
+
+def run_python(code):
+    """Run code in a new interpreter and return its output."""
+    return subprocess.check_output([sys.executable, '-c', code],
+                                   universal_newlines=True)
+
+
+def test_import_without_matplotlib():
+    """
+    Test that ``import pvmismatch`` doesn't import matplotlib, which is only
+    imported by the ``plot*`` methods.
+    """
+    out = run_python(
+        "import sys\n"
+        "import pvmismatch\n"
+        "pvsys = pvmismatch.PVsystem(numberStrs=1, numberMods=2)\n"
+        "print('matplotlib' in sys.modules)\n"
+    )
+    assert out.split() == ['False']
+
+
+def test_import_no_repo_scan_or_writes():
+    """
+    Test that ``import pvmismatch`` doesn't probe the Git repository with
+    dulwich or open any files for writing.
+    """
+    out = run_python(
+        "import sys\n"
+        "from six.moves import builtins\n"
+        "_open, writes = builtins.open, []\n"
+        "def open_(file, mode='r', *args, **kwargs):\n"
+        "    if any(m in mode for m in 'wax+'):\n"
+        "        writes.append(file)\n"
+        "    return _open(file, mode, *args, **kwargs)\n"
+        "builtins.open = open_\n"
+        "import pvmismatch\n"
+        "print('dulwich' in sys.modules)\n"
+        "print(len(writes))\n"
+        "print(pvmismatch.__version__)\n"
+    )
+    assert out.split()[:2] == ['False', '0']
+    assert out.split()[2] == pvmismatch.__version__
+
+
+def test_import_latency():
+    """
+    Test that ``import pvmismatch`` in a new interpreter is under the budget.
+    """
+    out = run_python(
+        "from timeit import default_timer\n"
+        "start = default_timer()\n"
+        "import pvmismatch\n"
+        "print(default_timer() - start)\n"
+    )
+    assert float(out) < IMPORT_BUDGET
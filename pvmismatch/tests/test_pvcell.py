@@ -3,10 +3,14 @@ Test pvcells.
 """
 
 from nose.tools import ok_
-from pvmismatch.pvmismatch_lib.pvcell import PVcell
+from pvmismatch.pvmismatch_lib.pvcell import (
+    PVcell, PVcellArray, CompactPVcell, CELL_CACHE, calc_cells
+)
+from pvmismatch.pvmismatch_lib.pvmodule import PVmodule
 from pvmismatch.pvmismatch_lib.pvconstants import PVconstants
 import numpy as np
 import os
+import pytest
 
 BASE_DIR = os.path.dirname(__file__)
 
@@ -42,6 +46,38 @@ def test_pvcell_calc_vcell():
     ok_(np.isclose(pvc.Vcell[183], pvc.calcVcell(pvc.Icell[183])))
 
 
+def test_pvcell_calc_icell_vcell_arrays():
+    """
+    Test vectorized cell solvers against the IV curve, for arrays of points
+    and batched across cells.
+    """
+    pvc = PVcell(Ee=0.8, Tcell=313)
+    # forward bias, reverse breakdown is negligible
+    idx = pvc.Vcell.flat > 0
+    v, i = pvc.Vcell.flat[idx], pvc.Icell.flat[idx]
+    icell = pvc.calcIcell(v)
+    ok_(icell.shape == v.shape)
+    ok_(np.allclose(icell, i, 1e-4, 1e-5))
+    ok_(np.allclose(pvc.calcVcell(i), v, 1e-4, 1e-4))
+    # residuals are zero even far from the IV curve
+    v = np.linspace(-20., 3., 50)
+    icell = pvc.calcIcell(v)
+    args = (pvc.Igen, pvc.Rs, pvc.Vt, pvc.Isat1, pvc.Isat2, pvc.Rsh)
+    ok_(np.allclose(pvc.f_Icell(icell, v, *args) / (1. + np.abs(icell)), 0))
+    ok_(np.allclose(pvc.calcVcell(icell), v))
+    # batched across cells
+    pvcells = [PVcell(Ee=ee) for ee in (0.1, 0.5, 1.0)]
+    pvcell_array = PVcellArray.from_pvcells(pvcells)
+    vcells = np.array([[0.5, 0.6], [0.55, 0.65], [-1., 0.7]])
+    icells = pvcell_array.calcIcell(vcells)
+    ok_(icells.shape == (3, 2))
+    for pvc, vcell, icell in zip(pvcells, vcells, icells):
+        ok_(np.allclose(pvc.calcIcell(vcell), icell))
+    ok_(np.allclose(pvcell_array.calcVcell(icells), vcells))
+    icell = pvcell_array.calcIcell(0.6)
+    ok_(np.allclose(icell, [pvc.calcIcell(0.6) for pvc in pvcells]))
+
+
 def test_calc_series():
     pvconst = PVconstants()
     pvcells = [
@@ -107,6 +143,123 @@ def test_update():
     assert pvc._calc_now
 
 
+def test_pvcell_array_matches_pvcell():
+    """
+    Test that ``PVcellArray`` gives the same IV curves as ``PVcell``.
+    """
+    pvconst = PVconstants()
+    pvcells = [
+        PVcell(pvconst=pvconst),
+        PVcell(pvconst=pvconst, Ee=0.75, Tcell=313),
+        PVcell(pvconst=pvconst, Ee=0.55, Tcell=283, bRBD=-0.056),
+        PVcell(pvconst=pvconst, Ee=1.2, Rs=0.001)
+    ]
+    pvcells[1].Tcell = 303  # Voc at STC is estimated at the original Tcell
+    pvcells_array = PVcellArray.from_pvcells(pvcells)
+    assert pvcells_array.Icell.shape == (4, 3 * pvconst.npts)
+    for idx, pvc in enumerate(pvcells):
+        assert np.allclose(pvc.Icell.flat, pvcells_array.Icell[idx])
+        assert np.allclose(pvc.Vcell.flat, pvcells_array.Vcell[idx])
+        assert np.allclose(pvc.Pcell.flat, pvcells_array.Pcell[idx])
+        assert np.isclose(pvc.Voc, pvcells_array.Voc[idx])
+    # scalar parameters are broadcast to all cells
+    pvcells_array = PVcellArray(Ee=[1., 0.5, 0.], Tcell=323.15,
+                                pvconst=pvconst)
+    assert pvcells_array.numberCells == 3
+    pvc = PVcell(Ee=0.5, Tcell=323.15, pvconst=pvconst)
+    assert np.allclose(pvc.Icell.flat, pvcells_array.Icell[1])
+    # no irradiance is undefined, same as PVcell
+    assert np.isnan(pvcells_array.Aph[2])
+    pvcells_array.update(Ee=0.5)
+    assert np.allclose(pvc.Icell.flat, pvcells_array.Icell[0])
+
+
+def test_pvcell_cache():
+    """
+    Test IV curves of cells with the same parameters are cached.
+    """
+    CELL_CACHE.clear()
+    pvc = PVcell(Ee=0.123)
+    assert (CELL_CACHE.hits, CELL_CACHE.misses) == (0, 1)
+    assert not pvc.Icell.flags.writeable
+    # same parameters within quantization use the cached curves
+    pvc2 = PVcell(Ee=0.123 + 1e-15)
+    assert (CELL_CACHE.hits, CELL_CACHE.misses) == (1, 1)
+    assert pvc2.Icell is pvc.Icell
+    icell, vcell, pcell = pvc.calcCell()
+    assert np.allclose(icell, pvc2.Icell)
+    # different number of points is a different key
+    pvc3 = PVcell(Ee=0.123, pvconst=PVconstants(npts=51))
+    assert (CELL_CACHE.hits, CELL_CACHE.misses) == (1, 2)
+    assert pvc3.Icell.size == 3 * 51
+    # least recently used curves are evicted
+    maxsize = CELL_CACHE.maxsize
+    CELL_CACHE.maxsize = 2
+    try:
+        pvc2.Ee = 0.456
+        assert len(CELL_CACHE) == 2
+        assert pvc.cache_key not in CELL_CACHE
+        assert pvc3.cache_key in CELL_CACHE
+    finally:
+        CELL_CACHE.maxsize = maxsize
+        CELL_CACHE.clear()
+
+
+def test_calc_cells():
+    """
+    Test calculating many cells at once matches calculating each cell.
+    """
+    CELL_CACHE.clear()
+    pvcells = [PVcell(Ee=0.2), PVcell(), PVcell()]
+    for pvc in pvcells:
+        pvc._calc_now = False
+    for pvc, Ee, Tcell in zip(pvcells, [0.2, 0.5, 0.5], [290., 330., 330.]):
+        pvc.Ee, pvc.Tcell = Ee, Tcell
+    CELL_CACHE.clear()
+    pvcells[0].__dict__['_calc_now'] = True
+    pvcells[0].Tcell = 290.  # calculate and cache first cell
+    calc_cells(pvcells)
+    assert (CELL_CACHE.hits, CELL_CACHE.misses) == (1, 3)
+    assert len(CELL_CACHE) == 2
+    assert pvcells[1].Icell is pvcells[2].Icell
+    # cached curves don't keep the whole batch of curves alive
+    assert pvcells[1].Icell.base is None
+    for pvc in pvcells:
+        icell, vcell, pcell = pvc.calcCell()
+        assert np.allclose(pvc.Icell, icell)
+        assert np.allclose(pvc.Vcell, vcell)
+        assert np.allclose(pvc.Pcell, pcell)
+    CELL_CACHE.clear()
+
+
+def test_compact_pvcell():
+    """
+    Test compact cells have the same IV curves as cells and share parameters.
+    """
+    pvconst = PVconstants()
+    pvc = PVcell(Rsh=9., Tcell=310., Ee=0.8, pvconst=pvconst)
+    compact = CompactPVcell(Rsh=9., Tcell=310., Ee=0.8, pvconst=pvconst)
+    ok_(compact.cache_key == pvc.cache_key)
+    ok_(np.array_equal(compact.Icell, pvc.Icell))
+    ok_(np.array_equal(compact.Vcell, pvc.Vcell))
+    ok_(np.isclose(compact.calcVcell(0.), pvc.calcVcell(0.)))
+    ok_(CompactPVcell.from_pvcell(pvc).params is compact.params)
+    # diode parameters of compact cells are read-only
+    with pytest.raises(AttributeError):
+        compact.Rsh = 10.
+    # modules use compact cells the same as cells
+    pvmod = PVmodule(pvcells=[CompactPVcell() for _ in range(96)])
+    expected = PVmodule()
+    Ee = np.linspace(0.1, 1., 96)
+    for m in (pvmod, expected):
+        m.setSuns(Ee, cells=list(range(96)), Tc=320.)
+        m.setConditions(Rsh=5., cells=[0, 1])
+    ok_(np.allclose(pvmod.Pmod, expected.Pmod))
+    ok_(pvmod.pvcells[0].Rsh == 5.)
+    ok_(pvmod.pvcells[0].params is pvmod.pvcells[1].params)
+    ok_(pvmod.pvcells[2].params is pvmod.pvcells[95].params)
+
+
 if __name__ == "__main__":
     i, v = test_calc_series()
     iv_calc = np.concatenate([[i], [v]], axis=0).T
@@ -42,6 +42,145 @@ def test_minimum_current_close_to_max_voc_gh110():
     return calculated
 
 
+def test_npinterpx_batch():
+    """
+    Test batched interpolation matches ``npinterpx`` including extrapolation.
+    """
+    pvcells = pvcell.PVcellArray(Ee=[1., 0.8, 0.3], Tcell=[298.15, 323.15, 303.15])
+    xp = pvcells.Icell[:, ::-1]  # must be increasing
+    fp = pvcells.Vcell[:, ::-1]
+    # unsorted x that extrapolates past both ends of the curves
+    x = np.array([[-1., 3., 0.5, 1e50, 2.], [7., -0.1, 6., 2.5, 0.]])
+    batch = np.stack([xp, xp[::-1]]), np.stack([fp, fp[::-1]])
+    calculated = pvconstants.npinterpx_batch(x, *batch)
+    assert calculated.shape == (2, 3, 5)
+    for b in range(2):
+        for c in range(3):
+            expected = pvconstants.npinterpx(x[b], batch[0][b, c], batch[1][b, c])
+            assert np.allclose(calculated[b, c], expected)
+
+
+def test_calc_series_batch():
+    """
+    Test series combination with a leading batch axis.
+    """
+    pvmod = pvmodule.PVmodule()
+    pvmod.setSuns(np.linspace(0.2, 1., pvmod.numberCells))
+    pvconst = pvmod.pvconst
+    icells = pvmod.Icell.reshape(4, 24, -1)
+    vcells = pvmod.Vcell.reshape(4, 24, -1)
+    isc = pvmod.Isc.reshape(4, 24).mean(axis=1)
+    imax = np.array([30., 40., 50., 60.])
+    isub, vsub = pvconst.calcSeries(icells, vcells, isc, imax)
+    assert isub.shape == vsub.shape == (4, 3 * pvconst.npts)
+    for idx in range(4):
+        i, v = pvconst.calcSeries(icells[idx], vcells[idx], isc[idx], imax[idx])
+        assert np.allclose(isub[idx], i)
+        assert np.allclose(vsub[idx], v)
+
+
+def test_calc_parallel_batch():
+    """
+    Test parallel combination with a leading batch axis.
+    """
+    pvmod = pvmodule.PVmodule()
+    pvmod.setSuns(np.linspace(0.2, 1., pvmod.numberCells))
+    pvconst = pvmod.pvconst
+    icells = pvmod.Icell.reshape(16, 6, -1)
+    vcells = pvmod.Vcell.reshape(16, 6, -1)
+    voc = pvmod.Voc.reshape(16, 6)
+    vmax, vmin = voc.max(axis=1), pvmod.VRBD.min()
+    # use max Voc for half of the rows, so both Vff branches are tested
+    voc_mean = np.where(np.arange(16) < 8, voc.mean(axis=1), vmax)
+    irow, vrow = pvconst.calcParallel(icells, vcells, vmax, vmin, voc_mean)
+    assert irow.shape == vrow.shape == (16, 3 * pvconst.npts)
+    for idx in range(16):
+        i, v = pvconst.calcParallel(
+            icells[idx], vcells[idx], vmax[idx], vmin, voc_mean[idx]
+        )
+        assert np.allclose(irow[idx], i)
+        assert np.allclose(vrow[idx], v)
+
+
+def test_calc_parallel_shared_voltages():
+    """
+    Test adaptive voltages of parallel curves are only moved if they aren't
+    shared by the batch.
+    """
+    pvmod = pvmodule.PVmodule()
+    pvmod.setSuns(np.linspace(0.2, 1., pvmod.numberCells))
+    icells = pvmod.Icell.reshape(16, 6, -1)
+    vcells = pvmod.Vcell.reshape(16, 6, -1)
+    vmax, vmin = pvmod.Voc.max(), pvmod.VRBD.min()
+    log_grid = pvconstants.PVconstants()
+    adaptive = pvconstants.PVconstants(adaptive=True)
+    ilog, vlog = log_grid.calcParallel(icells, vcells, vmax, vmin)
+    # shared voltages are the same as log spaced points
+    ishared, vshared = adaptive.calcParallel(
+        icells, vcells, vmax, vmin, shared_voltages=True
+    )
+    assert vshared.shape == vlog.shape == (3 * log_grid.npts,)
+    assert np.array_equal(vshared, vlog)
+    assert np.allclose(ishared, ilog)
+    # otherwise the voltages of each curve are moved to where it bends
+    irow, vrow = adaptive.calcParallel(icells, vcells, vmax, vmin)
+    assert irow.shape == vrow.shape == (16, 3 * log_grid.npts)
+    assert not np.allclose(vrow, vlog)
+    for idx in range(16):
+        assert np.all(np.diff(vrow[idx]) > 0)
+        assert np.allclose(irow[idx], pvconstants.npinterpx_batch(
+            vrow[idx], vcells[idx], icells[idx]
+        ).sum(axis=0))
+
+
+def test_adaptive_points():
+    """
+    Test points are moved to where curves bend.
+    """
+    t = np.linspace(0., 2., 41)
+    # points of curves that don't bend aren't moved
+    zeros = np.zeros_like(t)
+    assert np.array_equal(
+        pvconstants.adaptive_points(t, zeros, zeros, 1., 1.), t
+    )
+    # points of a line with a corner at one are closer near the corner
+    X, Y = t, np.minimum(t, 1.)
+    moved = pvconstants.adaptive_points(t, X, Y, 1., 1.)
+    assert moved[0] == t[0] and moved[-1] == t[-1]
+    assert np.all(np.diff(moved) > 0)
+    assert np.sum(np.abs(moved - 1.) < 0.1) > np.sum(np.abs(t - 1.) < 0.1)
+    # adaptive points are more accurate for mismatched systems
+    Ee = {0: {0: {'Ee': 0.2, 'cells': list(range(12))}, 1: 0.5}, 1: 0.9}
+    pmp = []
+    for npts, adaptive in [(1000, False), (51, False), (51, True)]:
+        pvconst = pvconstants.PVconstants(npts=npts, adaptive=adaptive)
+        pvsys = pvsystem.PVsystem(pvconst=pvconst, numberStrs=2, numberMods=4)
+        pvsys.setSuns(Ee)
+        assert pvsys.Isys.size == 3 * npts
+        pmp.append(pvsys.Pmp)
+    assert abs(pmp[2] - pmp[0]) < abs(pmp[1] - pmp[0]) / 2.
+
+
+def test_float32():
+    """
+    Test curves are stored and combined with float32 and max power is close
+    to float64.
+    """
+    Ee = {0: {0: {'Ee': 0.2, 'cells': list(range(12))}, 1: 0.5}, 1: 0.9}
+    pmp = []
+    for dtype in (np.float64, np.float32):
+        pvconst = pvconstants.PVconstants(dtype=dtype)
+        pvsys = pvsystem.PVsystem(pvconst=pvconst, numberStrs=2, numberMods=4)
+        pvsys.setSuns(Ee)
+        pvmod = pvsys.pvmods[0][0]
+        for x in (pvmod.pvcells[0].Icell, pvmod.Imod, pvmod.Vmod,
+                  pvsys.pvstrs[0].Istring, pvsys.Isys, pvsys.Vsys):
+            assert x.dtype == dtype
+            assert np.all(np.isfinite(x))
+        pmp.append(pvsys.Pmp)
+    assert np.isclose(pmp[1], pmp[0], rtol=1e-5)
+
+
 if __name__ == '__main__':
     calculated = test_minimum_current_close_to_max_voc_gh110()
     np.savetxt(os.path.join(BASEDIR, 'gh110.dat'), calculated)
\ No newline at end of file
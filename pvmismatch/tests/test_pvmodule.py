@@ -2,7 +2,10 @@
 Tests for pvmodules.
 """
 import pytest
-from pvmismatch.pvmismatch_lib.pvmodule import PVmodule, TCT492, PCT492
+from pvmismatch.pvmismatch_lib.pvmodule import (
+    PVmodule, TCT492, PCT492, STD72, MODULE_CACHE, crosstied_cellpos_pat
+)
+from pvmismatch.pvmismatch_lib.pvsystem import PVsystem
 from pvmismatch.pvmismatch_lib.pvcell import PVcell
 import numpy as np
 from copy import copy
@@ -80,6 +83,180 @@ def test_bypass_diode_configurations():
     pvm = PVmodule()
     assert (np.isclose(pvm.Vmod.min(), pvm.Vbypass * 3))
 
+def test_module_cache():
+    """
+    Test modules in the same state are only calculated once.
+    """
+    MODULE_CACHE.clear()
+    pvsys = PVsystem(numberStrs=4, numberMods=6)
+    assert MODULE_CACHE.misses == 1
+    # 3 distinct irradiances in 24 modules
+    pvsys.setSuns({s: {m: [0.5, 0.7, 0.9][(s + m) % 3] for m in range(6)}
+                   for s in range(4)})
+    assert MODULE_CACHE.misses == 4
+    pvmods = [pvmod for pvstr in pvsys.pvstrs for pvmod in pvstr.pvmods]
+    imods = dict((pvmod.Ee[0, 0], pvmod.Imod) for pvmod in pvmods)
+    assert all(pvmod.Imod is imods[pvmod.Ee[0, 0]] for pvmod in pvmods)
+    assert not pvmods[0].Imod.flags.writeable
+    # changing a cell directly also changes the key
+    pvmod = PVmodule()
+    pvmod.pvcells = list(pvmod.pvcells)
+    pvmod.pvcells[0] = copy(pvmod.pvcells[0])
+    pvmod.pvcells[0].Ee = 0.5
+    imod = pvmod.calcMod()[0]
+    assert MODULE_CACHE.misses == 5
+    assert np.allclose(imod, pvmod._calcMod()[0])
+    # same cells with a different topology or bypass diodes are different
+    PVmodule(Vbypass=-0.2)
+    PVmodule(Vbypass=[-0.5, None, -0.5])
+    assert MODULE_CACHE.misses == 7
+    MODULE_CACHE.clear()
+
+
+def test_compiled_plan():
+    """
+    Test cell position pattern is compiled into index arrays.
+    """
+    pvmod = PVmodule()
+    plan = pvmod.plan
+    # STD96 substrings have 24, 48 and 24 cells in series, so 2 batches
+    assert [idxs.shape for _, idxs in plan['series']] == [(2, 24), (1, 48)]
+    assert [s[0] for s in plan['substrs']] == ['series'] * 3
+    assert np.allclose(plan['Vbypass_substr'], pvmod.Vbypass)
+    assert plan['Vbypass_module'] is None
+    # PCT492 columns between crossties are batched too
+    pct492 = crosstied_cellpos_pat([27, 28, 27], 6, partial=True)
+    plan = PVmodule(cell_pos=pct492).plan
+    assert [idxs.shape for _, idxs in plan['series']] == [(12, 27), (6, 28)]
+    assert [s[0] for s in plan['substrs']] == ['mixed'] * 3
+    plan = PVmodule(cell_pos=TCT492, Vbypass=[-0.5, None, -0.5]).plan
+    assert [s[1].shape for s in plan['substrs']] == [(27, 6), (28, 6), (27, 6)]
+    assert np.isnan(plan['Vbypass_substr'][1])
+    # plan is compiled again if the cell position pattern changes
+    pvmod.cell_pos = STD72
+    pvmod.pvcells = pvmod.pvcells[:72]
+    pvmod.numberCells = 72
+    assert np.allclose(pvmod.calcMod()[0], PVmodule(cell_pos=STD72).Imod)
+    with pytest.raises(Exception):
+        PVmodule(cell_pos=[[[{'crosstie': False, 'idx': 0},
+                             {'crosstie': True, 'idx': 1}]]], pvcells=[PVcell()] * 2)
+
+
+def test_cell_arrays():
+    """
+    Test cell arrays are cached until cells change.
+    """
+    pvmod = PVmodule()
+    icell = pvmod.Icell
+    assert icell.shape == (96, 3 * pvmod.pvconst.npts)
+    assert pvmod.Icell is icell
+    assert not icell.flags.writeable
+    assert pvmod.Ee.shape == (96, 1)
+    # setting cells invalidates arrays
+    pvmod.setSuns(0.5, cells=[0, 1])
+    assert pvmod.Icell is not icell
+    assert np.allclose(pvmod.Ee.ravel(), [0.5] * 2 + [1.] * 94)
+    # so does calcMod, after changing cells in place
+    assert pvmod.Tcell[2] == 298.15
+    pvmod.pvcells[2] = copy(pvmod.pvcells[2])
+    pvmod.pvcells[2].Tcell = 323.15
+    assert pvmod.Tcell[2] == 298.15
+    pvmod.calcMod()
+    assert pvmod.Tcell[2] == 323.15
+    assert np.allclose(pvmod.Icell[2], pvmod.pvcells[2].Icell.ravel())
+    # copies don't share invalidated arrays
+    pvmod2 = copy(pvmod)
+    pvmod2.setSuns(0.2)
+    assert np.allclose(pvmod.Ee.ravel()[:3], [0.5, 0.5, 1.])
+    assert np.allclose(pvmod2.Ee, 0.2)
+
+
+def test_operating_point():
+    """
+    Test operating points of substrings and cells at module currents.
+    """
+    pvmod = PVmodule()
+    pvmod.setSuns(0.2, cells=list(range(10)))
+    op = pvmod.operating_point([2., 5.])
+    assert op['Icell'].shape == op['Pcell'].shape == (2, 96)
+    assert op['bypassed'].tolist() == [[True, False, False]] * 2
+    assert np.allclose(op['Vsubstr'].sum(axis=1), op['Vmod'], rtol=1e-4)
+    for n, substr in enumerate(pvmod.cell_pos):
+        idxs = [r['idx'] for c in substr for r in c]
+        # cells in bypassed substring operate at the bypass voltage
+        assert np.allclose(op['Vcell'][:, idxs].sum(axis=1),
+                           op['Vsubstr'][:, n], rtol=1e-3)
+        assert np.allclose(op['Icell'][:, idxs], op['Isubstr'][:, n, None])
+    assert np.allclose(op['Vsubstr'][:, 0], pvmod.Vbypass)
+    assert np.all(op['Isubstr'][:, 0] < 2.)
+    assert np.allclose(op['Isubstr'][:, 1:], [[2.], [5.]])
+    # crosstied cells share the row voltage and row currents add up
+    pvmod = PVmodule(cell_pos=crosstied_cellpos_pat([8, 8, 8], 2))
+    pvmod.setSuns(0.2, cells=[0, 1, 30])
+    op = pvmod.operating_point(5.)
+    rows = pvmod.plan['substrs'][0][1]
+    assert np.allclose(op['Vcell'][rows[:, 0]], op['Vcell'][rows[:, 1]])
+    assert np.allclose(op['Icell'][rows].sum(axis=1), 5., rtol=1e-3)
+    # one bypass diode across the module
+    pvmod = PVmodule(Vbypass=[-0.5])
+    pvmod.setSuns(0.1, cells=list(range(40)))
+    op = pvmod.operating_point(5.)
+    assert np.isclose(op['Vmod'], -0.5) and op['bypassed'].all()
+    assert np.isclose(op['Vsubstr'].sum(), -0.5, rtol=1e-2)
+    # partially crosstied substrings are approximated as crosstied rows
+    pvmod = PVmodule(cell_pos=PCT492)
+    op = pvmod.operating_point(5.)
+    rows = np.array([[r['idx'] for r in row]
+                     for row in zip(*pvmod.cell_pos[0])])
+    assert np.isclose(op['Vcell'][rows[:, 0]].sum(), op['Vsubstr'][0],
+                      rtol=1e-2)
+    assert np.allclose(op['Icell'][rows].sum(axis=1), 5., rtol=1e-2)
+
+
+def test_operating_point_bypassed_cells():
+    """
+    Test cell voltages in bypassed substrings add up to the bypass voltage.
+    """
+    pvmod = PVmodule()
+    pvmod.setSuns(0.3, cells=[0, 5])
+    op = pvmod.operating_point([2., 5., 8.])
+    assert op['bypassed'][:, 0].tolist() == [False, False, True]
+    idxs = [r['idx'] for c in pvmod.cell_pos[0] for r in c]
+    assert np.isclose(op['Vcell'][2, idxs].sum(), op['Vsubstr'][2, 0])
+    assert np.isclose(op['Vcell'][2, idxs].sum(), pvmod.Vbypass)
+    # crosstied rows
+    pvmod = PVmodule(cell_pos=TCT492)
+    rows = np.array([[r['idx'] for r in row]
+                     for row in zip(*pvmod.cell_pos[0])])
+    pvmod.setSuns(0.05, cells=rows[:5].ravel().tolist())
+    op = pvmod.operating_point([5., 8.])
+    assert op['bypassed'][:, 0].all()
+    assert np.allclose(op['Vcell'][:, rows[:, 0]].sum(axis=1),
+                       op['Vsubstr'][:, 0])
+    assert np.allclose(op['Vsubstr'][:, 0], pvmod.Vbypass)
+
+
+def test_bypass_reverse_bias():
+    """
+    Test bypass diodes and reverse biased cells of a shaded module.
+    """
+    pvmod = PVmodule()
+    pvmod.setSuns(0.2, cells=list(range(10)))
+    # substring is reverse biased, but not at the bypass voltage yet
+    Vsubstr = pvmod.operating_point(1.39)['Vsubstr']
+    assert np.allclose(Vsubstr, [-0.1438112, 31.7477292, 15.8738646])
+    bypassed, reverse_biased = pvmod.bypass_reverse_bias(1.39)
+    assert not bypassed.any()
+    assert np.flatnonzero(reverse_biased).tolist() == list(range(10))
+    # cells in the bypassed substring carry less than the module current, so
+    # cell 10 isn't reverse biased, even though it would be at 5[A]
+    pvmod.setSuns(0.6, cells=[10])
+    pvc = pvmod.pvcells[10]
+    assert np.interp(5., pvc.Icell.ravel()[::-1], pvc.Vcell.ravel()[::-1]) < 0
+    bypassed, reverse_biased = pvmod.bypass_reverse_bias(5.)
+    assert bypassed.tolist() == [True, False, False]
+    assert np.flatnonzero(reverse_biased).tolist() == list(range(10))
+
 if __name__ == "__main__":
     test_calc_mod()
     test_calc_tct_mod()
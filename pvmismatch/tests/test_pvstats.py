@@ -0,0 +1,50 @@
+"""
+Test recording stats of each stage.
+"""
+
+import pytest
+from pvmismatch import *
+from pvmismatch.pvmismatch_lib.pvexceptions import PVexception
+
+
+def test_pvstats():
+    """
+    Test stats record calls of each stage and cache hits, and methods are
+    only changed while recording.
+    """
+    calcMod = pvmodule.PVmodule.calcMod
+    calc_mpp = pvsystem.calc_mpp
+    pvmodule.MODULE_CACHE.clear()
+    with pvstats.PVstats() as stats:
+        assert stats.recording
+        assert pvmodule.PVmodule.calcMod is not calcMod
+        pvsys = pvsystem.PVsystem(numberStrs=2, numberMods=4)
+        pvsys.setSuns({0: {0: {'Ee': 0.2, 'cells': list(range(12))}}})
+        # same shaded module again is found in cache
+        pvsys.setSuns({1: {0: {'Ee': 0.2, 'cells': list(range(12))}}})
+        # only one stats can record at a time
+        with pytest.raises(PVexception):
+            pvstats.PVstats().start()
+    assert not stats.recording
+    assert pvmodule.PVmodule.calcMod is calcMod
+    assert pvsystem.calc_mpp is calc_mpp
+    assert stats.calls('PVmodule.calcMod') == 3
+    assert stats.calls('PVsystem.update') == 3
+    assert stats.calls('calc_mpp') == 3
+    assert stats.calls('PVconstants.calcSeries') > 0
+    total = stats.total('PVsystem.update')
+    assert total > 0
+    p50, p90, p99 = stats.percentiles('PVsystem.update')
+    assert 0 < p50 <= p90 <= p99 <= total
+    assert stats.hits['modules'] == 1
+    assert stats.misses['modules'] == 2
+    assert stats.hit_rate('modules') == pytest.approx(1. / 3.)
+    summary = stats.summary()
+    assert summary['stages']['PVmodule.calcMod']['calls'] == 3
+    assert 'PVstring.calcString' in str(stats)
+    # stats aren't recorded after stopping
+    pvsys.setSuns(0.5)
+    assert stats.calls('PVsystem.update') == 3
+    stats.clear()
+    assert stats.calls('PVsystem.update') == 0
+    assert stats.hit_rate('modules') == 0
@@ -1,4 +1,6 @@
 from pvmismatch import *
+import numpy as np
+import pytest
 
 
 def check_same_pvconst_and_lengths(pvstr):
@@ -22,3 +24,22 @@ def test_pvstring_with_pvmods_obj():
 def test_pvstring_with_no_pvmods():
     pvstr = pvstring.PVstring()
     check_same_pvconst_and_lengths(pvstr)
+
+
+def test_module_arrays_read_only():
+    pvstr = pvstring.PVstring(numberMods=3)
+    Imod = pvstr.Imod
+    assert Imod.shape == (3, pvstr.pvmods[0].Imod.size)
+    # module arrays are cached, so they're read-only
+    for x in (Imod, pvstr.Vmod, pvstr.Voc_mod):
+        assert not x.flags.writeable
+        with pytest.raises(ValueError):
+            x[0] = 0.
+    assert pvstr.Imod is Imod
+    # copies can be changed
+    Imod = Imod.copy()
+    Imod[0] = 0.
+    assert not np.array_equal(Imod, pvstr.Imod)
+    # cached arrays are replaced, not changed, when modules change
+    pvstr.setSuns({1: 0.5})
+    assert pvstr.Imod is not Imod
@@ -1,4 +1,8 @@
 from pvmismatch import *
+from copy import copy
+import pickle
+import numpy as np
+import pytest
 
 
 def check_same_pvconst_and_lengths(pvsys):
@@ -23,3 +27,254 @@ def test_pvsystem_with_pvstrs_obj():
 def test_pvsystem_with_no_pvstrs():
     pvsys = pvsystem.PVsystem()
     check_same_pvconst_and_lengths(pvsys)
+
+
+def test_simulate():
+    pvsys = pvsystem.PVsystem(numberStrs=3, numberMods=4)
+    Ee = np.array([[[0.5, 0.6, 0.7, 0.8], [0.9] * 4, [0.4] * 4],
+                   np.zeros((3, 4)),
+                   [[0.5, 0.6, 0.7, 0.8], [0.9] * 4, [0.4] * 4]])
+    Tc = np.array([298.15, 298.15, 323.15])
+    results = pvsys.simulate(Ee, Tc[:, None, None])
+    assert set(results) == {'Pmp', 'Vmp', 'Imp', 'Isc', 'Voc', 'FF'}
+    assert all(r.shape == (3,) for r in results.values())
+    # no irradiance
+    assert all(r[1] == 0 for r in results.values())
+    # same as setting irradiance and temperature on a new system
+    for t in (0, 2):
+        pvsys_t = pvsystem.PVsystem(numberStrs=3, numberMods=4)
+        pvsys_t.setTemps(Tc[t])
+        pvsys_t.setSuns(dict(
+            (s, dict((m, Ee[t, s, m]) for m in range(4))) for s in range(3)
+        ))
+        for k, r in results.items():
+            assert np.isclose(r[t], getattr(pvsys_t, k))
+    # system is left in last state
+    assert np.isclose(pvsys.Pmp, results['Pmp'][2])
+    # per cell irradiance and same temperatures
+    Ee_cells = np.full((2, 3, 4, 96), 0.8)
+    Ee_cells[1, 0, 0, :10] = 0.2
+    results = pvsys.simulate(Ee_cells)
+    assert results['Pmp'][0] > results['Pmp'][1]
+    with pytest.raises(ValueError):
+        pvsys.simulate(np.ones((2, 5)))
+
+
+def test_simulate_processes():
+    pvsys = pvsystem.PVsystem(numberStrs=2, numberMods=3)
+    Ee = np.array([0.9, 0.0, 0.5, 0.7, 0.3])[:, None, None] * [[1, 1, 0.5]]
+    expected = pvsys.simulate(Ee)
+    results = pvsys.simulate(Ee, processes=2, chunksize=2)
+    for k, r in expected.items():
+        assert np.array_equal(results[k], r)
+    assert np.isclose(pvsys.Pmp, expected['Pmp'][-1])
+    # workers don't change their template, so chunks reuse its modules
+    pvsystem._init_simulate_worker(pickle.dumps(pvsys))
+    pvstrs = pvsystem._TEMPLATE.pvstrs
+    Pmp = [pvsystem._simulate_chunk((Ee[t:t + 2], None))['Pmp']
+           for t in (0, 2, 4)]
+    assert pvsystem._TEMPLATE.pvstrs is pvstrs
+    assert np.array_equal(np.concatenate(Pmp), expected['Pmp'])
+    sizes = [len(cache) for cache in pvsystem._CACHES]
+    pvsystem._simulate_chunk((Ee[:2], None))
+    assert [len(cache) for cache in pvsystem._CACHES] == sizes
+    pvsystem._TEMPLATE = pvsystem._CACHES = None
+
+
+
+def test_set_suns_in_place():
+    pvsys = pvsystem.PVsystem(numberStrs=3, numberMods=2)
+    pvstrs = list(pvsys.pvstrs)
+    # scalars change the strings in place
+    pvsys.setSuns(0.5)
+    assert all(p is q for p, q in zip(pvsys.pvstrs, pvstrs))
+    assert np.allclose(pvstrs[0].pvmods[0].Ee, 0.5)
+    pvsys.setTemps(323.15)
+    assert all(p is q for p, q in zip(pvsys.pvstrs, pvstrs))
+    assert np.allclose(pvstrs[0].pvmods[0].Tcell, 323.15)
+    expected = pvsystem.PVsystem(numberStrs=3, numberMods=2)
+    expected.setConditions(Ee=0.5, Tc=323.15)
+    assert np.isclose(pvsys.Pmp, expected.Pmp)
+    # dictionaries replace the strings that they set with copies
+    pvsys.setSuns({1: 0.2})
+    assert pvsys.pvstrs[1] is not pvstrs[1]
+    assert pvsys.pvstrs[0] is pvstrs[0] and pvsys.pvstrs[2] is pvstrs[2]
+    assert np.allclose(pvstrs[1].pvmods[0].Ee, 0.5)
+    assert np.allclose(pvsys.pvstrs[1].pvmods[0].Ee, 0.2)
+
+def test_update_dirty_strings():
+    pvsys = pvsystem.PVsystem(numberStrs=4, numberMods=3)
+    Isys_str = pvsys._Isys_str
+    pvsys.setSuns({2: {1: 0.5}})
+    # only the string that changed is combined again
+    assert np.array_equal(pvsys._Isys_str[[0, 1, 3]], Isys_str[[0, 1, 3]])
+    assert not np.array_equal(pvsys._Isys_str[2], Isys_str[2])
+    expected = pvsystem.PVsystem(pvstrs=list(pvsys.pvstrs))
+    assert np.allclose(pvsys.Isys, expected.Isys)
+    assert np.isclose(pvsys.Pmp, expected.Pmp)
+    assert np.isclose(pvsys.eff, expected.eff)
+    cellArea = pvsys.pvmods[0][0].cellArea
+    assert np.isclose(pvsys.totalSuns, (4 * 3 - 0.5) * 96 * cellArea)
+    # strings replaced outside of the system are found by update()
+    pvsys.pvstrs[3] = pvsys.pvstrs[2]
+    pvsys.update()
+    expected = pvsystem.PVsystem(pvstrs=list(pvsys.pvstrs))
+    assert np.allclose(pvsys.Isys, expected.Isys)
+    assert np.isclose(pvsys.Pmp, expected.Pmp)
+    assert np.isclose(pvsys.totalSuns, (4 * 3 - 1) * 96 * cellArea)
+
+
+def test_update_after_reading_string_totals():
+    """
+    Test reading string totals before update doesn't hide replaced strings.
+    """
+    pvsys = pvsystem.PVsystem(numberStrs=4, numberMods=3)
+    pvstr = copy(pvsys.pvstrs[1])
+    pvstr.setSuns({0: {'Ee': 0.2, 'cells': list(range(12))}})
+    pvsys.pvstrs[1] = pvstr
+    assert np.isclose(pvsys.Voc_str[1], pvstr.Voc_mod.sum())
+    pvsys.update()
+    expected = pvsystem.PVsystem(pvstrs=list(pvsys.pvstrs))
+    assert np.allclose(pvsys.Isys, expected.Isys)
+    assert np.isclose(pvsys.Pmp, expected.Pmp)
+    # strings replaced earlier are also found with an explicit dirty list
+    pvsys.pvstrs[2] = pvstr
+    assert pvsys.totalSuns < expected.totalSuns
+    pvsys.setSuns({0: 0.9})
+    expected = pvsystem.PVsystem(pvstrs=list(pvsys.pvstrs))
+    assert np.allclose(pvsys.Isys, expected.Isys)
+    assert np.isclose(pvsys.Pmp, expected.Pmp)
+    assert np.allclose(pvsys.Istring, expected.Istring)
+
+
+def test_lazy():
+    pvconst = pvconstants.PVconstants(lazy=True)
+    pvsys = pvsystem.PVsystem(pvconst=pvconst, numberStrs=3, numberMods=4)
+    # nothing is calculated until it's accessed
+    pvstr = pvsys.pvstrs[0]
+    pvmod = pvstr.pvmods[0]
+    assert 'Pmp' not in vars(pvsys)
+    assert 'Istring' not in vars(pvstr)
+    assert 'Imod' not in vars(pvmod)
+    assert 'Icell' not in vars(pvmod.pvcells[0])
+    pvsys.setSuns({1: {2: 0.5}})
+    pvsys.setTemps({1: {2: 320.}})
+    assert 'Pmp' not in vars(pvsys)
+    expected = pvsystem.PVsystem(numberStrs=3, numberMods=4)
+    expected.setSuns({1: {2: 0.5}})
+    expected.setTemps({1: {2: 320.}})
+    assert np.isclose(pvsys.Pmp, expected.Pmp)
+    assert np.allclose(pvsys.Isys, expected.Isys)
+    assert 'Imod' in vars(pvsys.pvmods[1][2])
+    # explicitly invalidate after changing cells in place
+    pvc = pvcell.PVcell(pvconst=pvconst)
+    pvsys = pvsystem.PVsystem(pvconst=pvconst, numberStrs=3, numberMods=4,
+                              pvmods=pvmodule.PVmodule(pvcells=pvc))
+    Pmp = pvsys.Pmp
+    pvc.Ee = 0.5
+    assert 'Icell' not in vars(pvc)
+    for pvx in [pvsys.pvmods[0][0], pvsys.pvstrs[0], pvsys]:
+        pvx.invalidate()
+    assert np.isclose(pvsys.Pmp, Pmp / 2, rtol=0.05)
+
+
+def test_pvsystem_array():
+    rs = np.random.RandomState(0)
+    Ee = rs.uniform(0.2, 1., (4, 3, 96))
+    Tc = rs.uniform(290., 330., (4, 3, 96))
+    Ee[1] = Ee[0]  # identical strings
+    pvsys_array = pvsystem.PVsystemArray(numberStrs=4, numberMods=3, Ee=Ee,
+                                         Tc=Tc, chunksize=5)
+    pvsys = pvsystem.PVsystem(numberStrs=4, numberMods=3)
+
+    def set_conditions():
+        pvsys.setConditions(
+            Ee=dict((s, dict((m, Ee[s, m]) for m in range(3)))
+                    for s in range(4)),
+            Tc=dict((s, dict((m, Tc[s, m]) for m in range(3)))
+                    for s in range(4))
+        )
+
+    set_conditions()
+    for k in ['Isys', 'Vsys', 'Pmp', 'Imp', 'Vmp', 'Isc', 'Voc', 'FF', 'eff']:
+        assert np.allclose(getattr(pvsys_array, k), getattr(pvsys, k))
+    # change some strings in place
+    Ee[2, 1, :10] = 0.1
+    pvsys_array.Ee[2, 1, :10] = 0.1
+    pvsys_array.update([2])
+    set_conditions()
+    assert np.allclose(pvsys_array.Isys, pvsys.Isys)
+    assert np.isclose(pvsys_array.Pmp, pvsys.Pmp)
+    assert np.isclose(pvsys_array.eff, pvsys.eff)
+
+
+def test_calc_mpp():
+    # without string curves max power is the largest power of the system
+    Vsys = np.linspace(0., 10., 4)
+    Isys = 5. - 0.5 * Vsys
+    Imp, Vmp, Pmp, Isc, Voc, FF = pvsystem.calc_mpp(Isys, Vsys, Isys * Vsys)
+    assert np.isclose(Vmp, Vsys[1]) and np.isclose(Pmp, (Isys * Vsys).max())
+    assert np.isclose(Isc, 5.) and np.isclose(Voc, 10.)
+    # string IV points between the neighbors of the max power are also used
+    Vstring = np.array([[0., 5., 10.]])
+    Istring = 5. - 0.5 * Vstring
+    Imp, Vmp, Pmp, Isc, Voc, FF = pvsystem.calc_mpp(
+        Isys, Vsys, Isys * Vsys, Istring, Vstring
+    )
+    assert np.isclose(Vmp, 5.) and np.isclose(Imp, 2.5)
+    assert np.isclose(Pmp, 12.5) and np.isclose(FF, 0.25)
+    # max power is more accurate with fewer points
+    expected = pvsystem.PVsystem(
+        pvconst=pvconstants.PVconstants(npts=2000), numberStrs=2, numberMods=4
+    )
+    pvsys = pvsystem.PVsystem(
+        pvconst=pvconstants.PVconstants(npts=50), numberStrs=2, numberMods=4
+    )
+    assert pvsys.Psys.max() < pvsys.Pmp < expected.Pmp
+    assert np.isclose(pvsys.Pmp, expected.Pmp, rtol=1e-4)
+
+
+def test_operating_point():
+    pvsys = pvsystem.PVsystem(numberStrs=3, numberMods=5)
+    pvsys.setSuns({0: {0: {'Ee': 0.2, 'cells': list(range(12))}, 2: 0.5},
+                   1: 0.8})
+    op = pvsys.operating_point()
+    assert op['V'] == pvsys.Vmp
+    assert op['Vmod'].shape == (3, 5)
+    assert op['bypassed'].shape == (3, 5, 3)
+    assert op['Pcell'].shape == (3, 5, 96)
+    # module voltages add up to the system voltage
+    assert np.allclose(op['Vmod'].sum(axis=1), pvsys.Vmp)
+    assert np.isclose(op['Istring'].sum(), pvsys.Imp, rtol=1e-2)
+    assert np.allclose(op['Vsubstr'].sum(axis=2), op['Vmod'], rtol=1e-4)
+    assert op['bypassed'][0, 0, 0] and op['bypassed'].sum() == 1
+    assert np.all(op['Pcell'][0, 0, :12] < 0)
+    # same as each module
+    pvmod = pvsys.pvmods[0][0]
+    op_mod = pvmod.operating_point(op['Istring'][0])
+    for k in ('Vmod', 'Isubstr', 'Vsubstr', 'bypassed', 'Icell', 'Vcell'):
+        assert np.allclose(op[k][0, 0], op_mod[k])
+    # strings with different numbers of modules are padded
+    pvconst = pvconstants.PVconstants()
+    pvstrs = [pvstring.PVstring(numberMods=n, pvconst=pvconst)
+              for n in (2, 3)]
+    op = pvsystem.PVsystem(pvstrs=pvstrs).operating_point(50.)
+    assert np.isnan(op['Vmod'][0, 2]) and not op['bypassed'][0, 2].any()
+    assert np.allclose(np.nansum(op['Vmod'], axis=1), 50.)
+
+
+def test_bypass_reverse_bias():
+    pvsys = pvsystem.PVsystem(numberStrs=2, numberMods=3)
+    pvsys.setSuns({0: {1: {'Ee': 0.1, 'cells': [0, 1, 2, 30]}}})
+    bypassed, reverse_biased = pvsys.bypass_reverse_bias()
+    assert bypassed.shape == (2, 3, 3)
+    assert reverse_biased.shape == (2, 3, 96)
+    assert np.flatnonzero(bypassed).tolist() == [3]  # string 0, module 1
+    assert np.flatnonzero(reverse_biased[0, 1]).tolist() == [0, 1, 2, 30]
+    assert not reverse_biased[1].any()
+    # cell 30 isn't bypassed, so it's at the string current
+    op = pvsys.operating_point()
+    pvc = pvsys.pvmods[0][1].pvcells[30]
+    Vcell = np.interp(op['Istring'][0], pvc.Icell.ravel()[::-1],
+                      pvc.Vcell.ravel()[::-1])
+    assert Vcell < 0 and np.isclose(op['Vcell'][0, 1, 30], Vcell)
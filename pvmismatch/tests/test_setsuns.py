@@ -5,6 +5,7 @@ Bennet Meyers 10/10/16
 """
 
 import numpy as np
+import pytest
 from nose.tools import ok_
 from pvmismatch.pvmismatch_lib.pvsystem import PVsystem
 import logging
@@ -16,45 +17,45 @@ LOGGER = logging.getLogger(__name__)
 def test_basic():
     pvsys = PVsystem()
     pvsys.setSuns(.75)
-    ok_(np.isclose(pvsys.Pmp, 23908.773330127806))
+    ok_(np.isclose(pvsys.Pmp, 23910.120064430223))
 
 
 def test_dictionary():
     pvsys = PVsystem()
     Ee = {1: {3: {'cells': np.arange(30), 'Ee': [.25] * 30}}}
     pvsys.setSuns(Ee)
-    ok_(np.isclose(pvsys.Pmp, 31619.56808987828))
+    ok_(np.isclose(pvsys.Pmp, 31619.905013892294))
 
 
 def test_set_mod_1():
     pvsys = PVsystem()
     Ee = {1: {3: [.2], 0: [.1]}}
     pvsys.setSuns(Ee)
-    ok_(np.isclose(pvsys.Pmp, 29570.33263114967))
+    ok_(np.isclose(pvsys.Pmp, 29571.063066358813))
 
 
 def test_set_mod_2():
     pvsys = PVsystem()
     Ee = {1: {3: .2, 0: .1}}
     pvsys.setSuns(Ee)
-    ok_(np.isclose(pvsys.Pmp, 29570.33263114967))
-    # 1001 points linear: [ 29579.12191565]
+    ok_(np.isclose(pvsys.Pmp, 29571.063066358813))
+    # 1001 points: 29579.11162702
 
 
 def test_set_str_1():
     pvsys = PVsystem()
     Ee = {1: [.1]}
     pvsys.setSuns(Ee)
-    ok_(np.isclose(pvsys.Pmp, 29140.183832416682))
-    # 1001 points linear: [ 29141.73034719]
+    ok_(np.isclose(pvsys.Pmp, 29140.416983169922))
+    # 1001 points: 29141.82880197
 
 
 def test_set_str_2():
     pvsys = PVsystem()
     Ee = {1: .1}
     pvsys.setSuns(Ee)
-    ok_(np.isclose(pvsys.Pmp, 29140.183832416682))
-    # 1001 points linear: [ 29141.73034719]
+    ok_(np.isclose(pvsys.Pmp, 29140.416983169922))
+    # 1001 points: 29141.82880197
 
 
 def test_gh34_35():
@@ -195,3 +196,53 @@ def test_gh34_35():
     assert pvsys.pvstrs[2].pvmods[4].pvcells[5].Ee == 0.33
     assert pvsys.pvstrs[2].pvmods[4].pvcells[3] == pvsys.pvstrs[2].pvmods[4].pvcells[5]
     assert pvsys.pvstrs[1].pvmods[0] == pvsys.pvstrs[1].pvmods[2]
+
+
+def test_set_suns_and_temps_together():
+    pvmod = PVsystem().pvmods[0][0]
+    Ee = np.repeat([0.3, 0.6, 0.9], 32)
+    Tc = np.repeat([300., 310.], 48)
+    pvmod.setSuns(Ee, Tc=Tc)
+    assert np.allclose(pvmod.Ee.ravel(), Ee)
+    assert np.allclose(pvmod.Tcell.ravel(), Tc)
+    # one new cell for each unique pair of irradiance and temperature
+    assert len(set(pvmod.pvcells)) == 4
+    expected = PVsystem().pvmods[0][0]
+    expected.setSuns(Ee)
+    expected.setTemps(Tc)
+    assert np.allclose(pvmod.Pmod, expected.Pmod)
+    # set both on some cells in a system
+    pvsys = PVsystem()
+    pvsys.setSuns({0: {1: {'cells': [0, 1, 2], 'Ee': 0.5, 'Tc': [320, 320, 330]}}})
+    pvmod = pvsys.pvmods[0][1]
+    assert (pvmod.Ee.ravel()[:4] == [0.5, 0.5, 0.5, 1.]).all()
+    assert (pvmod.Tcell.ravel()[:4] == [320, 320, 330, 298.15]).all()
+    assert pvmod.pvcells[0] is pvmod.pvcells[1]
+    assert pvmod.pvcells[1] is not pvmod.pvcells[2]
+
+
+def test_set_conditions():
+    pvsys = PVsystem()
+    pvsys.setConditions(
+        Ee={0: {1: [0.5, [0, 1, 2]]}, 2: 0.8},
+        Tc={0: {1: {'cells': [2, 3], 'Tc': 330}}}
+    )
+    expected = PVsystem()
+    expected.setTemps({0: {1: {'cells': [2, 3], 'Tc': 330}}})
+    expected.setSuns({0: {1: [0.5, [0, 1, 2]]}, 2: 0.8})
+    assert np.allclose(pvsys.Pmp, expected.Pmp)
+    # irradiance and temperature of different cells are merged
+    pvmod = pvsys.pvmods[0][1]
+    assert (pvmod.Ee.ravel()[:5] == [0.5, 0.5, 0.5, 1., 1.]).all()
+    assert (pvmod.Tcell.ravel()[:5] == [298.15, 298.15, 330, 330, 298.15]).all()
+    # strings and modules with the same conditions are still shared
+    assert pvsys.pvstrs[1] is pvsys.pvstrs[3]
+    assert pvsys.pvmods[2][0] is pvsys.pvmods[2][5]
+    assert pvsys.pvmods[0][0] is pvsys.pvmods[1][0]
+    # other cell parameters
+    pvsys.setConditions(Ee=0.9, Rsh={1: 5.})
+    assert (pvsys.pvmods[1][0].pvcells[0].Rsh == 5.)
+    assert (pvsys.pvmods[0][0].pvcells[0].Rsh != 5.)
+    # unknown cell parameters aren't set
+    with pytest.raises(AttributeError):
+        pvsys.setConditions(foo=1.)
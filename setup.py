@@ -4,9 +4,43 @@ try:
     from setuptools import setup
 except ImportError:
     from distutils.core import setup
-from pvmismatch import __version__, __name__, __email__, __url__
 import os
 
+# try to import Dulwich or create dummies
+try:
+    from dulwich.contrib.release_robot import get_current_version
+    from dulwich.repo import NotGitRepository
+except ImportError:
+    NotGitRepository = NotImplementedError
+
+    def get_current_version(*args, **kwargs):
+        raise NotGitRepository
+
+# Dulwich Release Robot, generate the version file from the release tag at
+# build time, this is the only place the version is set, so importing the
+# package never scans the repository or writes any files, the generated file
+# is ignored by Git, so builds don't change the work tree
+PROJDIR = os.path.dirname(os.path.abspath(__file__))
+VER_FILE = os.path.join(PROJDIR, 'pvmismatch', 'version.py')
+VER_TEMPLATE = '''"""
+Version of PVMismatch. This file is generated from the release tag by
+``setup.py`` when the package is built, and is never changed on import. It
+isn't tracked by Git, so a source checkout that wasn't built reports an
+unknown version.
+"""
+
+VERSION = "%s"
+'''
+try:
+    GIT_TAG = get_current_version(PROJDIR)
+except NotGitRepository:
+    GIT_TAG = None  # EG: an sdist, which already has the generated file
+if GIT_TAG is not None:
+    with open(VER_FILE, 'w') as vf:
+        vf.write(VER_TEMPLATE % GIT_TAG)
+
+from pvmismatch import __version__, __name__, __email__, __url__
+
 README = 'README.rst'
 try:
     with open(os.path.join(os.path.dirname(__file__), README), 'r') as readme:
@@ -15,10 +49,13 @@ except IOError:
     pass
 
 INSTALL_REQUIRES = [
-    'numpy>=1.13.3', 'matplotlib>=2.1.0', 'scipy>=1.0.0', 'future>=0.16.0',
-    'six>=1.11.0'
+    'numpy>=1.13.3', 'scipy>=1.0.0', 'future>=0.16.0', 'six>=1.11.0'
 ]
 
+# matplotlib is only imported by the plot methods and the pv_tk.py app, which
+# raises an error pointing to this extra if it is missing
+EXTRAS_REQUIRE = {'plot': ['matplotlib>=2.1.0']}
+
 TESTS_REQUIRES = [
     'nose>=1.3.7', 'pytest>=3.2.1', 'sympy>=1.1.1', 'pvlib>=0.5.1'
 ]
@@ -54,6 +91,7 @@ setup(
         'pvmismatch.contrib.gen_coeffs'
     ],
     install_requires=INSTALL_REQUIRES,
+    extras_require=EXTRAS_REQUIRE,
     tests_require=TESTS_REQUIRES,
     scripts=['pv_tk.py'],
     package_data={